@@ -0,0 +1,48 @@
+"""
+Renders the fixture corpus: every benchmarks/fixtures/<name>.txt without a
+<name>.wav is spoken with espeak-ng (sudo apt install espeak-ng).
+
+Synthetic speech keeps the corpus reproducible on any Linux box. Real
+recordings are better for WER: drop a 16 kHz mono <name>.wav next to its
+<name>.txt and this script leaves it alone.
+
+    python benchmarks/make_fixtures.py [--force] [--voice en-us] [--speed 165]
+"""
+import os
+import sys
+import shutil
+import argparse
+import subprocess
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render WAV fixtures from their transcripts.")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR)
+    parser.add_argument("--voice", default="en-us")
+    parser.add_argument("--speed", type=int, default=165, help="Words per minute")
+    parser.add_argument("--force", action="store_true", help="Re-render WAVs that already exist")
+    args = parser.parse_args(argv)
+
+    espeak = shutil.which("espeak-ng") or shutil.which("espeak")
+    if not espeak:
+        print("❌ espeak-ng not found. Install it (sudo apt install espeak-ng) or record the WAVs yourself.")
+        return 1
+
+    for entry in sorted(os.listdir(args.fixtures)):
+        name, ext = os.path.splitext(entry)
+        if ext != ".txt":
+            continue
+        wav_path = os.path.join(args.fixtures, name + ".wav")
+        if os.path.exists(wav_path) and not args.force:
+            continue
+        with open(os.path.join(args.fixtures, entry)) as f:
+            text = f.read().strip()
+        subprocess.run([espeak, "-v", args.voice, "-s", str(args.speed), "-w", wav_path, text], check=True)
+        print(f"🔊 {name}.wav")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
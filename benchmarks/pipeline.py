@@ -0,0 +1,336 @@
+"""
+Headless harness that runs recorded WAV fixtures through the real dictation
+pipeline and measures it.
+
+Only the edges are replaced: the microphone is a FakeAudioDevice that plays a
+fixture into AudioRecorder's callback block by block, the clipboard lives in
+memory and pastes go to a NullInjector. Everything in between (state machine,
+recorder thread, capture arena, VAD, streaming commits, the transcription
+worker, Whisper and FastTyper) is the code the app runs.
+"""
+import os
+import re
+import sys
+import importlib
+import time
+import types
+import wave
+import platform
+import resource
+import threading
+from unittest.mock import patch
+
+import numpy as np
+
+import zerog.core
+from zerog.core.engine import EngineConfig
+from zerog.core.clipboard import MemoryClipboard, set_clipboard
+from zerog.core.injector import NullInjector, set_injector
+from zerog.core.state import state_machine, AppState
+
+# Same as zerog.core.recorder.SAMPLE_RATE, which is only imported by PipelineBench
+SAMPLE_RATE = 16000
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Frames per callback; PortAudio hands sounddevice blocks of about this size
+BLOCK_FRAMES = 512
+# Give up on an utterance that takes this long past its own duration
+UTTERANCE_TIMEOUT_SECONDS = 120
+
+
+class Fixture:
+    """One recording and, if there is a .txt next to it, what was said."""
+
+    def __init__(self, name, audio, reference=None):
+        self.name = name
+        self.audio = audio
+        self.reference = reference
+
+    @property
+    def seconds(self):
+        return len(self.audio) / SAMPLE_RATE
+
+
+def load_wav(path, sample_rate=SAMPLE_RATE):
+    """Reads a PCM WAV as mono float32 at `sample_rate`, like the microphone delivers it."""
+    with wave.open(path, "rb") as f:
+        width, channels, rate = f.getsampwidth(), f.getnchannels(), f.getframerate()
+        raw = f.readframes(f.getnframes())
+    if width == 2:
+        audio = np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768.0
+    elif width == 4:
+        audio = np.frombuffer(raw, dtype="<i4").astype(np.float32) / 2147483648.0
+    elif width == 1:
+        audio = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    else:
+        raise ValueError(f"{path}: unsupported sample width {width * 8} bits")
+    audio = audio.reshape(-1, channels).mean(axis=1)
+    if rate != sample_rate:
+        # Linear resampling is plenty for speech; record at 16 kHz to skip it
+        n = int(round(len(audio) * sample_rate / rate))
+        audio = np.interp(np.arange(n) * (rate / sample_rate), np.arange(len(audio)), audio)
+    return np.ascontiguousarray(audio, dtype=np.float32)
+
+
+def load_fixtures(directory=FIXTURES_DIR):
+    """Every <name>.wav in `directory`, sorted by name, with <name>.txt as its reference."""
+    fixtures = []
+    for entry in sorted(os.listdir(directory)):
+        name, ext = os.path.splitext(entry)
+        if ext.lower() != ".wav":
+            continue
+        reference = None
+        text_path = os.path.join(directory, name + ".txt")
+        if os.path.exists(text_path):
+            with open(text_path) as f:
+                reference = f.read().strip()
+        fixtures.append(Fixture(name, load_wav(os.path.join(directory, entry)), reference))
+    return fixtures
+
+
+def normalize_words(text):
+    """Lowercase words without punctuation, so WER only counts what was heard."""
+    return re.findall(r"[a-z0-9']+", text.lower().replace("’", "'"))
+
+
+def word_errors(reference, hypothesis):
+    """Word-level edit distance (substitutions + insertions + deletions) and reference length."""
+    ref, hyp = normalize_words(reference), normalize_words(hypothesis)
+    previous = list(range(len(hyp) + 1))
+    for i, word in enumerate(ref, 1):
+        current = [i]
+        for j, heard in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (word != heard)))
+        previous = current
+    return previous[-1], len(ref)
+
+
+class FakeAudioDevice:
+    """
+    Stands in for sounddevice: open() has InputStream's signature and returns a
+    stream that plays the loaded fixture into the callback, at real-time pace
+    (like a microphone) or as fast as the recorder takes it.
+    """
+
+    def __init__(self, block_frames=BLOCK_FRAMES, realtime=True):
+        self.block_frames = block_frames
+        self.realtime = realtime
+        self.audio = np.zeros(0, dtype=np.float32)
+        self.drained = threading.Event()  # The whole fixture has been delivered
+
+    def load(self, audio):
+        self.audio = audio
+        self.drained.clear()
+
+    def open(self, samplerate=SAMPLE_RATE, channels=1, callback=None, **kwargs):
+        return _FakeStream(self, samplerate, callback)
+
+
+class _FakeStream:
+
+    def __init__(self, device, samplerate, callback):
+        self.device = device
+        self.samplerate = samplerate
+        self.callback = callback
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._play, name="FakeAudioDevice", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _play(self):
+        device = self.device
+        audio = device.audio.reshape(-1, 1)  # (frames, channels), as PortAudio delivers it
+        start = time.perf_counter()
+        for offset in range(0, len(audio), device.block_frames):
+            if self._stopped.is_set():
+                return
+            block = audio[offset:offset + device.block_frames]
+            self.callback(block, len(block), None, None)
+            if device.realtime:
+                # Sleep until the microphone would have captured the next block
+                delay = start + (offset + len(block)) / self.samplerate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+        device.drained.set()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def close(self):
+        pass
+
+
+def load_recorder():
+    """
+    Imports zerog.core.recorder. sounddevice needs PortAudio just to import; a
+    CPU box without audio hardware may not have it, and the fake device
+    replaces it anyway. The stand-in module is only seen by this import:
+    sys.modules is put back afterwards, so nothing else in the process
+    (e.g. the rest of a test session) picks it up.
+    """
+    try:
+        import sounddevice  # noqa: F401
+    except (ImportError, OSError):
+        pass
+    else:
+        return importlib.import_module("zerog.core.recorder")
+
+    names = ("sounddevice", "zerog.core.recorder")
+    missing = object()
+    saved = {name: sys.modules.pop(name, missing) for name in names}
+    had_attr = hasattr(zerog.core, "recorder")
+    sys.modules["sounddevice"] = types.ModuleType("sounddevice")
+    try:
+        return importlib.import_module("zerog.core.recorder")
+    finally:
+        for name in names:
+            if saved[name] is not missing:
+                sys.modules[name] = saved[name]
+            else:
+                sys.modules.pop(name, None)
+        if not had_attr:
+            zerog.core.__dict__.pop("recorder", None)
+
+
+class PipelineBench:
+    """
+    One AudioRecorder with one engine configuration, driven through the
+    global state machine exactly like the key listener drives it.
+    """
+
+    def __init__(self, engine, realtime=True):
+        self.device = FakeAudioDevice(realtime=realtime)
+        self.clipboard = MemoryClipboard()
+        set_clipboard(self.clipboard)
+        set_injector(NullInjector())
+        self._done = threading.Event()
+        self._processing = False
+        recorder_module = load_recorder()
+        self._device_patch = patch.object(recorder_module.sd, "InputStream", self.device.open, create=True)
+        self._device_patch.start()
+        self.recorder = recorder_module.AudioRecorder(engine=engine)
+        state_machine.add_observer(self._on_state)
+
+    def _on_state(self, state, data=None):
+        if state == AppState.PROCESSING:
+            self._processing = True
+        elif self._processing and state in (AppState.SUCCESS, AppState.IDLE, AppState.ERROR):
+            self._processing = False
+            self._done.set()
+
+    def load(self):
+        """Loads the model (and runs its warmup); returns the seconds it took."""
+        start = time.perf_counter()
+        self.recorder.start_loading()
+        self.recorder.model  # Blocks until the background load is done
+        return time.perf_counter() - start
+
+    def run(self, fixture):
+        """Dictates one fixture: key down, audio plays, key up, wait for the paste."""
+        copies = len(self.clipboard.copies)
+        timeout = fixture.seconds + UTTERANCE_TIMEOUT_SECONDS
+        self.device.load(fixture.audio)
+        self._done.clear()
+
+        state_machine.set_state(AppState.RECORDING)
+        if not self.device.drained.wait(timeout):
+            raise RuntimeError(f"{fixture.name}: the recorder never consumed the audio")
+        state_machine.set_state(AppState.PROCESSING, use_gemini=False)
+        if not self._done.wait(timeout):
+            raise RuntimeError(f"{fixture.name}: no result after {timeout:.0f}s")
+        finished = time.perf_counter()
+
+        trace = self.recorder.last_utterance.trace
+        hypothesis = self.clipboard.copies[-1] if len(self.clipboard.copies) > copies else ""
+        # Key up to text on screen; an empty result ends when the state machine says so
+        end = trace.spans["inject"][1] if "inject" in trace.spans else finished
+        result = {
+            "fixture": fixture.name,
+            "audio_seconds": fixture.seconds,
+            "latency": end - trace.events["key_up"],
+            "compute_seconds": sum(trace.spans[name][2] for name in ("vad", "inference") if name in trace.spans),
+            "hypothesis": hypothesis,
+        }
+        if fixture.reference is not None:
+            result["errors"], result["reference_words"] = word_errors(fixture.reference, hypothesis)
+        return result
+
+    def close(self):
+        state_machine.remove_observer(self._on_state)
+        state_machine.remove_observer(self.recorder.on_state_change)
+        self.recorder.events.close()
+        self.recorder.worker.stop()
+        self._device_patch.stop()
+        set_clipboard(None)
+        set_injector(None)
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process so far (ru_maxrss is in KiB on Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def summarize(utterances):
+    """RTF, latency percentiles and WER over every utterance of one configuration."""
+    latencies = [u["latency"] for u in utterances]
+    audio = sum(u["audio_seconds"] for u in utterances)
+    scored = [u for u in utterances if "errors" in u]
+    words = sum(u["reference_words"] for u in scored)
+    return {
+        "utterances": len(utterances),
+        "audio_seconds": round(audio, 3),
+        "rtf": round(sum(u["compute_seconds"] for u in utterances) / audio, 4) if audio else None,
+        "latency_p50": round(float(np.percentile(latencies, 50)), 4) if latencies else None,
+        "latency_p95": round(float(np.percentile(latencies, 95)), 4) if latencies else None,
+        "wer": round(sum(u["errors"] for u in scored) / words, 4) if words else None,
+    }
+
+
+def run_config(name, settings, fixtures_dir=FIXTURES_DIR, repeats=3, realtime=True):
+    """
+    Benchmarks one engine configuration. Meant to run in a fresh process per
+    configuration, so peak RSS belongs to that configuration alone.
+    """
+    fixtures = load_fixtures(fixtures_dir)
+    if not fixtures:
+        raise RuntimeError(f"No WAV fixtures in {fixtures_dir} (see benchmarks/make_fixtures.py)")
+    engine = EngineConfig(**settings)
+    bench = PipelineBench(engine, realtime=realtime)
+    try:
+        load_seconds = bench.load()
+        utterances = [bench.run(fixture) for _ in range(repeats) for fixture in fixtures]
+    finally:
+        bench.close()
+    return {
+        "config": name,
+        "engine": engine.describe(),
+        "settings": settings,
+        "load_seconds": round(load_seconds, 3),
+        **summarize(utterances),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "runs": utterances,
+    }
+
+
+def machine_info():
+    """Enough about this box to tell whether two baselines are comparable."""
+    cpu = platform.processor() or platform.machine()
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    cpu = line.split(":", 1)[1].strip()
+                    break
+    except OSError:
+        pass
+    info = {"cpu": cpu, "cores": os.cpu_count(), "python": platform.python_version()}
+    for module in ("faster_whisper", "ctranslate2"):
+        try:
+            info[module] = __import__(module).__version__
+        except Exception:
+            pass
+    return info
@@ -0,0 +1,187 @@
+"""
+Benchmarks the full dictation pipeline on the WAV fixtures, headless.
+
+    python benchmarks/run.py                        # every preset, checked against the baseline
+    python benchmarks/run.py -c tiny-int8 -r 5      # one preset, five passes over the corpus
+    python benchmarks/run.py -c "small-int8:model=small,compute_type=int8,beam_size=2"
+    python benchmarks/run.py --save                 # record this run as the new baseline
+
+Each configuration runs in its own process (so peak RSS is its own) and
+reports real-time factor, p50/p95 key-up-to-paste latency, peak RSS and WER.
+Exits with status 1 if a metric regressed past its tolerance.
+"""
+import os
+import sys
+import json
+import argparse
+import logging
+import contextlib
+import concurrent.futures
+import multiprocessing
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from zerog.core.engine import parse_cores
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+
+# Named engine configurations; pass --config name:key=value,... for others.
+# Warmup stays on, as in the app, so the model load is measured separately.
+PRESETS = {
+    "tiny-float32": {"model": "tiny", "compute_type": "float32"},
+    "tiny-int8": {"model": "tiny", "compute_type": "int8"},
+    "tiny-int8-streaming": {"model": "tiny", "compute_type": "int8", "streaming": True},
+}
+
+# How much worse than the baseline a metric may get before the run fails
+TOLERANCES = {
+    "rtf": ("relative", 0.25),
+    "latency_p50": ("relative", 0.25),
+    "latency_p95": ("relative", 0.25),
+    "peak_rss_mb": ("relative", 0.15),
+    "wer": ("absolute", 0.02),
+}
+
+_INT_SETTINGS = {"cpu_threads", "num_workers", "beam_size"}
+_BOOL_SETTINGS = {"streaming", "warmup"}
+
+
+def parse_config(spec):
+    """'tiny-int8' (a preset) or 'name:key=value,...' (EngineConfig arguments)."""
+    name, _, options = spec.partition(":")
+    if not options:
+        if name not in PRESETS:
+            raise argparse.ArgumentTypeError(
+                f"Unknown preset '{name}'. Choose from {', '.join(PRESETS)} or use name:key=value,...")
+        return name, dict(PRESETS[name])
+
+    settings = {}
+    for option in options.split(","):
+        key, _, value = option.partition("=")
+        key, value = key.strip(), value.strip()
+        if key in _INT_SETTINGS:
+            settings[key] = int(value)
+        elif key in _BOOL_SETTINGS:
+            settings[key] = value.lower() in ("1", "true", "yes", "on")
+        elif key == "cpu_cores":
+            settings[key] = parse_cores(value.replace(" ", ","))
+        else:
+            settings[key] = value
+    return name, settings
+
+
+def _run_isolated(name, settings, fixtures_dir, repeats, realtime, verbose):
+    """Child process entry point: quiet unless asked, then one configuration."""
+    from benchmarks.pipeline import run_config
+
+    logging.basicConfig(level=logging.INFO if verbose else logging.WARNING)
+    if verbose:
+        return run_config(name, settings, fixtures_dir, repeats, realtime)
+    # The recorder narrates every step on stdout; keep the report readable
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        return run_config(name, settings, fixtures_dir, repeats, realtime)
+
+
+def compare(results, baseline):
+    """Lists every metric that got worse than the baseline allows."""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get("configs", {}).get(name)
+        if before is None:
+            continue
+        for metric, (kind, allowed) in TOLERANCES.items():
+            old, new = before.get(metric), result.get(metric)
+            if old is None or new is None:
+                continue
+            limit = old * (1 + allowed) if kind == "relative" else old + allowed
+            if new > limit:
+                regressions.append(f"{name}: {metric} {new:g} > {limit:g} (baseline {old:g})")
+    return regressions
+
+
+def _format(value, scale=1, unit=""):
+    return "-" if value is None else f"{value * scale:.{0 if scale > 1 else 3}f}{unit}"
+
+
+def print_table(results):
+    print(f"{'config':<24}{'RTF':>8}{'p50':>10}{'p95':>10}{'RSS':>10}{'WER':>9}{'load':>9}")
+    for name, r in results.items():
+        print(f"{name:<24}{_format(r['rtf']):>8}{_format(r['latency_p50'], 1000, ' ms'):>10}"
+              f"{_format(r['latency_p95'], 1000, ' ms'):>10}{r['peak_rss_mb']:>7.0f} MB"
+              f"{_format(r['wer'], 100, ' %'):>9}{r['load_seconds']:>8.1f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless ZeroG pipeline benchmarks.")
+    parser.add_argument("-c", "--config", action="append", type=parse_config,
+                        help="Preset name or name:key=value,... (repeatable; default: every preset)")
+    parser.add_argument("-r", "--repeats", type=int, default=3, help="Passes over the corpus per configuration")
+    parser.add_argument("--fixtures", default=os.path.join(BENCH_DIR, "fixtures"), help="Directory of WAV fixtures")
+    parser.add_argument("--fast", action="store_true",
+                        help="Feed audio as fast as the recorder takes it instead of in real time")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON to compare with or save to")
+    parser.add_argument("--save", action="store_true", help="Write the results as the new baseline")
+    parser.add_argument("--json", help="Also write the full results, every utterance included, here")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Show the pipeline's own output")
+    args = parser.parse_args(argv)
+
+    from benchmarks.pipeline import machine_info
+
+    configs = args.config or [(name, dict(settings)) for name, settings in PRESETS.items()]
+    results = {}
+    # A fresh process per configuration: models don't share memory and ru_maxrss starts over
+    context = multiprocessing.get_context("spawn")
+    for name, settings in configs:
+        print(f"▶ {name} ...", flush=True)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            results[name] = pool.submit(_run_isolated, name, settings, args.fixtures,
+                                        args.repeats, not args.fast, args.verbose).result()
+
+    print()
+    print_table(results)
+    report = {"machine": machine_info(), "realtime": not args.fast, "configs": results}
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    summary = {"machine": report["machine"], "realtime": report["realtime"],
+               "configs": {name: {k: v for k, v in r.items() if k != "runs"} for name, r in results.items()}}
+    if args.save:
+        baseline = {"configs": {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        # Configurations not run this time keep their old numbers
+        baseline["machine"] = summary["machine"]
+        baseline["realtime"] = summary["realtime"]
+        baseline.setdefault("configs", {}).update(summary["configs"])
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save to create one.")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("machine", {}).get("cpu") != summary["machine"]["cpu"]:
+        print(f"\n⚠️  Baseline was recorded on '{baseline.get('machine', {}).get('cpu')}'; "
+              f"numbers from different CPUs are not comparable.")
+    if baseline.get("realtime", True) != summary["realtime"]:
+        print("\n⚠️  Baseline and this run differ in --fast; streaming numbers are not comparable.")
+    regressions = compare(summary["configs"], baseline)
+    if regressions:
+        print("\n❌ Regressions against the baseline:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print("\n✅ Within tolerance of the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
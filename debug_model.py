@@ -3,6 +3,7 @@ import time
 from faster_whisper import WhisperModel
 import sounddevice as sd
 import numpy as np
+from zerog.core.engine import EngineConfig
 
 print("🛰️  Starting Pure-Terminal Debug...")
 
@@ -11,14 +12,16 @@ try:
     devices = sd.query_devices()
     print(f"✅ Found {len(devices)} audio devices.")
     
-    print("🛠️  Step 2: Loading Whisper 'tiny' on CPU...")
-    # Using 'tiny' and 'float32' as the most basic/compatible settings
-    model = WhisperModel("tiny", device="cpu", compute_type="float32")
+    # Same ZEROG_* engine settings the app uses (defaults: 'tiny', 'float32')
+    engine = EngineConfig.from_env().validate()
+    print(f"🛠️  Step 2: Loading Whisper {engine.describe()} on CPU...")
+    engine.apply_affinity()
+    model = WhisperModel(engine.model, **engine.model_kwargs())
     print("✅ Whisper Model Loaded Successfully.")
     
     print("🛠️  Step 3: Running Warmup Inference...")
     warmup_audio = np.zeros(16000, dtype=np.float32)
-    segments, _ = model.transcribe(warmup_audio)
+    segments, _ = model.transcribe(warmup_audio, beam_size=engine.beam_size)
     list(segments) # Force execution
     print("✅ Inference Warmup Success.")
     
@@ -3,22 +3,48 @@ import os
 # Force unbuffered logs so you can finally see them in the terminal
 os.environ["PYTHONUNBUFFERED"] = "1"
 
-from PyQt6.QtWidgets import QApplication
-from zerog.gui.hud import LinuxHUD
-from zerog.core.recorder import AudioRecorder
+from dotenv import load_dotenv
+# Read .env before importing zerog, whose modules take their settings from the environment
+load_dotenv()
 
 def main():
+    # Subcommands need no Qt, display, microphone or keyboard
+    if sys.argv[1:2] == ["transcribe"]:
+        from zerog.core.batch import main as transcribe
+        sys.exit(transcribe(sys.argv[2:]))
+    if sys.argv[1:2] == ["daemon"]:
+        from zerog.core.daemon import main as serve
+        sys.exit(serve(sys.argv[2:]))
+
+    from PyQt6.QtWidgets import QApplication
+    from zerog.gui.hud import LinuxHUD
+    from zerog.core.recorder import AudioRecorder
+    from zerog.core.injector import get_injector
+    from zerog.core.clipboard import install_qt_clipboard
+
     print("🛰️  ZeroG is initializing...")
     app = QApplication(sys.argv)
     
-    # Initialize the recorder FIRST
-    # This matches your debug_model.py success
-    recorder = AudioRecorder() 
+    # Snapshot/restore every clipboard format in-process instead of forking xclip
+    install_qt_clipboard()
+    
+    # Engine settings (model, compute type, threads, streaming, VAD)
+    # come from ZEROG_* variables in the environment or .env
+    # Creating the recorder is instant; the model isn't loaded yet.
+    recorder = AudioRecorder()
     
     # Initialize the HUD
     hud = LinuxHUD()
+    hud.attach_meter(recorder.meter)
     hud.show()
     
+    # Load Whisper in the background; the HUD shows "warming up" meanwhile
+    # and anything recorded before it's ready is transcribed afterwards.
+    recorder.start_loading()
+    
+    # Pick the paste backend now (XTest > xdotool) so the first paste doesn't pay for it
+    print(f"⌨️  Text injection: {get_injector().name}")
+    
     print("🚀 ZeroG is in orbit. Ready for input.")
     sys.exit(app.exec())
 
@@ -0,0 +1,41 @@
+import unittest
+import numpy as np
+from zerog.core.audio_buffer import AudioBuffer
+
+class TestAudioBuffer(unittest.TestCase):
+
+    def setUp(self):
+        self.buf = AudioBuffer(4096)
+
+    def test_write_appends_portaudio_blocks(self):
+        self.buf.write(np.full((1024, 1), 0.5, dtype=np.float32))
+        self.buf.write(np.full((512, 1), -0.5, dtype=np.float32))
+        self.assertEqual(len(self.buf), 1536)
+        np.testing.assert_array_equal(self.buf.view(1024), np.full(512, -0.5, dtype=np.float32))
+
+    def test_view_is_zero_copy(self):
+        self.buf.write(np.ones((256, 1), dtype=np.float32))
+        view = self.buf.view()
+        self.assertTrue(np.shares_memory(view, self.buf._data))
+        self.assertTrue(view.flags['C_CONTIGUOUS'])
+
+    def test_overflow_chains_another_arena(self):
+        audio = np.arange(10000, dtype=np.float32)
+        self.buf.write(audio[:5000].reshape(-1, 1))
+        self.buf.write(audio[5000:].reshape(-1, 1))
+        self.assertEqual(len(self.buf), 10000)
+        np.testing.assert_array_equal(self.buf.view(), audio)
+        np.testing.assert_array_equal(self.buf.view(4000, 9000), audio[4000:9000])
+        # Within one arena it is still a view
+        self.assertTrue(np.shares_memory(self.buf.view(4096, 8192), self.buf._extents[1]))
+
+    def test_reset_keeps_allocation(self):
+        data = self.buf._data
+        self.buf.write(np.ones((5000, 1), dtype=np.float32))
+        self.buf.reset()
+        self.assertEqual(len(self.buf), 0)
+        self.assertIs(self.buf._data, data)
+        self.assertEqual(len(self.buf._extents), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from zerog.core import batch
+from zerog.core.engine import EngineConfig
+
+
+def segment(start, end, text):
+    s = MagicMock()
+    s.start, s.end, s.text = start, end, text
+    return s
+
+
+class TestBatchHelpers(unittest.TestCase):
+
+    def test_srt_timestamps(self):
+        self.assertEqual(batch.format_timestamp(0), "00:00:00,000")
+        self.assertEqual(batch.format_timestamp(3723.4567), "01:02:03,457")
+
+    def test_srt_rendering(self):
+        result = {"text": "Hi. There.", "segments": [{"start": 0.0, "end": 1.5, "text": "Hi."},
+                                                      {"start": 1.5, "end": 2.0, "text": "There."}]}
+        self.assertEqual(batch.render(result, "srt"),
+                         "1\n00:00:00,000 --> 00:00:01,500\nHi.\n\n2\n00:00:01,500 --> 00:00:02,000\nThere.\n")
+
+    def test_workers_share_the_cores(self):
+        engine = EngineConfig(cpu_cores=[0, 1, 2, 3, 4, 5, 6, 7])
+        self.assertEqual(batch.plan_workers(engine), 4)
+        self.assertEqual((engine.num_workers, engine.cpu_threads), (4, 2))
+
+        # Explicit thread counts are kept
+        engine = EngineConfig(cpu_threads=3, cpu_cores=[0, 1, 2, 3])
+        self.assertEqual(batch.plan_workers(engine, workers=1), 1)
+        self.assertEqual(engine.cpu_threads, 3)
+
+
+class TestBatchRun(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.input_dir = os.path.join(tmp.name, "meetings")
+        self.output_dir = os.path.join(tmp.name, "out")
+        os.makedirs(os.path.join(self.input_dir, "monday"))
+        for name in ("a.wav", os.path.join("monday", "b.mp3"), "notes.md"):
+            with open(os.path.join(self.input_dir, name), "wb") as f:
+                f.write(b"audio")
+        self.engine = EngineConfig(vad="off", cpu_cores=[0])
+
+    @patch('zerog.core.batch.decode_audio', return_value=np.zeros(32000, dtype=np.float32))
+    @patch('zerog.core.batch.WhisperModel')
+    def test_directory_is_transcribed_once_then_resumed(self, mock_whisper, mock_decode):
+        model = mock_whisper.return_value
+        model.transcribe.side_effect = lambda *a, **k: (
+            iter([segment(0.0, 1.2, " Hello there."), segment(1.2, 2.0, " Bye.")]), MagicMock(language="en"))
+
+        done, skipped, failed = batch.run([self.input_dir], self.output_dir, ["txt", "json", "srt"],
+                                          engine=self.engine)
+        self.assertEqual((done, skipped, failed), (2, 0, 0))
+        # The model is loaded once for the whole directory
+        mock_whisper.assert_called_once()
+
+        with open(os.path.join(self.output_dir, "monday", "b.txt")) as f:
+            self.assertEqual(f.read(), "Hello there. Bye.\n")
+        with open(os.path.join(self.output_dir, "a.json")) as f:
+            record = json.load(f)
+        self.assertEqual(record["duration"], 2.0)
+        self.assertEqual(record["language"], "en")
+        self.assertTrue(os.path.exists(os.path.join(self.output_dir, "a.srt")))
+
+        # Second run: everything is already there
+        self.assertEqual(batch.run([self.input_dir], self.output_dir, ["txt", "json", "srt"],
+                                   engine=self.engine), (0, 2, 0))
+
+        # A newer recording is redone
+        future = time.time() + 10
+        os.utime(os.path.join(self.input_dir, "a.wav"), (future, future))
+        self.assertEqual(batch.run([self.input_dir], self.output_dir, ["txt"], engine=self.engine), (1, 1, 0))
+
+    @patch('zerog.core.batch.decode_audio', side_effect=RuntimeError("not audio"))
+    @patch('zerog.core.batch.WhisperModel')
+    def test_failed_file_leaves_no_output(self, mock_whisper, mock_decode):
+        path = os.path.join(self.input_dir, "a.wav")
+        self.assertEqual(batch.run([path], self.output_dir, ["txt"], engine=self.engine), (0, 0, 1))
+        self.assertFalse(os.listdir(self.output_dir) if os.path.exists(self.output_dir) else [])
+
+    @patch('zerog.core.batch.decode_audio', return_value=np.zeros(16000, dtype=np.float32))
+    @patch('zerog.core.batch.WhisperModel')
+    def test_same_stem_gets_separate_outputs(self, mock_whisper, mock_decode):
+        with open(os.path.join(self.input_dir, "a.mp3"), "wb") as f:
+            f.write(b"audio")
+        mock_whisper.return_value.transcribe.side_effect = lambda *a, **k: (
+            iter([segment(0.0, 1.0, " Hi.")]), MagicMock(language="en"))
+
+        self.assertEqual(batch.run([self.input_dir], self.output_dir, ["txt"], engine=self.engine), (3, 0, 0))
+        outputs = sorted(os.listdir(self.output_dir))
+        self.assertEqual(outputs, ["a.mp3.txt", "a.wav.txt", "monday"])
+        # Both are recognized as done next time
+        self.assertEqual(batch.run([self.input_dir], self.output_dir, ["txt"], engine=self.engine), (0, 3, 0))
+
+    def test_inputs_mirrored_onto_one_output_are_left_out(self):
+        other = os.path.join(os.path.dirname(self.input_dir), "tuesday")
+        os.makedirs(other)
+        with open(os.path.join(other, "a.wav"), "wb") as f:
+            f.write(b"audio")
+        found = batch.find_audio([self.input_dir, other])
+        jobs, clashes = batch.plan_outputs(found, self.output_dir)
+        self.assertEqual(sorted(clashes), sorted([os.path.join(self.input_dir, "a.wav"), os.path.join(other, "a.wav")]))
+        self.assertEqual([os.path.relpath(base, self.output_dir) for _, base in jobs], [os.path.join("monday", "b")])
+
+    def test_unknown_format_is_rejected(self):
+        with self.assertRaises(SystemExit):
+            batch.main([self.input_dir, "-f", "docx"])
+
+
+if __name__ == '__main__':
+    unittest.main()
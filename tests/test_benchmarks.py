@@ -0,0 +1,110 @@
+import os
+import sys
+import tempfile
+import unittest
+import wave
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import pipeline
+from benchmarks.pipeline import Fixture, PipelineBench, load_wav, word_errors
+from benchmarks.run import compare, parse_config
+from zerog.core.engine import EngineConfig
+from zerog.core.state import state_machine
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_word_errors_ignore_case_and_punctuation(self):
+        self.assertEqual(word_errors("Send the report, please.", "send the report please"), (0, 4))
+
+    def test_word_errors_count_each_edit(self):
+        # One substitution, one deletion, one insertion
+        self.assertEqual(word_errors("a b c d", "a x c d e")[0], 2)
+        self.assertEqual(word_errors("a b c d", "a c d")[0], 1)
+        self.assertEqual(word_errors("one two", ""), (2, 2))
+
+    def test_load_wav_resamples_to_mono_16k(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "stereo.wav")
+            with wave.open(path, "wb") as f:
+                f.setnchannels(2)
+                f.setsampwidth(2)
+                f.setframerate(32000)
+                f.writeframes(np.full(64000, 16384, dtype="<i2").tobytes())
+            audio = load_wav(path)
+        self.assertEqual(audio.dtype, np.float32)
+        self.assertEqual(len(audio), 16000)
+        self.assertAlmostEqual(float(audio[100]), 0.5)
+
+
+class TestBaselines(unittest.TestCase):
+
+    def test_regressions_respect_tolerances(self):
+        baseline = {"configs": {"tiny": {"rtf": 0.1, "latency_p95": 0.5, "wer": 0.1, "peak_rss_mb": 400}}}
+        within = {"tiny": {"rtf": 0.12, "latency_p95": 0.6, "wer": 0.11, "peak_rss_mb": 440}}
+        self.assertEqual(compare(within, baseline), [])
+
+        worse = {"tiny": {"rtf": 0.2, "latency_p95": 0.5, "wer": 0.15, "peak_rss_mb": 400}}
+        regressions = compare(worse, baseline)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(regressions[0].startswith("tiny: rtf"))
+
+    def test_parse_config(self):
+        self.assertEqual(parse_config("tiny-int8"), ("tiny-int8", {"model": "tiny", "compute_type": "int8"}))
+        name, settings = parse_config("custom:model=base,beam_size=2,streaming=true,cpu_cores=0-1")
+        self.assertEqual(settings, {"model": "base", "beam_size": 2, "streaming": True, "cpu_cores": [0, 1]})
+
+
+class TestPipelineBench(unittest.TestCase):
+
+    def setUp(self):
+        # Only this bench's recorder may see the state transitions
+        patcher = patch.object(state_machine, '_observers', [])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @patch('zerog.core.typer.RESTORE_DELAY_SECONDS', 0)
+    @patch('zerog.core.recorder.WhisperModel')
+    def test_fixture_runs_through_the_real_pipeline(self, mock_whisper):
+        segment = MagicMock()
+        segment.text = "Send the report to Maria."
+        mock_whisper.return_value.transcribe.return_value = ([segment], None)
+
+        engine = EngineConfig(vad="energy", warmup=False)
+        bench = PipelineBench(engine, realtime=False)
+        self.addCleanup(bench.close)
+        bench.load()
+        fixture = Fixture("speech", np.full(16000, 0.2, dtype=np.float32), "send the report to maria before lunch")
+        result = bench.run(fixture)
+
+        self.assertEqual(result["hypothesis"], "Send the report to Maria.")
+        self.assertEqual((result["errors"], result["reference_words"]), (2, 7))
+        self.assertGreater(result["latency"], 0)
+        # The whole fixture reached the model through the recorder's callback
+        audio = mock_whisper.return_value.transcribe.call_args[0][0]
+        self.assertEqual(len(audio), 16000)
+
+        summary = pipeline.summarize([result, result])
+        self.assertEqual(summary["utterances"], 2)
+        self.assertAlmostEqual(summary["wer"], 2 / 7, places=4)
+
+
+class TestRecorderImport(unittest.TestCase):
+
+    def test_sounddevice_stand_in_does_not_leak(self):
+        import zerog.core.recorder as real
+        # No PortAudio: importing sounddevice fails
+        with patch.dict(sys.modules, {"sounddevice": None}):
+            module = pipeline.load_recorder()
+            self.assertIsNot(module, real)
+            self.assertIsNone(sys.modules["sounddevice"])
+            self.assertIs(sys.modules["zerog.core.recorder"], real)
+        self.assertTrue(hasattr(module.sd, "__name__"))
+
+
+if __name__ == '__main__':
+    unittest.main()
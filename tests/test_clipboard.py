@@ -0,0 +1,67 @@
+import os
+import sys
+import threading
+import unittest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import QMimeData, QByteArray
+
+# Ensure QApplication exists for testing clipboard ownership
+app = QApplication.instance() or QApplication(sys.argv)
+
+from zerog.core import clipboard
+from zerog.core.clipboard import QtClipboard, TextClipboard
+
+class TestQtClipboard(unittest.TestCase):
+
+    def setUp(self):
+        self.cb = QtClipboard()
+
+    def _set_rich_content(self):
+        mime = QMimeData()
+        mime.setData("text/html", QByteArray(b"<b>bold</b>"))
+        mime.setData("image/png", QByteArray(b"\x89PNG fake"))
+        mime.setText("bold")
+        app.clipboard().setMimeData(mime)
+
+    def test_snapshot_restore_is_lossless(self):
+        self._set_rich_content()
+        snapshot = self.cb.snapshot()
+        self.assertIn(("text/html", b"<b>bold</b>"), snapshot)
+        self.assertIn(("image/png", b"\x89PNG fake"), snapshot)
+
+        self.cb.set_text("dictated text")
+        self.assertEqual(app.clipboard().text(), "dictated text")
+
+        self.cb.restore(snapshot)
+        restored = app.clipboard().mimeData()
+        self.assertEqual(bytes(restored.data("text/html")), b"<b>bold</b>")
+        self.assertEqual(bytes(restored.data("image/png")), b"\x89PNG fake")
+        self.assertEqual(restored.text(), "bold")
+
+    def test_worker_thread_calls_run_on_gui_thread(self):
+        self._set_rich_content()
+        result = {}
+        worker = threading.Thread(target=lambda: result.update(snapshot=self.cb.snapshot()))
+        worker.start()
+        # Service the queued call like the running app's event loop would
+        while worker.is_alive():
+            app.processEvents()
+            worker.join(0.01)
+        self.assertIn(("text/html", b"<b>bold</b>"), result["snapshot"])
+
+class TestClipboardSelection(unittest.TestCase):
+
+    def tearDown(self):
+        clipboard._clipboard = None
+
+    def test_text_fallback_without_install(self):
+        self.assertIsInstance(clipboard.get_clipboard(), TextClipboard)
+
+    def test_install_switches_to_qt(self):
+        clipboard.install_qt_clipboard()
+        self.assertIsInstance(clipboard.get_clipboard(), QtClipboard)
+
+if __name__ == '__main__':
+    unittest.main()
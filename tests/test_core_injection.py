@@ -10,11 +10,11 @@ from zerog.core.typer import FastTyper, ClipboardManager
 
 class TestFastTyperLinux(unittest.TestCase):
     
-    @patch('zerog.core.typer.subprocess.run')
-    @patch('zerog.core.typer.pyperclip.copy')
+    @patch('zerog.core.typer.get_injector')
+    @patch('zerog.core.clipboard.pyperclip.copy')
     @patch('zerog.core.typer.ClipboardManager.snapshot')
-    def test_injection_flow(self, mock_snapshot, mock_copy, mock_run):
-        """Test the Linux strategy: Snapshot -> Copy -> xdotool -> Restore."""
+    def test_injection_flow(self, mock_snapshot, mock_copy, mock_get_injector):
+        """Test the Linux strategy: Snapshot -> Copy -> Ctrl+V -> Restore."""
         mock_snapshot.return_value = "original_clipboard"
         text_to_inject = "Transmitted Text"
         
@@ -24,30 +24,161 @@ class TestFastTyperLinux(unittest.TestCase):
         # Assert
         self.assertTrue(result)
         mock_copy.assert_called_with(text_to_inject)
-        # Ensure xdotool was called to paste
-        mock_run.assert_called_once()
-        args, _ = mock_run.call_args
-        self.assertIn("xdotool", args[0])
-        self.assertIn("ctrl+v", args[0])
-
-    @patch('zerog.core.typer.subprocess.run')
-    def test_failure_handling(self, mock_run):
-        """Test that if xdotool fails, we return False."""
-        import subprocess
-        mock_run.side_effect = subprocess.CalledProcessError(1, 'xdotool')
+        # Ensure the injector was asked to paste
+        mock_get_injector.return_value.paste.assert_called_once()
+
+    @patch('zerog.core.clipboard.pyperclip.copy')
+    @patch('zerog.core.typer.get_injector')
+    def test_failure_handling(self, mock_get_injector, mock_copy):
+        """Test that if the paste keystroke fails, we return False."""
+        mock_get_injector.return_value.paste.return_value = False
         
         result = FastTyper.inject("Test")
         self.assertFalse(result)
 
+class TestFastTyperPipeline(unittest.TestCase):
+
+    def setUp(self):
+        # Forget any restore left pending by earlier tests
+        if FastTyper._restore_timer is not None:
+            FastTyper._restore_timer.cancel()
+        FastTyper._restore_timer = None
+        FastTyper._restore_token = None
+        FastTyper._original_content = None
+        FastTyper._restore_callbacks = []
+        # Replacing needs the focus of each paste
+        FastTyper.track_focus = True
+        self.addCleanup(setattr, FastTyper, "track_focus", False)
+
+    @patch('zerog.core.typer.RESTORE_DELAY_SECONDS', 0.05)
+    @patch('zerog.core.typer.get_injector')
+    @patch('zerog.core.clipboard.pyperclip.copy')
+    @patch('zerog.core.typer.ClipboardManager.restore')
+    @patch('zerog.core.typer.ClipboardManager.snapshot', return_value="user clipboard")
+    def test_back_to_back_pastes_restore_original(self, mock_snapshot, mock_restore, mock_copy, mock_get_injector):
+        """A second paste before the first restore must not snapshot our own text."""
+        import time
+        self.assertTrue(FastTyper.inject("first"))
+        self.assertTrue(FastTyper.inject("second"))
+        time.sleep(0.2)
+
+        mock_snapshot.assert_called_once()
+        mock_restore.assert_called_once_with("user clipboard")
+
+    @patch('zerog.core.typer.PASTE_RETRY_DELAY_SECONDS', 0)
+    @patch('zerog.core.typer.get_injector')
+    @patch('zerog.core.clipboard.pyperclip.copy')
+    @patch('zerog.core.typer.ClipboardManager.snapshot', return_value="")
+    def test_paste_is_retried_and_timed(self, mock_snapshot, mock_copy, mock_get_injector):
+        mock_get_injector.return_value.paste.side_effect = [False, True]
+        self.assertTrue(FastTyper.inject("retry me"))
+        timing = FastTyper.last_timing
+        self.assertEqual(timing["attempts"], 2)
+        for step in ("snapshot", "copy", "paste", "total"):
+            self.assertGreaterEqual(timing[step], 0)
+
+    @patch('zerog.core.typer.get_injector')
+    @patch('zerog.core.clipboard.pyperclip.copy')
+    @patch('zerog.core.typer.ClipboardManager.snapshot', return_value="")
+    def test_replace_only_touches_our_latest_paste(self, mock_snapshot, mock_copy, mock_get_injector):
+        injector = mock_get_injector.return_value
+        FastTyper.inject("raw words")
+        self.assertTrue(FastTyper.replace("raw words", "Polished words."))
+        injector.select_back.assert_called_once_with(len("raw words"))
+        mock_copy.assert_called_with("Polished words.")
+
+        # Something else was pasted since: leave it alone
+        self.assertFalse(FastTyper.replace("raw words", "Other."))
+
+    @patch('zerog.core.typer.get_injector')
+    @patch('zerog.core.clipboard.pyperclip.copy')
+    @patch('zerog.core.typer.ClipboardManager.snapshot', return_value="")
+    def test_replace_since_mark_spans_several_pastes(self, mock_snapshot, mock_copy, mock_get_injector):
+        injector = mock_get_injector.return_value
+        mark = FastTyper.mark()
+        FastTyper.inject("One.")
+        FastTyper.inject(" Two.")
+        self.assertFalse(FastTyper.replace("Two.", "raw", since=mark))
+        self.assertTrue(FastTyper.replace("One. Two.", "raw", since=mark))
+        injector.select_back.assert_called_once_with(len("One. Two."))
+
+        # A failed paste in between means we don't know what is on screen
+        mark = FastTyper.mark()
+        FastTyper.inject("One.")
+        injector.paste.return_value = False
+        FastTyper.inject(" Two.")
+        self.assertFalse(FastTyper.replace("One.", "raw", since=mark))
+
+    @patch('zerog.core.typer.get_injector')
+    @patch('zerog.core.clipboard.pyperclip.copy')
+    @patch('zerog.core.typer.ClipboardManager.snapshot', return_value="")
+    def test_replace_refused_once_focus_moved(self, mock_snapshot, mock_copy, mock_get_injector):
+        injector = mock_get_injector.return_value
+        injector.focused_window.return_value = 0x1200007
+        FastTyper.inject("raw words")
+        injector.focused_window.return_value = 0x3400002  # The user switched windows
+        self.assertFalse(FastTyper.can_replace("raw words"))
+        self.assertFalse(FastTyper.replace("raw words", "Polished words."))
+        # Focus that can't be read counts as moved
+        injector.focused_window.return_value = None
+        self.assertFalse(FastTyper.replace("raw words", "Polished words."))
+        injector.select_back.assert_not_called()
+
+        injector.focused_window.return_value = 0x1200007
+        self.assertTrue(FastTyper.replace("raw words", "Polished words."))
+
+    @patch('zerog.core.typer.get_injector')
+    @patch('zerog.core.clipboard.pyperclip.copy')
+    @patch('zerog.core.typer.ClipboardManager.snapshot', return_value="")
+    def test_focus_is_only_read_when_a_replace_can_follow(self, mock_snapshot, mock_copy, mock_get_injector):
+        injector = mock_get_injector.return_value
+        FastTyper.track_focus = False
+        self.assertTrue(FastTyper.inject("raw words"))
+        injector.focused_window.assert_not_called()  # No extra round trip (or fork) per paste
+        self.assertFalse(FastTyper.replace("raw words", "Polished words."))
+        injector.select_back.assert_not_called()
+
+    @patch('zerog.core.typer.FastTyper.replace_max_age', 0.05)
+    @patch('zerog.core.typer.get_injector')
+    @patch('zerog.core.clipboard.pyperclip.copy')
+    @patch('zerog.core.typer.ClipboardManager.snapshot', return_value="")
+    def test_replace_refused_once_the_paste_is_old(self, mock_snapshot, mock_copy, mock_get_injector):
+        import time
+        FastTyper.inject("raw words")
+        self.assertTrue(FastTyper.can_replace("raw words"))
+        # Work that would take longer than what is left of the cap isn't worth starting
+        self.assertFalse(FastTyper.can_replace("raw words", within=1.0))
+        time.sleep(0.1)  # The user may have typed or moved the cursor by now
+        self.assertFalse(FastTyper.replace("raw words", "Polished words."))
+        mock_get_injector.return_value.select_back.assert_not_called()
+
+    @patch('zerog.core.typer.RESTORE_DELAY_SECONDS', 0.05)
+    @patch('zerog.core.typer.get_injector')
+    @patch('zerog.core.clipboard.pyperclip.copy')
+    @patch('zerog.core.typer.ClipboardManager.restore')
+    @patch('zerog.core.typer.ClipboardManager.snapshot', return_value="user clipboard")
+    def test_when_restored_waits_for_the_clipboard(self, mock_snapshot, mock_restore, mock_copy, mock_get_injector):
+        import time
+        calls = []
+        FastTyper.when_restored(lambda: calls.append("idle"))
+        self.assertEqual(calls, ["idle"])  # Nothing pending: runs right away
+
+        FastTyper.inject("first")
+        FastTyper.when_restored(lambda: calls.append(mock_restore.called))
+        # A newer paste takes over the restore, and the callback with it
+        FastTyper.inject("second")
+        time.sleep(0.2)
+        self.assertEqual(calls, ["idle", True])
+
 class TestClipboardManagerLinux(unittest.TestCase):
     
-    @patch('zerog.core.typer.pyperclip.paste')
+    @patch('zerog.core.clipboard.pyperclip.paste')
     def test_snapshot(self, mock_paste):
         mock_paste.return_value = "hello world"
         result = ClipboardManager.snapshot()
         self.assertEqual(result, "hello world")
 
-    @patch('zerog.core.typer.pyperclip.copy')
+    @patch('zerog.core.clipboard.pyperclip.copy')
     def test_restore(self, mock_copy):
         ClipboardManager.restore("previous data")
         mock_copy.assert_called_with("previous data")
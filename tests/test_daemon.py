@@ -0,0 +1,188 @@
+import os
+import socket
+import sys
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from zerog.core import daemon
+from zerog.core.daemon import RemoteModel, TranscriptionDaemon
+from zerog.core.engine import EngineConfig
+
+
+class FakeWhisper:
+    """Echoes what it was given, so tests can check the audio arrived intact."""
+
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def transcribe(self, audio, **kwargs):
+        with self.lock:
+            self.calls.append((audio.copy(), kwargs))
+        segment = MagicMock(start=0.0, end=len(audio) / 16000, text=f" {len(audio)} samples")
+        return iter([segment]), MagicMock(language="en")
+
+
+class TestDaemonProtocol(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "zerog.sock")
+        self.model = FakeWhisper()
+        self.daemon = TranscriptionDaemon(self.model, self.path, EngineConfig(model="tiny")).start()
+        self.addCleanup(self.daemon.stop)
+
+    def test_audio_round_trip(self):
+        remote = RemoteModel(self.path)
+        self.addCleanup(remote.close)
+        # Longer than one audio frame, so it goes over the wire in pieces
+        audio = np.random.default_rng(0).standard_normal(200_000).astype(np.float32)
+        segments, info = remote.transcribe(audio, beam_size=2, initial_prompt="Hello")
+
+        received, options = self.model.calls[0]
+        np.testing.assert_array_equal(received, audio)
+        self.assertEqual(options, {"beam_size": 2, "initial_prompt": "Hello"})
+        self.assertEqual(" ".join(s.text for s in segments).strip(), "200000 samples")
+        self.assertEqual(info.language, "en")
+        self.assertEqual(info.duration, 12.5)
+
+    def test_connection_is_reused_and_status_reported(self):
+        remote = RemoteModel(self.path)
+        self.addCleanup(remote.close)
+        remote.transcribe(np.zeros(16000, dtype=np.float32))
+        remote.transcribe(np.zeros(8000, dtype=np.float32))
+        status = remote.status()
+        self.assertEqual(status["requests"], 2)
+        self.assertEqual(status["clients"], 1)
+        self.assertEqual(status["model"], "tiny")
+
+    def test_clients_are_served_concurrently(self):
+        results = []
+
+        def client(n):
+            remote = RemoteModel(self.path)
+            segments, _ = remote.transcribe(np.zeros(n, dtype=np.float32))
+            results.append(segments[0].text.strip())
+            remote.close()
+
+        threads = [threading.Thread(target=client, args=(1000 * (i + 1),)) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(5)
+        self.assertEqual(sorted(results), sorted(f"{1000 * (i + 1)} samples" for i in range(4)))
+
+    def test_model_errors_reach_the_client(self):
+        remote = RemoteModel(self.path)
+        self.addCleanup(remote.close)
+        with patch.object(self.model, 'transcribe', side_effect=ValueError("bad audio")):
+            with self.assertRaisesRegex(RuntimeError, "bad audio"):
+                remote.transcribe(np.zeros(10, dtype=np.float32))
+        # The connection is still good afterwards
+        self.assertEqual(remote.status()["requests"], 0)
+
+    def test_protocol_violation_drops_the_client(self):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(5)
+            sock.connect(self.path)
+            daemon.send_frame(sock, daemon.AUDIO, b"\x00" * 8)
+            kind, payload = daemon.recv_frame(sock)
+            self.assertEqual(kind, daemon.ERROR)
+            self.assertIsNone(daemon.recv_frame(sock))
+
+    def test_second_daemon_refuses_a_live_socket(self):
+        with self.assertRaises(RuntimeError):
+            TranscriptionDaemon(FakeWhisper(), self.path).start()
+
+    def test_daemon_of_another_user_is_refused(self):
+        remote = RemoteModel(self.path)
+        self.addCleanup(remote.close)
+        with patch('zerog.core.daemon.os.getuid', return_value=os.getuid() + 1):
+            with self.assertRaises(PermissionError):
+                remote.status()
+            self.assertIsNone(daemon.connect("auto", self.path))
+        self.assertEqual(remote.status()["requests"], 0)
+
+    def test_stale_socket_is_replaced(self):
+        self.daemon.stop()
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(self.path)  # Left behind by a daemon that died
+        stale.close()
+        self.daemon = TranscriptionDaemon(self.model, self.path).start()
+        self.assertEqual(RemoteModel(self.path).status()["requests"], 0)
+
+    def test_other_files_are_never_deleted(self):
+        self.daemon.stop()
+        with open(self.path, "w") as f:
+            f.write("my notes")  # e.g. `zerog daemon --socket ~/notes.txt`
+        with self.assertRaises(RuntimeError):
+            TranscriptionDaemon(self.model, self.path).start()
+        with open(self.path) as f:
+            self.assertEqual(f.read(), "my notes")
+
+    def test_stale_socket_of_another_user_is_left_alone(self):
+        self.daemon.stop()
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(self.path)
+        stale.close()
+        with patch('zerog.core.daemon.os.getuid', return_value=os.getuid() + 1):
+            with self.assertRaises(RuntimeError):
+                TranscriptionDaemon(self.model, self.path).start()
+        self.assertTrue(os.path.exists(self.path))
+
+
+class TestDaemonClients(unittest.TestCase):
+
+    def test_connect_modes(self):
+        missing = os.path.join(tempfile.gettempdir(), "zerog-missing.sock")
+        self.assertIsNone(daemon.connect("off", missing))
+        self.assertIsNone(daemon.connect("auto", missing))
+        with self.assertRaises(RuntimeError):
+            daemon.connect("require", missing)
+
+    def test_fallback_socket_directory_is_private(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            private = os.path.join(tmp, "zerog-1000")
+            daemon.private_dir(private)
+            self.assertEqual(os.stat(private).st_mode & 0o777, 0o700)
+            daemon.private_dir(private)  # Ours already: fine
+
+            # Planted by someone else, or opened up: refused
+            os.chmod(private, 0o755)
+            with self.assertRaises(RuntimeError):
+                daemon.private_dir(private)
+            planted = os.path.join(tmp, "planted")
+            os.symlink(tmp, planted)
+            with self.assertRaises(RuntimeError):
+                daemon.private_dir(planted)
+
+        with patch.dict(os.environ, {}, clear=True):
+            self.assertEqual(os.path.dirname(daemon.default_socket_path()), daemon.fallback_dir())
+
+    @patch('zerog.core.recorder.WhisperModel')
+    @patch('zerog.core.recorder.state_machine')
+    def test_recorder_uses_a_running_daemon(self, mock_sm, mock_whisper):
+        from zerog.core.recorder import AudioRecorder
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "zerog.sock")
+            server = TranscriptionDaemon(FakeWhisper(), path).start()
+            self.addCleanup(server.stop)
+            with patch.object(daemon, 'SOCKET_PATH', path):
+                recorder = AudioRecorder(engine=EngineConfig(daemon="auto", vad="off"))
+                recorder._load_model()
+                self.assertIsInstance(recorder.model, RemoteModel)
+                self.assertEqual(recorder._decode(np.zeros(1600, dtype=np.float32)), "1600 samples")
+        # No local copy of the model, and the HUD still leaves LOADING
+        mock_whisper.assert_not_called()
+        mock_sm.compare_and_set.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+from unittest.mock import patch
+from zerog.core.engine import EngineConfig, parse_cores
+
+class TestEngineConfig(unittest.TestCase):
+
+    def test_defaults_match_previous_hardcoded_engine(self):
+        config = EngineConfig.from_env({})
+        self.assertEqual(config.model, "tiny")
+        self.assertEqual(config.compute_type, "float32")
+        self.assertEqual(config.beam_size, 1)
+        self.assertFalse(config.streaming)
+
+    def test_reads_zerog_env_keys(self):
+        config = EngineConfig.from_env({
+            "ZEROG_MODEL": "base",
+            "ZEROG_COMPUTE_TYPE": "int8",
+            "ZEROG_CPU_THREADS": "4",
+            "ZEROG_NUM_WORKERS": "2",
+            "ZEROG_BEAM_SIZE": "3",
+            "ZEROG_CPU_CORES": "0-1,3",
+            "ZEROG_STREAMING": "True",
+            "ZEROG_VAD": "off",
+        })
+        self.assertEqual(config.model, "base")
+        self.assertEqual(config.model_kwargs(), {
+            "device": "cpu", "compute_type": "int8", "cpu_threads": 4, "num_workers": 2,
+        })
+        self.assertEqual(config.beam_size, 3)
+        self.assertEqual(config.cpu_cores, [0, 1, 3])
+        self.assertTrue(config.streaming)
+        self.assertEqual(config.vad, "off")
+
+    def test_invalid_numbers_fall_back_to_defaults(self):
+        config = EngineConfig.from_env({"ZEROG_CPU_THREADS": "lots", "ZEROG_BEAM_SIZE": "0"})
+        self.assertEqual(config.cpu_threads, 0)
+        self.assertEqual(config.beam_size, 1)
+
+    def test_unsupported_compute_type_falls_back(self):
+        config = EngineConfig(compute_type="float16")
+        with patch('ctranslate2.get_supported_compute_types', return_value={"float32", "int8"}):
+            config.validate()
+        self.assertEqual(config.compute_type, "int8")
+
+    def test_unknown_vad_falls_back_to_energy(self):
+        with self.assertLogs('zerog.core.engine', level='WARNING'):
+            config = EngineConfig(vad="webrtc").validate()
+        self.assertEqual(config.vad, "energy")
+        self.assertEqual(EngineConfig(vad="off").validate().vad, "off")
+
+    @patch('zerog.core.engine.os.sched_getaffinity', return_value={0, 1}, create=True)
+    def test_pinned_cores_are_validated_and_size_threads(self, mock_affinity):
+        config = EngineConfig(cpu_cores=[1, 7]).validate()
+        self.assertEqual(config.cpu_cores, [1])
+        self.assertEqual(config.cpu_threads, 1)
+
+    def test_parse_cores(self):
+        self.assertEqual(parse_cores("0-2, 5,5"), [0, 1, 2, 5])
+
+if __name__ == '__main__':
+    unittest.main()
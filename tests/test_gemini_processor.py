@@ -6,10 +6,16 @@ import sys
 # Standardized pathing for Linux environments
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from zerog.core import gemini
+from zerog.core import gemini, polish
 
 class TestGeminiProcessor(unittest.TestCase):
 
+    def setUp(self):
+        # Keep the on-disk polish cache out of these tests
+        patcher = patch.object(polish, 'CACHE_ENABLED', False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
     @patch('zerog.core.gemini.client')
     def test_process_text_success(self, mock_client):
         """Verify the Gemini client correctly processes raw text into polished text."""
@@ -33,7 +39,7 @@ class TestGeminiProcessor(unittest.TestCase):
 
     def test_process_text_no_client(self):
         """Gracefully fallback to original text if API client fails to initialize (e.g., missing API key)."""
-        with patch.object(gemini, 'client', None):
+        with patch.object(gemini, 'client', None), patch.object(gemini, '_initialized', True):
             result = gemini.process_text("Raw text")
             self.assertEqual(result, "Raw text")
 
@@ -45,5 +51,359 @@ class TestGeminiProcessor(unittest.TestCase):
         result = gemini.process_text("Raw text")
         self.assertEqual(result, "Raw text")
 
+class TestLazyInit(unittest.TestCase):
+
+    def setUp(self):
+        # Start each test from a never-initialized module
+        for name, value in (('client', None), ('_initialized', False), ('IS_CONFIGURED', False),
+                            ('system_instruction', gemini.system_instruction)):
+            patcher = patch.object(gemini, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_import_does_not_load_sdk(self):
+        """Import-time benchmark: the module must import without google.genai or dotenv work."""
+        import subprocess
+        code = ("import sys, time; t = time.perf_counter(); import zerog.core.gemini; "
+                "print(time.perf_counter() - t); print('google.genai' in sys.modules)")
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        out = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True,
+                             text=True, check=True).stdout.split()
+        self.assertEqual(out[1], "False")
+        self.assertLess(float(out[0]), 0.5)
+
+    @patch('dotenv.load_dotenv')
+    def test_client_is_built_on_first_use(self, mock_dotenv):
+        with patch.dict(os.environ, {'GOOGLE_API_KEY': 'test-key'}), \
+                patch.object(gemini, 'make_client') as mock_make:
+            mock_make.return_value.models.generate_content.return_value = MagicMock(text="Polished")
+            self.assertEqual(gemini.process_text(""), "")
+            mock_make.assert_not_called()  # Nothing to polish, nothing to set up
+            with patch.object(polish, 'CACHE_ENABLED', False):
+                self.assertEqual(gemini.process_text("raw"), "Polished")
+                gemini.process_text("raw")
+        mock_make.assert_called_once_with('test-key')
+        self.assertTrue(gemini.IS_CONFIGURED)
+
+    @patch('dotenv.load_dotenv')
+    def test_missing_key_is_checked_once(self, mock_dotenv):
+        with patch.dict(os.environ, {}, clear=True), patch.object(gemini, 'make_client') as mock_make:
+            self.assertEqual(gemini.process_text("raw"), "raw")
+            self.assertEqual(gemini.process_text("raw"), "raw")
+        mock_make.assert_not_called()
+        mock_dotenv.assert_called_once()
+
+    @patch('dotenv.load_dotenv')
+    def test_preload_initializes_in_background(self, mock_dotenv):
+        with patch.dict(os.environ, {'GOOGLE_API_KEY': 'test-key'}), \
+                patch.object(gemini, 'make_client') as mock_make, \
+                patch.object(gemini._executor, 'submit', side_effect=lambda fn: fn()) as mock_submit:
+            gemini.preload()
+            gemini.preload()
+        mock_submit.assert_called_once()
+        mock_make.assert_called_once_with('test-key')
+
+class StubGeminiServer:
+    """
+    Local stand-in for the Gemini REST API with a configurable response delay.
+    Streaming requests get `chunks` as server-sent events, `chunk_delay` apart.
+    With `tls=(certfile, keyfile)` it serves HTTPS and stalls each new
+    connection for `handshake_delay` seconds, like a far-away server would.
+    """
+
+    def __init__(self, reply="Polished text", delay=0.0, chunks=None, chunk_delay=0.0,
+                 tls=None, handshake_delay=0.0):
+        import json
+        import ssl
+        import threading
+        import time
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        self.requests = 0
+        self.connections = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, so clients can reuse connections
+
+            def _send_json(self, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                # Model metadata, as used by the connection prewarm
+                self._send_json({"name": self.path.rsplit("/", 1)[-1]})
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                stub.requests += 1
+                time.sleep(delay)
+                if "streamGenerateContent" in self.path:
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/event-stream")
+                    self.send_header("Connection", "close")
+                    self.end_headers()
+                    self.close_connection = True
+                    for i, text in enumerate(chunks or [reply]):
+                        if i:
+                            time.sleep(chunk_delay)
+                        event = {"candidates": [{"content": {"role": "model", "parts": [{"text": text}]}}]}
+                        self.wfile.write(f"data: {json.dumps(event)}\n\n".encode())
+                        self.wfile.flush()
+                    return
+                self._send_json({"candidates": [{"content": {"role": "model", "parts": [{"text": reply}]}}]})
+
+            def log_message(self, *args):
+                pass
+
+        class Server(ThreadingHTTPServer):
+            daemon_threads = True
+
+            def get_request(self):
+                sock, addr = self.socket.accept()
+                stub.connections += 1
+                if tls:
+                    time.sleep(handshake_delay)
+                    sock = context.wrap_socket(sock, server_side=True)
+                return sock, addr
+
+        if tls:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(*tls)
+        self.server = Server(("127.0.0.1", 0), Handler)
+        self.url = f"{'https' if tls else 'http'}://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def make_test_certificate(directory):
+    """Self-signed certificate for 127.0.0.1, or None if openssl isn't installed."""
+    import shutil
+    import subprocess
+    if not shutil.which("openssl"):
+        return None
+    cert, key = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+                    "-keyout", key, "-out", cert, "-subj", "/CN=localhost",
+                    "-addext", "subjectAltName=IP:127.0.0.1"], check=True, capture_output=True)
+    return cert, key
+
+class TestGeminiDeadline(unittest.TestCase):
+
+    def setUp(self):
+        # Keep the on-disk polish cache out of these tests
+        patcher = patch.object(polish, 'CACHE_ENABLED', False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _client_for(self, stub):
+        return gemini.make_client("test-key", base_url=stub.url)
+
+    def test_fast_response_is_used(self):
+        stub = StubGeminiServer(reply="Polished text")
+        self.addCleanup(stub.close)
+        with patch.object(gemini, 'client', self._client_for(stub)):
+            self.assertEqual(gemini.polish_with_deadline("raw text", deadline=5), "Polished text")
+
+    def test_slow_response_falls_back_to_raw_then_delivers_late(self):
+        import threading
+        stub = StubGeminiServer(reply="Polished text", delay=0.5)
+        self.addCleanup(stub.close)
+        late = []
+        arrived = threading.Event()
+
+        def on_late(polished):
+            late.append(polished)
+            arrived.set()
+
+        with patch.object(gemini, 'client', self._client_for(stub)):
+            result = gemini.polish_with_deadline("raw text", deadline=0.05, on_late=on_late)
+            self.assertEqual(result, "raw text")
+            self.assertTrue(arrived.wait(5))
+        self.assertEqual(late, ["Polished text"])
+
+    def test_client_is_reused_across_calls(self):
+        stub = StubGeminiServer()
+        self.addCleanup(stub.close)
+        with patch.object(gemini, 'client', self._client_for(stub)), \
+                patch('google.genai.Client') as new_client:
+            gemini.process_text_async("one").result(5)
+            gemini.process_text_async("two").result(5)
+            new_client.assert_not_called()
+        self.assertEqual(stub.requests, 2)
+
+class TestGeminiPrewarm(unittest.TestCase):
+
+    def setUp(self):
+        import tempfile
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tls = make_test_certificate(tmp.name)
+        for target, name, value in ((polish, 'CACHE_ENABLED', False), (gemini, '_initialized', True),
+                                    (gemini, '_prewarm', None)):
+            patcher = patch.object(target, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _timed_polish(self, stub, prewarm):
+        import time
+        with patch.dict(os.environ, {'SSL_CERT_FILE': self.tls[0]}):
+            client = gemini.make_client("test-key", base_url=stub.url)
+        with patch.object(gemini, 'client', client):
+            if prewarm:
+                self.assertTrue(gemini.prewarm().future.result(5))
+            start = time.perf_counter()
+            self.assertEqual(gemini.process_text("raw text"), "Polished text")
+            return time.perf_counter() - start
+
+    def test_prewarm_takes_the_handshake_off_the_polish(self):
+        """Benchmark against a TLS stub whose handshake costs 300 ms."""
+        if self.tls is None:
+            self.skipTest("openssl not available")
+        cold_stub = StubGeminiServer(tls=self.tls, handshake_delay=0.3)
+        self.addCleanup(cold_stub.close)
+        warm_stub = StubGeminiServer(tls=self.tls, handshake_delay=0.3)
+        self.addCleanup(warm_stub.close)
+
+        cold = self._timed_polish(cold_stub, prewarm=False)
+        warm = self._timed_polish(warm_stub, prewarm=True)
+
+        self.assertGreaterEqual(cold, 0.3)
+        self.assertLess(warm, 0.3)
+        # The polish request went over the prewarmed connection
+        self.assertEqual(warm_stub.connections, 1)
+
+    def test_prewarm_in_flight_is_reused(self):
+        import concurrent.futures
+        pending = concurrent.futures.Future()
+        with patch.object(gemini._executor, 'submit', return_value=pending) as mock_submit:
+            first = gemini.prewarm()
+            self.assertIs(gemini.prewarm(), first)
+        mock_submit.assert_called_once()
+
+    @patch('zerog.core.gemini.client')
+    def test_cancelled_prewarm_never_connects(self, mock_client):
+        import concurrent.futures
+        with patch.object(gemini._executor, 'submit', return_value=concurrent.futures.Future()):
+            handle = gemini.prewarm()
+        gemini.cancel_prewarm()
+
+        self.assertTrue(handle.future.cancelled())
+        # Even if the pool had already picked it up, it stops before the network
+        self.assertFalse(handle._run())
+        mock_client.models.get.assert_not_called()
+
+class TestGeminiStreaming(unittest.TestCase):
+
+    def setUp(self):
+        # Keep the on-disk polish cache out of these tests
+        patcher = patch.object(polish, 'CACHE_ENABLED', False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _client_for(self, stub):
+        return gemini.make_client("test-key", base_url=stub.url)
+
+    def test_stream_text_yields_sentences_across_chunks(self):
+        stub = StubGeminiServer(chunks=["First sen", "tence. Second", " one! Tail"])
+        self.addCleanup(stub.close)
+        with patch.object(gemini, 'client', self._client_for(stub)):
+            pieces = list(gemini.stream_text("raw"))
+        self.assertEqual(pieces, ["First sentence.", " Second one!", " Tail"])
+
+    def test_polish_streaming_injects_each_sentence(self):
+        import time
+        stub = StubGeminiServer(chunks=["One. ", "Two. ", "Three."], chunk_delay=0.2)
+        self.addCleanup(stub.close)
+        injected = []
+
+        def inject(piece):
+            injected.append((piece, time.perf_counter()))
+            return True
+
+        with patch.object(gemini, 'client', self._client_for(stub)):
+            start = time.perf_counter()
+            result = gemini.polish_streaming("one two three", inject, deadline=5)
+
+        self.assertEqual(result, "One. Two. Three.")
+        self.assertEqual([p for p, _ in injected], ["One.", " Two.", " Three."])
+        # The first sentence lands well before the stream finishes
+        self.assertLess(injected[0][1] - start, injected[-1][1] - start - 0.3)
+
+    def test_polish_streaming_falls_back_when_first_sentence_is_late(self):
+        stub = StubGeminiServer(chunks=["Late sentence."], delay=0.5)
+        self.addCleanup(stub.close)
+        injected = []
+        with patch.object(gemini, 'client', self._client_for(stub)):
+            result = gemini.polish_streaming("raw text", lambda t: injected.append(t) or True, deadline=0.05)
+        self.assertEqual(result, "raw text")
+        self.assertEqual(injected, ["raw text"])
+
+    @patch('zerog.core.gemini.client')
+    def test_polish_streaming_falls_back_on_error(self, mock_client):
+        mock_client.models.generate_content_stream.side_effect = Exception("API Error")
+        injected = []
+        result = gemini.polish_streaming("raw text", lambda t: injected.append(t) or True, deadline=1)
+        self.assertEqual(result, "raw text")
+        self.assertEqual(injected, ["raw text"])
+
+    def test_polish_streaming_reports_failed_inject(self):
+        with patch.object(gemini, 'client', None), patch.object(gemini, '_initialized', True):
+            self.assertIsNone(gemini.polish_streaming("raw text", lambda t: False))
+
+class TestGeminiCache(unittest.TestCase):
+
+    def setUp(self):
+        import tempfile
+        from zerog.core.polish_cache import PolishCache
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache = PolishCache(tmp.name)
+        for name, value in (('_cache', self.cache), ('CACHE_ENABLED', True)):
+            patcher = patch.object(polish, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    @patch('zerog.core.gemini.client')
+    def test_repeated_phrase_skips_the_network(self, mock_client):
+        mock_client.models.generate_content.return_value = MagicMock(text="Best regards, Sam.")
+        self.assertEqual(gemini.process_text("best regards sam"), "Best regards, Sam.")
+        self.assertEqual(gemini.process_text("  best regards   sam "), "Best regards, Sam.")
+        mock_client.models.generate_content.assert_called_once()
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    @patch('zerog.core.gemini.client')
+    def test_failures_are_not_cached(self, mock_client):
+        mock_client.models.generate_content.side_effect = Exception("API Error")
+        gemini.process_text("raw text")
+        gemini.process_text("raw text")
+        self.assertEqual(mock_client.models.generate_content.call_count, 2)
+        self.assertEqual(len(self.cache), 0)
+
+    @patch('zerog.core.gemini.client')
+    def test_changed_instruction_misses(self, mock_client):
+        mock_client.models.generate_content.return_value = MagicMock(text="Polished")
+        gemini.process_text("raw text")
+        with patch.object(gemini, 'system_instruction', "Translate to French."):
+            gemini.process_text("raw text")
+        self.assertEqual(mock_client.models.generate_content.call_count, 2)
+
+    @patch('zerog.core.gemini.client')
+    def test_streaming_uses_cached_result(self, mock_client):
+        mock_client.models.generate_content.return_value = MagicMock(text="Polished text.")
+        gemini.process_text("raw text")
+        injected = []
+        result = gemini.polish_streaming("raw text", lambda t: injected.append(t) or True)
+        self.assertEqual(result, "Polished text.")
+        self.assertEqual(injected, ["Polished text."])
+        mock_client.models.generate_content_stream.assert_not_called()
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,94 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from zerog.core import injector
+from zerog.core.injector import NullInjector, XdotoolInjector, select_injector
+
+class TestInjectorSelection(unittest.TestCase):
+
+    @patch('zerog.core.injector.XTestInjector')
+    def test_auto_prefers_xtest_with_display(self, mock_xtest):
+        with patch.dict('os.environ', {'DISPLAY': ':99'}, clear=True):
+            self.assertIs(select_injector(), mock_xtest.return_value)
+
+    @patch('zerog.core.injector.XdotoolInjector')
+    @patch('zerog.core.injector.shutil.which', return_value='/usr/bin/xdotool')
+    @patch('zerog.core.injector.XTestInjector', side_effect=RuntimeError("no XTEST"))
+    def test_auto_falls_back_to_xdotool(self, mock_xtest, mock_which, mock_xdotool):
+        with patch.dict('os.environ', {'DISPLAY': ':99'}, clear=True):
+            self.assertIs(select_injector(), mock_xdotool.return_value)
+
+    @patch('zerog.core.injector.shutil.which', return_value=None)
+    def test_headless_gets_null_injector(self, mock_which):
+        with patch.dict('os.environ', {}, clear=True):
+            self.assertIsInstance(select_injector(), NullInjector)
+
+    def test_explicit_choice(self):
+        self.assertIsInstance(select_injector("null"), NullInjector)
+
+    def test_set_injector_overrides_process_wide_backend(self):
+        double = NullInjector()
+        injector.set_injector(double)
+        try:
+            self.assertIs(injector.get_injector(), double)
+            injector.get_injector().paste()
+            self.assertEqual(len(double.pastes), 1)
+        finally:
+            injector.set_injector(None)
+
+class TestXTestInjector(unittest.TestCase):
+
+    @patch('Xlib.display.Display')
+    def test_unmapped_key_is_refused(self, mock_display):
+        from Xlib import XK
+        display = mock_display.return_value
+        # No 'v' on a non-Latin layout
+        v = XK.string_to_keysym("v")
+        display.keysym_to_keycode.side_effect = lambda keysym: 0 if keysym == v else 37
+        with self.assertRaisesRegex(RuntimeError, "v"):
+            injector.XTestInjector(":99")
+        display.close.assert_called_once()
+
+class TestXdotoolInjector(unittest.TestCase):
+    """Runs against a fake xdotool on PATH, so the commands really execute."""
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.log = os.path.join(self.dir.name, "commands")
+        script = os.path.join(self.dir.name, "xdotool")
+        with open(script, "w") as f:
+            f.write('#!/bin/sh\n'
+                    'if [ -n "$FAKE_XDOTOOL_FAIL" ]; then echo "Can\'t open display" >&2; exit 1; fi\n'
+                    f'echo "$@" >> "{self.log}"\n')
+        os.chmod(script, 0o755)
+        env = patch.dict('os.environ', {'PATH': self.dir.name})
+        env.start()
+        self.addCleanup(env.stop)
+
+    def _commands(self):
+        with open(self.log) as f:
+            return f.read().splitlines()
+
+    def test_each_keystroke_has_run_when_it_returns(self):
+        xdo = XdotoolInjector()
+        self.assertTrue(xdo.paste())
+        self.assertEqual(self._commands(), ["key ctrl+v"])
+        self.assertTrue(xdo.select_back(3))
+        self.assertEqual(self._commands(), ["key ctrl+v", "key --repeat 3 shift+Left"])
+
+    def test_failed_keystroke_is_reported(self):
+        xdo = XdotoolInjector()
+        with patch.dict('os.environ', {'FAKE_XDOTOOL_FAIL': '1'}):
+            with self.assertLogs('zerog.core.injector', level='ERROR') as logs:
+                self.assertFalse(xdo.paste())
+        self.assertIn("Can't open display", logs.output[0])
+
+    def test_missing_xdotool_is_refused(self):
+        with patch.dict('os.environ', {'PATH': os.path.join(self.dir.name, "empty")}):
+            with self.assertRaises(RuntimeError):
+                XdotoolInjector()
+
+if __name__ == '__main__':
+    unittest.main()
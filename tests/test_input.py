@@ -11,6 +11,8 @@ class TestKeyMonitorLinux(unittest.TestCase):
         # We patch the state_machine at the module level
         self.patcher = patch('zerog.core.input.state_machine')
         self.mock_sm = self.patcher.start()
+        self.polish_patcher = patch('zerog.core.input.polish')
+        self.mock_polish = self.polish_patcher.start()
         self.monitor = KeyMonitor()
         
         # Define some common key mocks
@@ -20,6 +22,7 @@ class TestKeyMonitorLinux(unittest.TestCase):
         
     def tearDown(self):
         self.patcher.stop()
+        self.polish_patcher.stop()
 
     def test_on_press_ctrl_starts_recording(self):
         """Test that pressing Left Control transitions IDLE -> RECORDING."""
@@ -33,6 +36,8 @@ class TestKeyMonitorLinux(unittest.TestCase):
         self.assertTrue(self.monitor.ctrl_pressed)
         self.mock_sm.set_state.assert_called_once_with(AppState.RECORDING)
         self.assertIsNotNone(self.monitor.recording_start_time)
+        # Gemini is set up speculatively, off the key listener thread
+        self.mock_polish.preload.assert_called_once()
 
     def test_on_press_q_activates_gemini(self):
         from pynput import keyboard
@@ -48,6 +53,8 @@ class TestKeyMonitorLinux(unittest.TestCase):
         self.monitor.on_press(q_key)
         
         self.assertEqual(self.mock_sm.context['use_gemini'], True)
+        # The Gemini connection is opened while the user is still talking
+        self.mock_polish.prewarm.assert_called_once()
 
     def test_on_release_ctrl_triggers_processing(self):
         """Test that releasing Ctrl triggers the PROCESSING state."""
@@ -66,6 +73,19 @@ class TestKeyMonitorLinux(unittest.TestCase):
             use_gemini=True
         )
 
+    @patch('zerog.core.input.models')
+    def test_ctrl_shift_escalates_to_large_model(self, mock_models):
+        """Shift during a dictation prefetches the large model and asks for it on release."""
+        from pynput import keyboard
+        self.monitor.ctrl_pressed = True
+        self.monitor.on_press(keyboard.Key.shift)
+        self.monitor.on_press(keyboard.Key.shift)  # Key repeat
+        mock_models.prefetch.assert_called_once()
+
+        self.monitor.on_release(keyboard.Key.ctrl_l)
+        self.mock_sm.set_state.assert_called_once_with(AppState.PROCESSING, use_gemini=False, escalate=True)
+        self.assertFalse(self.monitor.shift_pressed)
+
     def test_safety_timeout(self):
         """Verify the watchdog stops recording if it exceeds MAX_RECORDING_SECONDS."""
         import time
@@ -3,7 +3,8 @@ import unittest
 from unittest.mock import MagicMock, patch
 import os
 import sys
-import queue
+import threading
+import time
 import numpy as np
 from zerog.core.state import AppState
 
@@ -23,101 +24,407 @@ class TestAudioRecorderLinux(unittest.TestCase):
 
     def test_recorder_initial_state(self):
         self.assertFalse(self.recorder.recording)
-        self.assertIsInstance(self.recorder.audio_queue, queue.Queue)
+        # Capture arenas are preallocated and free
+        self.assertTrue(self.recorder._buffers)
+        self.assertFalse(any(b.in_use for b in self.recorder._buffers))
 
     @patch('zerog.core.recorder.state_machine')
     @patch('zerog.core.recorder.sd.InputStream')
-    @patch('zerog.core.recorder.subprocess.run')
-    def test_start_recording_linux(self, mock_run, mock_sd, mock_state_machine):
-        """Verify Linux start sequence: Sound trigger (paplay) and InputStream."""
-        from zerog.core.state import AppState
-        mock_state_machine.current_state = AppState.RECORDING
-        
+    def test_start_recording_linux(self, mock_sd, mock_state_machine):
+        """Verify the start sequence: a free arena, then a live InputStream."""
         self.recorder.start_recording()
-        
+
         self.assertTrue(self.recorder.recording)
-        
-        # Verify Linux sound playback (paplay) was attempted
-        mock_run.assert_called()
-        args, _ = mock_run.call_args
-        self.assertIn("paplay", args[0])
-        
+        self.assertIs(self.recorder.buffer, self.recorder.utterance.buffer)
+        self.assertTrue(self.recorder.buffer.in_use)
         mock_sd.assert_called_once()
+        self.assertEqual(mock_sd.call_args[1]["callback"], self.recorder.callback)
+        mock_sd.return_value.start.assert_called_once()
 
+    @patch('zerog.core.recorder.state_machine')
     @patch('zerog.core.recorder.sd.InputStream')
-    def test_stop_recording_linux(self, mock_sd):
-        self.recorder.recording = True
-        mock_stream = MagicMock()
-        self.recorder.stream = mock_stream
-        
-        with patch('zerog.core.recorder.threading.Thread') as mock_thread:
-            self.recorder.stop_recording(use_gemini=False)
-            
-            self.assertFalse(self.recorder.recording)
-            self.assertIsNone(self.recorder.stream)
-            
-            # Transcription and cleanup threads spawned
-            self.assertGreaterEqual(mock_thread.call_count, 1)
-
-    @patch('zerog.core.typer.FastTyper.inject') 
-    # @patch('zerog.core.recorder.state_machine')
+    def test_stop_recording_linux(self, mock_sd, mock_state_machine):
+        self.recorder.worker = MagicMock()
+        self.recorder.start_recording()
+        utterance = self.recorder.utterance
+        mock_stream = mock_sd.return_value
+
+        self.recorder.stop_recording(use_gemini=False)
+
+        self.assertFalse(self.recorder.recording)
+        self.assertIsNone(self.recorder.stream)
+        mock_stream.close.assert_called_once()
+        # Transcription is queued on the persistent worker, not a new thread
+        self.recorder.worker.submit.assert_called_once_with(utterance.job)
+
+    @patch('zerog.core.recorder.FastTyper.inject', return_value=True)
+    @patch('zerog.core.recorder.state_machine')
     def test_transcribe_and_type_linux_flow(self, mock_state_machine, mock_inject):
         """Verify Linux-specific injection call using FastTyper.inject."""
+        from zerog.core.recorder import Utterance
         # 1. Mock the Whisper Model transcription
         self.recorder.model = MagicMock()
         mock_segment = MagicMock()
         mock_segment.text = "Hello world"
         self.recorder.model.transcribe.return_value = ([mock_segment], None)
-        
-        # 2. Mock audio data in queue
-        self.recorder.audio_queue.put(np.zeros(1024))
-        
+        self.recorder.vad = None
+
+        # 2. Mock audio data in the capture buffer
+        utterance = Utterance(self.recorder._acquire_buffer())
+        utterance.buffer.write(np.zeros(1024, dtype=np.float32))
+
         # 3. Action
-        self.recorder.transcribe_and_type(use_gemini=False)
-        
+        self.recorder.transcribe(False, utterance)
+
         # 4. Assert injection was called with transcribed text
         mock_inject.assert_called_once_with("Hello world")
-        mock_state_machine.set_state.assert_any_call(AppState.SUCCESS)
+        self.assertEqual(mock_state_machine.compare_and_set.call_args[0], (AppState.PROCESSING, AppState.SUCCESS))
 
     def test_recorder_callback_audio_levels(self, *args):
-        """Verify audio levels are calculated and broadcasted."""
+        """Verify audio levels reach the LevelMeter, not the state machine, from the audio thread."""
         with patch('zerog.core.recorder.state_machine') as mock_sm:
             indata = np.full((1024, 1), 0.1, dtype=np.float32)
+            self.recorder.buffer = self.recorder._acquire_buffer()
             self.recorder.recording = True
-            
+
             self.recorder.callback(indata, 1024, {}, None)
-            
-            self.assertFalse(self.recorder.audio_queue.empty())
-            # RMS logic check: broadcast_audio_level should be called
-            self.assertTrue(mock_sm.broadcast_audio_level.called)
 
+            self.assertEqual(len(self.recorder.buffer), 1024)
+            # The HUD polls the meter at its own frame rate
+            rms, peak, blocks = self.recorder.meter.read()
+            self.assertAlmostEqual(rms, 0.1, places=5)
+            self.assertAlmostEqual(peak, 0.1, places=5)
+            self.assertEqual(blocks, 1)
+            # Nothing is dispatched from the real-time thread
+            self.assertEqual(mock_sm.mock_calls, [])
+
+    @patch('zerog.core.recorder.FastTyper.inject')
     @patch('zerog.core.recorder.state_machine')
-    def test_silence_detection_linux(self, mock_state_machine):
-        """Verify automatic silence-cutoff triggers PROCESSING state."""
-        # Setup silent input
+    def test_silence_detection_linux(self, mock_state_machine, mock_inject):
+        """Silence never ends the recording from the audio thread; the VAD drops it before inference."""
+        from zerog.core.recorder import make_vad
         indata_silent = np.full((1024, 1), 0.001, dtype=np.float32)
-        self.recorder.recording = True
-        
-        # Start silence tracking
-        self.recorder.callback(indata_silent, 1024, {}, None)
-        self.assertIsNotNone(self.recorder._silence_start_time)
-        
-        # Simulate passing 11 seconds
-        import time
-        self.recorder._silence_start_time = time.time() - 11.0
-        
-        with patch('zerog.core.recorder.threading.Thread') as mock_thread:
+        self.recorder.vad = make_vad("energy")
+        self.recorder.worker = MagicMock(pending=0)
+        with patch('zerog.core.recorder.sd.InputStream'):
+            self.recorder.start_recording()
+        for _ in range(200):  # About 13 seconds of room noise
             self.recorder.callback(indata_silent, 1024, {}, None)
-            
-            # Check for transition to PROCESSING
-            self.assertTrue(self.recorder._triggered_silence_stop)
-            # Find the state machine call in thread targets
-            called_set_state = False
-            for call in mock_thread.call_args_list:
-                if call[1]['target'] == mock_state_machine.set_state:
-                    if call[1]['args'][0] == AppState.PROCESSING:
-                        called_set_state = True
-            self.assertTrue(called_set_state)
+        self.assertTrue(self.recorder.recording)
+        mock_state_machine.set_state.assert_not_called()
+
+        self.recorder.model = MagicMock()
+        self.recorder.stop_recording(use_gemini=False)
+        self.recorder.transcribe(False, self.recorder.last_utterance)
+
+        self.recorder.model.transcribe.assert_not_called()
+        mock_inject.assert_not_called()
+        self.assertEqual(mock_state_machine.compare_and_set.call_args[0], (AppState.PROCESSING, AppState.IDLE))
+
+class TestStreamingTranscription(unittest.TestCase):
+
+    @patch('zerog.core.recorder.WhisperModel')
+    def setUp(self, mock_whisper):
+        with patch('zerog.core.recorder.state_machine'):
+            self.recorder = AudioRecorder(streaming=True)
+        self.recorder.model = MagicMock()
+
+    def _speech(self, seconds):
+        return np.full(int(seconds * 16000), 0.2, dtype=np.float32)
+
+    def _silence(self, seconds):
+        return np.zeros(int(seconds * 16000), dtype=np.float32)
+
+    def test_commit_point_waits_for_minimum_chunk(self):
+        from zerog.core.recorder import find_commit_point
+        audio = np.concatenate([self._speech(1.0), self._silence(1.0)])
+        self.assertIsNone(find_commit_point(audio))
+
+    def test_commit_point_lands_inside_pause(self):
+        from zerog.core.recorder import find_commit_point
+        audio = np.concatenate([self._speech(5.0), self._silence(0.4), self._speech(1.0)])
+        cut = find_commit_point(audio)
+        self.assertIsNotNone(cut)
+        self.assertTrue(5.0 * 16000 <= cut <= 5.4 * 16000)
+
+    def test_commit_point_forced_without_pause(self):
+        from zerog.core.recorder import find_commit_point
+        self.assertIsNone(find_commit_point(self._speech(10.0)))
+        self.assertIsNotNone(find_commit_point(self._speech(21.0)))
+
+    @patch('zerog.core.recorder.FastTyper.inject', return_value=True)
+    @patch('zerog.core.recorder.state_machine')
+    def test_tail_is_joined_with_committed_text(self, mock_sm, mock_inject):
+        """Only the uncommitted tail is decoded on release."""
+        first, second = MagicMock(), MagicMock()
+        first.text, second.text = "Hello", "world"
+        self.recorder.model.transcribe.side_effect = [([first], None), ([second], None)]
+
+        from zerog.core.recorder import Utterance
+        utterance = Utterance(self.recorder._acquire_buffer())
+        audio = np.concatenate([self._speech(5.0), self._silence(0.4), self._speech(1.0)])
+        utterance.buffer.write(audio.reshape(-1, 1))
+        self.recorder._commit_ready_chunk(utterance)
+        self.assertEqual(utterance.committed, ["Hello"])
+
+        self.recorder.transcribe(False, utterance)
+
+        mock_inject.assert_called_once_with("Hello world")
+        _, kwargs = self.recorder.model.transcribe.call_args
+        self.assertEqual(kwargs['initial_prompt'], "Hello")
+        # Reported without sleeping; the state machine resets SUCCESS itself,
+        # with the latency summary for the HUD
+        mock_sm.compare_and_set.assert_called_once()
+        self.assertEqual(mock_sm.compare_and_set.call_args[0], (AppState.PROCESSING, AppState.SUCCESS))
+        self.assertIn("infer", mock_sm.compare_and_set.call_args[1]["trace"])
+        # The arena is handed back for the next recording
+        self.assertFalse(utterance.buffer.in_use)
+
+    @patch('zerog.core.recorder.STREAM_POLL_SECONDS', 0.01)
+    @patch('zerog.core.recorder.sd')
+    @patch('zerog.core.recorder.state_machine')
+    def test_streaming_commits_run_on_the_transcription_worker(self, mock_sm, mock_sd):
+        self.recorder.worker = MagicMock()
+        committed = threading.Event()
+        self.recorder.worker.submit_idle.side_effect = lambda job: committed.set()
+        self.recorder.start_recording()
+        utterance = self.recorder.utterance
+        self.assertTrue(committed.wait(2))
+        job = self.recorder.worker.submit_idle.call_args[0][0]
+        self.assertEqual(job.args, (utterance,))
+
+        audio = np.concatenate([self._speech(5.0), self._silence(0.4), self._speech(1.0)])
+        utterance.buffer.write(audio.reshape(-1, 1))
+        self.recorder.stop_recording(use_gemini=False)
+        # A commit still queued once the key is up leaves the audio to transcribe()
+        job.fn(*job.args)
+        self.recorder.model.transcribe.assert_not_called()
+        self.assertEqual(utterance.commit_pos, 0)
+
+    @patch('zerog.core.recorder.sd')
+    @patch('zerog.core.recorder.state_machine')
+    def test_repeated_processing_submits_once(self, mock_sm, mock_sd):
+        """HUD Stop, then the key release: the second PROCESSING finds nothing to do."""
+        self.recorder.streaming = False
+        self.recorder.worker = MagicMock()
+        self.recorder.start_recording()
+        stream = mock_sd.InputStream.return_value
+        self.recorder.on_state_change(AppState.PROCESSING, {"use_gemini": False})
+        self.recorder.on_state_change(AppState.PROCESSING, {"use_gemini": False})
+
+        self.recorder.worker.submit.assert_called_once()
+        stream.close.assert_called_once()
+        self.assertIsNone(self.recorder.stream)
+        # The queued job reports the outcome; nothing forces IDLE meanwhile
+        mock_sm.set_state.assert_not_called()
+
+    @patch('zerog.core.recorder.state_machine')
+    def test_stop_recording_queues_on_persistent_worker(self, mock_sm):
+        self.recorder.streaming = False
+        self.recorder.worker = MagicMock()
+        self.recorder.start_recording()
+        utterance = self.recorder.utterance
+        self.recorder.stop_recording(use_gemini=False)
+
+        self.recorder.worker.submit.assert_called_once_with(utterance.job)
+        self.assertEqual(utterance.job.args, (False, utterance))
+        # A cancelled job hands its arena back
+        utterance.job.on_cancel()
+        self.assertFalse(utterance.buffer.in_use)
+
+    @patch('zerog.core.recorder.FastTyper.inject', return_value=True)
+    @patch('zerog.core.recorder.polish.polish_with_deadline', return_value="Hello, world.")
+    @patch('zerog.core.recorder.state_machine')
+    def test_gemini_polish_goes_through_deadline(self, mock_sm, mock_polish, mock_inject):
+        from zerog.core.recorder import Utterance
+        segment = MagicMock()
+        segment.text = "hello world"
+        self.recorder.model.transcribe.return_value = ([segment], None)
+        utterance = Utterance(self.recorder._acquire_buffer())
+        utterance.buffer.write(self._speech(1.0))
+
+        self.recorder.transcribe(True, utterance)
+
+        self.assertEqual(mock_polish.call_args[0][0], "hello world")
+        mock_inject.assert_called_once_with("Hello, world.")
+
+    @patch('zerog.core.recorder.FastTyper.inject', return_value=True)
+    @patch('zerog.core.recorder.polish.polish_streaming', return_value="Hello, world.")
+    @patch('zerog.core.recorder.polish.STREAM_POLISH', True)
+    @patch('zerog.core.recorder.state_machine')
+    def test_streamed_polish_injects_through_gemini(self, mock_sm, mock_stream, mock_inject):
+        from zerog.core.recorder import Utterance
+        segment = MagicMock()
+        segment.text = "hello world"
+        self.recorder.model.transcribe.return_value = ([segment], None)
+        utterance = Utterance(self.recorder._acquire_buffer())
+        utterance.buffer.write(self._speech(1.0))
+
+        self.recorder.transcribe(True, utterance)
+
+        # Gemini's stream drives the injector itself; nothing is pasted twice
+        self.assertEqual(mock_stream.call_args[0][0], "hello world")
+        mock_inject.assert_not_called()
+        self.assertEqual(mock_sm.compare_and_set.call_args[0], (AppState.PROCESSING, AppState.SUCCESS))
+
+    @patch('zerog.core.recorder.polish.cancel_prewarm')
+    @patch('zerog.core.recorder.state_machine')
+    def test_aborted_recording_cancels_gemini_prewarm(self, mock_sm, mock_cancel):
+        self.recorder.recording = True
+        self.recorder.on_state_change(AppState.ERROR, {})
+        mock_cancel.assert_called_once()
+
+    @patch('zerog.core.recorder.state_machine')
+    def test_finished_job_does_not_override_queued_dictation(self, mock_sm):
+        self.recorder.worker = MagicMock()
+        self.recorder.worker.pending = 1
+        self.recorder._finish(AppState.SUCCESS)
+        mock_sm.compare_and_set.assert_not_called()
+
+    @patch('zerog.core.recorder.state_machine')
+    def test_back_to_back_recordings_use_separate_buffers(self, mock_sm):
+        self.recorder.streaming = False
+        self.recorder.start_recording()
+        first = self.recorder.buffer
+        self.recorder.recording = False
+        self.recorder.start_recording()
+        self.assertIsNot(self.recorder.buffer, first)
+
+class TestVADStage(unittest.TestCase):
+
+    def _tone(self, seconds, level=0.2):
+        return np.full(int(seconds * 16000), level, dtype=np.float32)
+
+    def test_energy_vad_trims_leading_and_trailing_silence(self):
+        from zerog.core.recorder import EnergyVAD
+        audio = np.concatenate([self._tone(1.0, 0.0), self._tone(2.0), self._tone(1.0, 0.0)])
+        speech, trimmed = EnergyVAD(pad=0.0).trim(audio)
+        # Spans snap to 30ms frames
+        self.assertAlmostEqual(len(speech), 2 * 16000, delta=480)
+        self.assertAlmostEqual(trimmed, 2.0, delta=0.03)
+
+    def test_energy_vad_keeps_short_pauses(self):
+        from zerog.core.recorder import EnergyVAD
+        audio = np.concatenate([self._tone(1.0), self._tone(0.3, 0.0), self._tone(1.0)])
+        speech, trimmed = EnergyVAD(pad=0.0).trim(audio)
+        self.assertEqual(len(speech), len(audio))
+        self.assertEqual(trimmed, 0.0)
+
+    def test_energy_vad_cuts_long_pauses(self):
+        from zerog.core.recorder import EnergyVAD
+        audio = np.concatenate([self._tone(1.0), self._tone(3.0, 0.0), self._tone(1.0)])
+        speech, trimmed = EnergyVAD(pad=0.0).trim(audio)
+        self.assertAlmostEqual(len(speech), 2 * 16000, delta=480)
+        self.assertAlmostEqual(trimmed, 3.0, delta=0.03)
+
+    def test_energy_vad_hears_a_quiet_microphone(self):
+        from zerog.core.recorder import EnergyVAD
+        # Speech at -46 dBFS over a -66 dBFS noise floor, below the fixed gate
+        rng = np.random.default_rng(0)
+        noise = lambda seconds: rng.normal(0, 0.0005, int(seconds * 16000)).astype(np.float32)
+        audio = np.concatenate([noise(1.0), self._tone(2.0, 0.005) + noise(2.0), noise(1.0)])
+        speech, trimmed = EnergyVAD(pad=0.0).trim(audio)
+        self.assertAlmostEqual(len(speech), 2 * 16000, delta=480)
+        # Noise alone is still silence
+        self.assertEqual(len(EnergyVAD(pad=0.0).trim(noise(2.0))[0]), 0)
+
+    @patch('zerog.core.recorder.WhisperModel')
+    def test_silence_never_reaches_model(self, mock_whisper):
+        with patch('zerog.core.recorder.state_machine'):
+            recorder = AudioRecorder(vad="energy")
+        recorder.model = MagicMock()
+        self.assertEqual(recorder._decode(self._tone(2.0, 0.0)), "")
+        recorder.model.transcribe.assert_not_called()
+
+    def test_make_vad(self):
+        from zerog.core.recorder import make_vad, EnergyVAD
+        self.assertIsNone(make_vad("off"))
+        self.assertIsInstance(make_vad("energy"), EnergyVAD)
+        with self.assertRaises(ValueError):
+            make_vad("bogus")
+
+class TestBackgroundModelLoading(unittest.TestCase):
+
+    def setUp(self):
+        with patch('zerog.core.recorder.state_machine'):
+            self.recorder = AudioRecorder(streaming=False, vad="off")
+
+    def test_constructor_does_not_load_model(self):
+        with patch('zerog.core.recorder.WhisperModel') as mock_whisper:
+            AudioRecorder()
+            mock_whisper.assert_not_called()
+
+    def test_state_changes_arrive_on_recorder_thread(self):
+        with patch('zerog.core.recorder.state_machine') as mock_sm:
+            recorder = AudioRecorder()
+        mock_sm.add_observer.assert_called_once_with(recorder.on_state_change, dispatcher=recorder.events)
+
+    @patch('zerog.core.recorder.sd.InputStream')
+    def test_record_start_latency_is_measured(self, mock_stream):
+        from zerog.core import state
+        with patch('zerog.core.recorder.state_machine'):
+            state._deliver(lambda s, d: self.recorder.start_recording(), AppState.RECORDING, {},
+                           time.perf_counter(), None)
+        self.assertIsNotNone(self.recorder.record_start_latency)
+        self.assertLess(self.recorder.record_start_latency, 1.0)
+
+    @patch('zerog.core.recorder.state_machine')
+    def test_loader_reports_loading_then_idle(self, mock_sm):
+        with patch('zerog.core.recorder.WhisperModel'), \
+                patch('zerog.core.recorder.threading.Thread') as mock_thread:
+            self.recorder.start_loading()
+            mock_sm.set_state.assert_called_with(AppState.LOADING)
+            # Run the loader inline
+            mock_thread.call_args[1]['target']()
+        self.assertTrue(self.recorder.model_ready)
+        mock_sm.compare_and_set.assert_called_once_with(AppState.LOADING, AppState.IDLE)
+
+    @patch('zerog.core.recorder.state_machine')
+    def test_warmup_runs_before_model_is_ready(self, mock_sm):
+        with patch('zerog.core.recorder.WhisperModel') as mock_whisper:
+            model = mock_whisper.return_value
+            model.transcribe.side_effect = lambda *a, **k: (
+                self.assertFalse(self.recorder.model_ready) or (iter([]), None))
+            self.recorder._load_model()
+
+        model.transcribe.assert_called_once()
+        warmup_audio = model.transcribe.call_args[0][0]
+        self.assertEqual(len(warmup_audio), 16000)
+        self.assertFalse(warmup_audio.any())
+        self.assertIsNotNone(self.recorder.warmup_seconds)
+        self.assertTrue(self.recorder.model_ready)
+
+    @patch('zerog.core.recorder.state_machine')
+    def test_warmup_can_be_disabled(self, mock_sm):
+        self.recorder.engine.warmup = False
+        with patch('zerog.core.recorder.WhisperModel') as mock_whisper:
+            self.recorder._load_model()
+        mock_whisper.return_value.transcribe.assert_not_called()
+
+    @patch('zerog.core.recorder.FastTyper.inject', return_value=True)
+    @patch('zerog.core.recorder.state_machine')
+    def test_recording_before_ready_is_transcribed_after_load(self, mock_sm, mock_inject):
+        import threading
+        # Background load started but not finished yet
+        with patch('zerog.core.recorder.threading.Thread'):
+            self.recorder.start_loading()
+        self.recorder.start_recording()
+        self.recorder.buffer.write(np.full((16000, 1), 0.2, dtype=np.float32))
+        self.recorder.recording = False
+
+        worker = threading.Thread(target=self.recorder.transcribe, args=(False, self.recorder.utterance))
+        worker.start()
+        worker.join(0.2)
+        self.assertTrue(worker.is_alive())  # Waiting for the model
+
+        segment = MagicMock()
+        segment.text = "Late but kept"
+        model = MagicMock()
+        model.transcribe.return_value = ([segment], None)
+        self.recorder.model = model
+        worker.join(2)
+
+        mock_inject.assert_called_once_with("Late but kept")
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
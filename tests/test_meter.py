@@ -0,0 +1,99 @@
+import os
+import sys
+import unittest
+from unittest.mock import patch
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from zerog.core.meter import LevelMeter, to_meter
+
+
+class TestLevelMeter(unittest.TestCase):
+
+    def test_rms_and_peak(self):
+        meter = LevelMeter()
+        block = np.array([[0.5], [-0.5], [0.5], [-0.8]], dtype=np.float32)
+        meter.update(block)
+        rms, peak, blocks = meter.read()
+        self.assertAlmostEqual(rms, np.sqrt(np.mean(block ** 2)), places=6)
+        self.assertAlmostEqual(peak, 0.8, places=6)
+        self.assertEqual(blocks, 1)
+
+    def test_latest_value_wins(self):
+        meter = LevelMeter()
+        meter.update(np.full((256, 1), 0.5, dtype=np.float32))
+        meter.update(np.full((256, 1), 0.1, dtype=np.float32))
+        rms, _, blocks = meter.read()
+        self.assertAlmostEqual(rms, 0.1, places=6)
+        self.assertEqual(blocks, 2)
+        meter.reset()
+        self.assertEqual(meter.read(), (0.0, 0.0, 0))
+
+    def test_empty_block_is_ignored(self):
+        meter = LevelMeter()
+        meter.update(np.zeros((0, 1), dtype=np.float32))
+        self.assertEqual(meter.read()[2], 0)
+
+    def test_to_meter_scale(self):
+        self.assertEqual(to_meter(0.0), 0.0)
+        self.assertEqual(to_meter(1.0), 1.0)
+        self.assertAlmostEqual(to_meter(0.001), 0.0)  # -60 dBFS
+        self.assertAlmostEqual(to_meter(0.0316), 0.5, places=2)  # -30 dBFS
+
+
+class TestRecorderMetering(unittest.TestCase):
+
+    @patch('zerog.core.recorder.WhisperModel')
+    def test_callback_fills_meter_without_notifying(self, mock_whisper):
+        from zerog.core.recorder import AudioRecorder
+        with patch('zerog.core.recorder.state_machine') as mock_sm:
+            recorder = AudioRecorder()
+            recorder.buffer = recorder._acquire_buffer()
+            recorder.recording = True
+            recorder.callback(np.full((1024, 1), 0.1, dtype=np.float32), 1024, {}, None)
+
+            self.assertAlmostEqual(recorder.meter.read()[0], 0.1, places=6)
+            # Nothing runs observers on the audio thread
+            mock_sm.broadcast_audio_level.assert_not_called()
+
+
+class TestHUDMeter(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PyQt6.QtWidgets import QApplication
+        cls.app = QApplication.instance() or QApplication(sys.argv)
+
+    def setUp(self):
+        from zerog.gui.hud import LinuxHUD
+        with patch('zerog.gui.hud.state_machine'):
+            self.hud = LinuxHUD()
+        self.addCleanup(self.hud.close)
+        self.meter = LevelMeter()
+        self.hud.attach_meter(self.meter)
+
+    def test_meter_polls_only_while_recording(self):
+        from zerog.core.state import AppState
+        self.hud.on_state_changed(AppState.RECORDING)
+        self.assertTrue(self.hud.meter_timer.isActive())
+        self.assertEqual(self.hud.meter_timer.interval(), 33)
+        self.hud.on_state_changed(AppState.PROCESSING)
+        self.assertFalse(self.hud.meter_timer.isActive())
+        self.assertEqual(self.hud.level_bar.value(), 0)
+
+    @patch('zerog.gui.hud.state_machine')
+    def test_poll_coalesces_blocks(self, mock_sm):
+        for level in (0.5, 0.2, 0.1):
+            self.meter.update(np.full((512, 1), level, dtype=np.float32))
+        self.hud.poll_meter()
+        self.hud.poll_meter()  # No new audio: nothing to redraw
+        mock_sm.broadcast_audio_level.assert_called_once()
+        level = mock_sm.broadcast_audio_level.call_args[0][0]
+        self.assertAlmostEqual(level, to_meter(0.1), places=5)
+        self.assertEqual(self.hud.level_bar.value(), int(level * 100))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,257 @@
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from zerog.core.models import ModelPool
+from zerog.core.engine import EngineConfig
+from zerog.core.state import AppState
+
+
+class TestModelPool(unittest.TestCase):
+
+    def test_routes_long_or_escalated_utterances(self):
+        pool = ModelPool(MagicMock(), large="small", escalate_seconds=15.0)
+        self.assertIsNone(pool.route(3.0))
+        self.assertEqual(pool.route(20.0), "small")
+        self.assertEqual(pool.route(3.0, escalate=True), "small")
+        # Without a large model nothing escalates
+        self.assertIsNone(ModelPool(MagicMock()).route(60.0, escalate=True))
+        # escalate_seconds=0 leaves only the modifier key
+        self.assertIsNone(ModelPool(MagicMock(), large="small").route(60.0))
+
+    def test_get_never_blocks_on_a_load(self):
+        release = threading.Event()
+        model = MagicMock()
+
+        def loader(name):
+            release.wait(5)
+            return model
+
+        pool = ModelPool(loader, large="small", idle_seconds=0)
+        self.assertIsNone(pool.get("small"))
+        self.assertEqual(pool.state("small"), "loading")
+        release.set()
+        self.assertIs(pool.get("small", wait=5), model)
+        self.assertEqual(pool.state("small"), "ready")
+
+    def test_loads_once(self):
+        loader = MagicMock(return_value=MagicMock())
+        pool = ModelPool(loader, large="small", idle_seconds=0)
+        pool.prefetch()
+        pool.get("small", wait=5)
+        pool.prefetch()
+        pool.get("small")
+        loader.assert_called_once_with("small")
+
+    def test_failed_load_is_not_retried(self):
+        loader = MagicMock(side_effect=RuntimeError("no such model"))
+        pool = ModelPool(loader, large="huge", idle_seconds=0)
+        with self.assertLogs('zerog.core.models', level='ERROR'):
+            self.assertIsNone(pool.get("huge", wait=5))
+        self.assertEqual(pool.state("huge"), "failed")
+        self.assertIsNone(pool.get("huge"))
+        loader.assert_called_once()
+
+    def test_idle_model_is_evicted(self):
+        pool = ModelPool(MagicMock(return_value=MagicMock()), large="small", idle_seconds=0.05)
+        self.addCleanup(pool.close)
+        self.assertIsNotNone(pool.get("small", wait=5))
+        deadline = time.time() + 5
+        while pool.state("small") == "ready" and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(pool.state("small"), "absent")
+        # A later escalation loads it again
+        self.assertIsNotNone(pool.get("small", wait=5))
+
+
+class TestRecorderRouting(unittest.TestCase):
+
+    @patch('zerog.core.recorder.WhisperModel')
+    @patch('zerog.core.recorder.state_machine')
+    def setUp(self, mock_sm, mock_whisper):
+        from zerog.core.recorder import AudioRecorder, Utterance
+        self.recorder = AudioRecorder(engine=EngineConfig(large_model="small", escalate_seconds=15.0,
+                                                          model_idle_seconds=0, warmup=False))
+        self.utterance = Utterance(self.recorder._acquire_buffer())
+        self.utterance.buffer.write(np.zeros((16000, 1), dtype=np.float32))  # One second
+
+    def test_short_utterance_stays_on_the_resident_model(self):
+        self.assertIsNone(self.recorder._route(self.utterance))
+
+    def test_escalated_utterance_uses_the_loaded_large_model(self):
+        large = MagicMock()
+        self.recorder.pool = ModelPool(lambda name: large, large="small", idle_seconds=0)
+        self.recorder.pool.get("small", wait=5)
+        self.utterance.escalate = True
+        self.assertIs(self.recorder._route(self.utterance), large)
+        self.assertEqual(self.utterance.trace.attrs["model"], "small")
+
+    def test_large_model_still_loading_falls_back(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        self.recorder.pool = ModelPool(lambda name: release.wait(5), large="small", idle_seconds=0)
+        self.utterance.escalate = True
+        start = time.perf_counter()
+        self.assertIsNone(self.recorder._route(self.utterance))
+        self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertEqual(self.recorder.pool.state("small"), "loading")
+
+
+class TestTwoPass(unittest.TestCase):
+
+    @patch('zerog.core.recorder.WhisperModel')
+    @patch('zerog.core.recorder.state_machine')
+    def setUp(self, mock_sm, mock_whisper):
+        from zerog.core.recorder import AudioRecorder, Utterance
+        self.recorder = AudioRecorder(engine=EngineConfig(two_pass=True, refine_beam_size=5, vad="off",
+                                                          warmup=False))
+        # Second passes run when the test says so
+        self.queued = []
+        self.recorder.worker.stop()
+        self.recorder.worker = MagicMock(pending=0, submit_idle=self.queued.append)
+        can_replace = patch('zerog.core.recorder.FastTyper.can_replace', return_value=True)
+        self.can_replace = can_replace.start()
+        self.addCleanup(can_replace.stop)
+        self.audio = np.random.default_rng(0).uniform(-0.5, 0.5, 16000).astype(np.float32)
+        self.utterance = Utterance(self.recorder._acquire_buffer())
+        self.utterance.buffer.write(self.audio.reshape(-1, 1))
+        self.recorder.last_utterance = self.utterance
+
+    def _new_utterance(self):
+        from zerog.core.recorder import Utterance
+        utterance = Utterance(self.recorder._acquire_buffer())
+        utterance.buffer.write(self.audio.reshape(-1, 1))
+        return utterance
+
+    def _run_second_pass(self):
+        job = self.queued.pop()
+        job.fn(*job.args)
+
+    def _model(self, *texts):
+        model = MagicMock()
+        model.transcribe.side_effect = [([MagicMock(text=t)], None) for t in texts]
+        return model
+
+    @patch('zerog.core.recorder.FastTyper.replace', return_value=True)
+    @patch('zerog.core.recorder.FastTyper.inject', return_value=True)
+    @patch('zerog.core.recorder.state_machine')
+    def test_draft_is_pasted_then_corrected_in_place(self, mock_sm, mock_inject, mock_replace):
+        self.recorder._model = self._model("I scream", "Ice cream")
+        self.recorder.transcribe(False, self.utterance)
+
+        # The draft is out before the second pass even starts
+        mock_inject.assert_called_once_with("I scream")
+        self.assertEqual(mock_sm.compare_and_set.call_args[0], (AppState.PROCESSING, AppState.SUCCESS))
+        self.assertFalse(self.utterance.buffer.in_use)
+
+        self.utterance.buffer.view(0)[:] = 0  # The arena is reused by the next recording
+        self._run_second_pass()
+        audio, = self.recorder.model.transcribe.call_args[0]
+        np.testing.assert_array_equal(audio, self.audio)
+        self.assertEqual(self.recorder.model.transcribe.call_args[1]["beam_size"], 5)
+        mock_replace.assert_called_once_with("I scream", "Ice cream")
+
+    @patch('zerog.core.recorder.FastTyper.replace')
+    @patch('zerog.core.recorder.FastTyper.inject', return_value=True)
+    @patch('zerog.core.recorder.state_machine')
+    def test_matching_second_pass_leaves_the_draft(self, mock_sm, mock_inject, mock_replace):
+        self.recorder._model = self._model("Hello world", " Hello  world")
+        self.recorder.transcribe(False, self.utterance)
+        self._run_second_pass()
+        mock_replace.assert_not_called()
+
+    @patch('zerog.core.recorder.FastTyper.replace')
+    @patch('zerog.core.recorder.FastTyper.inject', return_value=True)
+    @patch('zerog.core.recorder.state_machine')
+    def test_no_correction_once_the_user_moved_on(self, mock_sm, mock_inject, mock_replace):
+        self.recorder._model = self._model("I scream", "Ice cream")
+        self.recorder.transcribe(False, self.utterance)
+        self.recorder.last_utterance = MagicMock()  # A new dictation started
+        self._run_second_pass()
+        # Not even decoded: the cores belong to the new dictation
+        self.recorder.model.transcribe.assert_called_once()
+        mock_replace.assert_not_called()
+
+    @patch('zerog.core.recorder.FastTyper.replace')
+    @patch('zerog.core.recorder.FastTyper.inject', return_value=True)
+    @patch('zerog.core.recorder.state_machine')
+    def test_no_decode_once_the_draft_cannot_be_replaced(self, mock_sm, mock_inject, mock_replace):
+        self.recorder._model = self._model("I scream", "Ice cream")
+        self.recorder.transcribe(False, self.utterance)
+        self.can_replace.return_value = False  # Focus moved, or the draft got too old
+        self._run_second_pass()
+        self.recorder.model.transcribe.assert_called_once()
+        mock_replace.assert_not_called()
+
+    @patch('zerog.core.recorder.FastTyper.replace', return_value=True)
+    @patch('zerog.core.recorder.FastTyper.inject', return_value=True)
+    @patch('zerog.core.recorder.state_machine')
+    def test_large_model_does_the_second_pass(self, mock_sm, mock_inject, mock_replace):
+        large = self._model("Ice cream")
+        self.recorder.pool = ModelPool(lambda name: large, large="small", idle_seconds=0)
+        self.recorder.pool.get("small", wait=5)
+        self.recorder._model = self._model("I scream")
+        # Escalation would be the draft's job without two-pass; here the draft stays fast
+        self.utterance.escalate = True
+        self.recorder.transcribe(False, self.utterance)
+        mock_inject.assert_called_once_with("I scream")
+
+        self._run_second_pass()
+        large.transcribe.assert_called_once()
+        mock_replace.assert_called_once_with("I scream", "Ice cream")
+
+    @patch('zerog.core.recorder.FastTyper.replace')
+    @patch('zerog.core.recorder.FastTyper.inject', return_value=True)
+    @patch('zerog.core.recorder.state_machine')
+    def test_second_pass_that_would_finish_too_late_is_not_started(self, mock_sm, mock_inject, mock_replace):
+        self.recorder._model = self._model("I scream", "Ice cream", "I scream", "Ice cream")
+        self.recorder.transcribe(False, self.utterance)
+        self._run_second_pass()
+        # The last pass on this model and beam took 4x real time...
+        self.assertIn(("tiny", 5), self.recorder._refine_speed)
+        self.recorder._refine_speed[("tiny", 5)] = 4.0
+        self.can_replace.side_effect = lambda draft, within=0.0: within < 3.0
+
+        self.recorder.last_utterance = self.utterance = self._new_utterance()
+        self.recorder.transcribe(False, self.utterance)
+        decodes = self.recorder.model.transcribe.call_count
+        self._run_second_pass()
+        # ...so four seconds for one second of audio would miss the 3s cap: no decode at all
+        self.assertEqual(self.recorder.model.transcribe.call_count, decodes)
+        self.assertEqual(self.can_replace.call_args[1]["within"], 4.0)
+
+    @patch('zerog.core.recorder.FastTyper.replace', return_value=True)
+    @patch('zerog.core.recorder.FastTyper.inject', return_value=True)
+    @patch('zerog.core.recorder.state_machine')
+    def test_second_pass_does_not_wait_for_a_loading_model(self, mock_sm, mock_inject, mock_replace):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        self.recorder.pool = ModelPool(lambda name: release.wait(5), large="small", idle_seconds=0)
+        self.recorder._model = self._model("I scream", "Ice cream")
+        self.recorder.transcribe(False, self.utterance)
+
+        start = time.perf_counter()
+        self._run_second_pass()
+        self.assertLess(time.perf_counter() - start, 1.0)
+        # The resident model tried the wider beam instead
+        self.assertEqual(self.recorder.model.transcribe.call_args[1]["beam_size"], 5)
+        mock_replace.assert_called_once_with("I scream", "Ice cream")
+
+    @patch('zerog.core.recorder.FastTyper.inject', return_value=True)
+    @patch('zerog.core.recorder.polish.polish_with_deadline', return_value="Hello, world.")
+    @patch('zerog.core.recorder.state_machine')
+    def test_polished_text_is_not_second_guessed(self, mock_sm, mock_polish, mock_inject):
+        self.recorder._model = self._model("hello world")
+        self.recorder.transcribe(True, self.utterance)
+        self.assertEqual(self.queued, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
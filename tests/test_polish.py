@@ -0,0 +1,243 @@
+import json
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from zerog.core import polish
+from zerog.core.local_llm import LocalBackend
+
+
+class StubChatServer:
+    """Local stand-in for an OpenAI-compatible server (llama.cpp, Ollama)."""
+
+    def __init__(self, chunks=("Polished ", "text."), delay=0.0):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        self.requests = []
+        self.connections = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                stub.connections += 1
+                super().setup()
+
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                stub.requests.append((self.path, request))
+                if request["stream"]:
+                    lines = [{"choices": [{"delta": {"content": c}}]} for c in chunks]
+                    body = "".join(f"data: {json.dumps(line)}\n\n" for line in lines) + "data: [DONE]\n\n"
+                    content_type = "text/event-stream"
+                else:
+                    body = json.dumps({"choices": [{"message": {"role": "assistant", "content": "".join(chunks)}}]})
+                    content_type = "application/json"
+                data = body.encode()
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                if not delay:
+                    self.wfile.write(data)
+                    return
+                # Each event on its own, like a server that is still generating
+                for event in data.split(b"\n\n")[:-1]:
+                    try:
+                        self.wfile.write(event + b"\n\n")
+                        self.wfile.flush()
+                    except OSError:
+                        return  # The client hung up
+                    time.sleep(delay)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}/v1"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class FakeBackend(polish.PolishBackend):
+    name = "fake"
+    label = "Fake"
+    model = "fake-1"
+    system_instruction = "Be nice."
+
+    def __init__(self, reply="Polished.", configured=True):
+        self.reply = reply
+        self.configured = configured
+        self.calls = 0
+
+    def available(self):
+        return self.configured
+
+    def generate(self, text):
+        self.calls += 1
+        return self.reply
+
+
+class TestSentenceSplitting(unittest.TestCase):
+
+    def test_split_sentences_keeps_remainder(self):
+        pieces, rest = polish.split_sentences("Hello there. How are you? I am")
+        self.assertEqual(pieces, ["Hello there.", " How are you?"])
+        self.assertEqual(rest, " I am")
+
+    def test_split_sentences_waits_for_whitespace(self):
+        # "3." could be "3.5" once the next chunk arrives
+        self.assertEqual(polish.split_sentences("Version 3."), ([], "Version 3."))
+
+
+class TestPolishPipeline(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch.object(polish, 'CACHE_ENABLED', False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_any_backend_gets_the_same_metrics(self):
+        backend = FakeBackend()
+        self.assertEqual(polish.process_text("raw", backend), "Polished.")
+        self.assertEqual(polish.last_timing["backend"], "fake")
+        self.assertEqual(polish.last_timing["mode"], "full")
+        self.assertFalse(polish.last_timing["cached"])
+
+    def test_unconfigured_backend_is_skipped(self):
+        backend = FakeBackend(configured=False)
+        self.assertEqual(polish.process_text("raw", backend), "raw")
+        self.assertEqual(backend.calls, 0)
+
+    def test_non_streaming_backend_streams_as_one_piece(self):
+        injected = []
+        result = polish.polish_streaming("raw", lambda t: injected.append(t) or True, backend=FakeBackend())
+        self.assertEqual(result, "Polished.")
+        self.assertEqual(injected, ["Polished."])
+
+    def _broken_stream(self):
+        backend = FakeBackend()
+
+        def generate_stream(text):
+            yield "First sentence. "
+            yield "Second "
+            raise ConnectionError("reset")
+
+        backend.generate_stream = generate_stream
+        return backend
+
+    def test_mid_stream_failure_replaces_partial_polish_with_raw(self):
+        injected, replaced = [], []
+        result = polish.polish_streaming("raw dictation", lambda t: injected.append(t) or True,
+                                         deadline=5, backend=self._broken_stream(),
+                                         replace=lambda old, new: replaced.append((old, new)) or True)
+        self.assertEqual(injected, ["First sentence."])
+        self.assertEqual(replaced, [("First sentence.", "raw dictation")])
+        self.assertEqual(result, "raw dictation")
+
+    def test_mid_stream_failure_without_replace_is_reported(self):
+        with self.assertLogs('zerog.core.polish', level='ERROR'):
+            result = polish.polish_streaming("raw dictation", lambda t: True,
+                                             deadline=5, backend=self._broken_stream())
+        self.assertIsNone(result)
+
+    def test_selected_backend_is_used_by_default(self):
+        backend = FakeBackend()
+        with patch.object(polish, '_backend', backend):
+            self.assertEqual(polish.polish_with_deadline("raw", deadline=5), "Polished.")
+        self.assertEqual(backend.calls, 1)
+
+
+class TestBackendSelection(unittest.TestCase):
+
+    def setUp(self):
+        # Back to the real environment's settings afterwards
+        self.addCleanup(polish.load_settings)
+
+    def test_settings_parse_like_the_engine_config(self):
+        env = {"ZEROG_GEMINI_CACHE": "0", "ZEROG_GEMINI_STREAM": "yes", "ZEROG_GEMINI_LATE_REPLACE": "on",
+               "ZEROG_GEMINI_DEADLINE": "soon"}
+        with patch.dict(os.environ, env, clear=True):
+            # Read when the backend is created, not at import
+            polish.select_backend("local")
+        self.assertFalse(polish.CACHE_ENABLED)
+        self.assertIsNone(polish.get_cache())
+        self.assertTrue(polish.STREAM_POLISH)
+        self.assertTrue(polish.LATE_REPLACE)
+        self.assertEqual(polish.DEADLINE_SECONDS, 3.0)
+
+    def test_default_is_gemini(self):
+        with patch.dict(os.environ, {}, clear=True):
+            self.assertEqual(polish.select_backend().name, "gemini")
+
+    def test_local_from_env(self):
+        with patch.dict(os.environ, {'ZEROG_POLISH_BACKEND': 'local'}):
+            self.assertIsInstance(polish.select_backend(), LocalBackend)
+
+    def test_unknown_falls_back_to_gemini(self):
+        self.assertEqual(polish.select_backend("gpt-9").name, "gemini")
+
+
+class TestLocalBackend(unittest.TestCase):
+
+    def setUp(self):
+        self.stub = StubChatServer()
+        self.addCleanup(self.stub.close)
+        self.backend = LocalBackend(url=self.stub.url, model="qwen2.5-1.5b")
+        patcher = patch.object(polish, 'CACHE_ENABLED', False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_uses_shared_prompt_file(self):
+        self.assertEqual(polish.process_text("raw text", self.backend), "Polished text.")
+        path, request = self.stub.requests[0]
+        self.assertEqual(path, "/v1/chat/completions")
+        self.assertEqual(request["model"], "qwen2.5-1.5b")
+        self.assertEqual(request["temperature"], 0.0)
+        self.assertEqual(request["messages"][0], {"role": "system", "content": polish.load_system_instruction()})
+        self.assertIn("raw text", request["messages"][1]["content"])
+
+    def test_streamed_pieces_reach_the_injector(self):
+        injected = []
+        result = polish.polish_streaming("raw", lambda t: injected.append(t) or True, deadline=5, backend=self.backend)
+        self.assertEqual(result, "Polished text.")
+        self.assertEqual(injected, ["Polished text."])
+        self.assertEqual(polish.last_timing["backend"], "local")
+
+    def test_connection_is_kept_alive(self):
+        polish.process_text("one", self.backend)
+        polish.process_text("two", self.backend)
+        list(self.backend.generate_stream("three"))
+        polish.process_text("four", self.backend)
+        self.assertEqual(len(self.stub.requests), 4)
+        self.assertEqual(self.stub.connections, 1)
+
+    def test_abandoned_stream_does_not_wait_for_the_server(self):
+        slow = StubChatServer(chunks=["Word. "] * 10, delay=0.5)
+        self.addCleanup(slow.close)
+        backend = LocalBackend(url=slow.url)
+        stream = backend.generate_stream("raw")
+        self.assertEqual(next(stream), "Word. ")
+        start = time.perf_counter()
+        stream.close()  # The caller gave up, e.g. past the polish deadline
+        self.assertLess(time.perf_counter() - start, 1.0)
+        # The half-read connection is dropped; the next request opens a fresh one
+        self.assertIsNone(backend._local.conn)
+
+    def test_server_down_returns_raw_text(self):
+        backend = LocalBackend(url="http://127.0.0.1:9/v1")
+        self.assertEqual(polish.process_text("raw text", backend), "raw text")
+
+
+if __name__ == '__main__':
+    unittest.main()
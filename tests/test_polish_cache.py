@@ -0,0 +1,86 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from zerog.core.polish_cache import PolishCache, cache_key, normalize_text
+
+
+class TestCacheKey(unittest.TestCase):
+
+    def test_whitespace_is_normalized(self):
+        self.assertEqual(normalize_text("  hello \n world "), "hello world")
+        self.assertEqual(cache_key("m", "s", "hello  world"), cache_key("m", "s", " hello world\n"))
+
+    def test_model_and_instruction_are_part_of_the_key(self):
+        base = cache_key("m", "s", "text")
+        self.assertNotEqual(base, cache_key("other", "s", "text"))
+        self.assertNotEqual(base, cache_key("m", "other", "text"))
+
+    def test_fields_cannot_bleed_into_each_other(self):
+        self.assertNotEqual(cache_key("ab", "c", "x"), cache_key("a", "bc", "x"))
+
+
+class TestPolishCache(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+
+    def test_hit_and_miss_counters(self):
+        cache = PolishCache(self.dir)
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", "Polished.")
+        self.assertEqual(cache.get("a"), "Polished.")
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+    def test_entries_are_private(self):
+        os.chmod(self.dir, 0o755)  # An existing directory is tightened too
+        old_umask = os.umask(0o022)
+        try:
+            cache = PolishCache(self.dir)
+            cache.put("a", "Dictated text.")
+        finally:
+            os.umask(old_umask)
+        self.assertEqual(os.stat(self.dir).st_mode & 0o777, 0o700)
+        self.assertEqual(os.stat(cache._path("a")).st_mode & 0o777, 0o600)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = PolishCache(self.dir, max_bytes=20)
+        cache.put("a", "x" * 8)
+        cache.put("b", "y" * 8)
+        cache.get("a")  # "b" is now the oldest
+        cache.put("c", "z" * 8)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "x" * 8)
+        self.assertLessEqual(cache.size_bytes, 20)
+        self.assertFalse(os.path.exists(os.path.join(self.dir, "b.txt")))
+
+    def test_entries_and_order_survive_restart(self):
+        cache = PolishCache(self.dir, max_bytes=20)
+        cache.put("a", "x" * 8)
+        time.sleep(0.01)
+        cache.put("b", "y" * 8)
+        time.sleep(0.01)
+        cache.get("a")
+
+        reopened = PolishCache(self.dir, max_bytes=20)
+        self.assertEqual(len(reopened), 2)
+        reopened.put("c", "z" * 8)
+        self.assertIsNone(reopened.get("b"))
+        self.assertEqual(reopened.get("a"), "x" * 8)
+
+    def test_oversized_value_is_not_stored(self):
+        cache = PolishCache(self.dir, max_bytes=4)
+        cache.put("a", "too long")
+        self.assertEqual(len(cache), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -35,6 +35,44 @@ class TestStateMachine(unittest.TestCase):
         self.sm.broadcast_audio_level(0.85)
         observer.assert_called_once_with(0.85)
 
+    def test_compare_and_set(self):
+        observer = MagicMock()
+        self.sm.add_observer(observer)
+        self.sm.set_state(AppState.LOADING)
+
+        # User started recording before the model finished loading
+        self.sm.set_state(AppState.RECORDING)
+        self.assertFalse(self.sm.compare_and_set(AppState.LOADING, AppState.IDLE))
+        self.assertEqual(self.sm.current_state, AppState.RECORDING)
+
+        self.sm.set_state(AppState.LOADING)
+        self.assertTrue(self.sm.compare_and_set(AppState.LOADING, AppState.IDLE))
+        observer.assert_called_with(AppState.IDLE, {})
+
+    def test_success_returns_to_idle_on_its_own(self):
+        from unittest.mock import patch
+        with patch.dict('zerog.core.state.AUTO_RESET_SECONDS', {AppState.SUCCESS: 0.05}):
+            self.sm.set_state(AppState.SUCCESS)
+        self.assertEqual(self.sm.current_state, AppState.SUCCESS)
+        time.sleep(0.2)
+        self.assertEqual(self.sm.current_state, AppState.IDLE)
+
+    def test_error_returns_to_idle_on_its_own(self):
+        from unittest.mock import patch
+        with patch.dict('zerog.core.state.AUTO_RESET_SECONDS', {AppState.ERROR: 0.05}):
+            self.sm.set_state(AppState.PROCESSING)
+            self.sm.compare_and_set(AppState.PROCESSING, AppState.ERROR)
+        time.sleep(0.2)
+        self.assertEqual(self.sm.current_state, AppState.IDLE)
+
+    def test_stale_auto_reset_does_not_interrupt_new_recording(self):
+        from unittest.mock import patch
+        with patch.dict('zerog.core.state.AUTO_RESET_SECONDS', {AppState.SUCCESS: 0.05}):
+            self.sm.set_state(AppState.SUCCESS)
+            self.sm.set_state(AppState.RECORDING)
+        time.sleep(0.2)
+        self.assertEqual(self.sm.current_state, AppState.RECORDING)
+
     def test_thread_safety_stress(self):
         """
         Verify that multiple threads updating the state machine 
@@ -57,5 +95,115 @@ class TestStateMachine(unittest.TestCase):
         self.assertTrue(observer.called)
         self.assertIn(self.sm.current_state, [AppState.IDLE, AppState.RECORDING])
 
+class TestDispatchers(unittest.TestCase):
+    def setUp(self):
+        StateMachine._instance = None
+        self.sm = StateMachine()
+
+    def test_worker_observer_does_not_block_the_caller(self):
+        """Key-to-record: a slow observer (opening PortAudio) must not hold up the key thread."""
+        from zerog.core.state import WorkerDispatcher, transition_age
+        dispatcher = WorkerDispatcher()
+        self.addCleanup(dispatcher.close)
+        seen = []
+        done = threading.Event()
+
+        def slow_observer(state, data):
+            time.sleep(0.2)
+            seen.append((state, threading.current_thread(), transition_age()))
+            if state == AppState.PROCESSING:
+                done.set()
+
+        self.sm.add_observer(slow_observer, dispatcher=dispatcher)
+        start = time.perf_counter()
+        self.sm.set_state(AppState.RECORDING)
+        self.sm.set_state(AppState.PROCESSING)
+        self.assertLess(time.perf_counter() - start, 0.05)
+
+        self.assertTrue(done.wait(2))
+        self.assertEqual([state for state, _, _ in seen], [AppState.RECORDING, AppState.PROCESSING])
+        self.assertIsNot(seen[0][1], threading.current_thread())
+        # Latency is measured from the transition, including time queued behind the first one
+        self.assertGreaterEqual(seen[1][2], 0.35)
+
+    def test_racing_transitions_reach_queued_observers_in_order(self):
+        class SlowFirstPost:
+            """Queues calls; the first post stalls, like a preempted thread."""
+            def __init__(self):
+                self.calls = []
+                self.stalled = False
+
+            def post(self, call):
+                if not self.stalled:
+                    self.stalled = True
+                    time.sleep(0.1)
+                self.calls.append(call)
+
+        dispatcher = SlowFirstPost()
+        seen = []
+        self.sm.add_observer(lambda state, data: seen.append(state), dispatcher=dispatcher)
+
+        # The worker reports SUCCESS while the user presses the key again
+        worker = threading.Thread(target=self.sm.set_state, args=(AppState.SUCCESS,))
+        worker.start()
+        time.sleep(0.02)
+        self.sm.set_state(AppState.RECORDING)
+        worker.join()
+
+        for call in dispatcher.calls:
+            call()
+        self.assertEqual(self.sm.current_state, AppState.RECORDING)
+        self.assertEqual(seen, [AppState.SUCCESS, AppState.RECORDING])
+
+    def test_transition_age_is_none_outside_observers(self):
+        from zerog.core.state import transition_age
+        self.assertIsNone(transition_age())
+
+    def test_queued_observer_failure_during_recording_reports_error(self):
+        from zerog.core.state import WorkerDispatcher
+        from unittest.mock import patch
+        dispatcher = WorkerDispatcher()
+        self.addCleanup(dispatcher.close)
+        failed = threading.Event()
+
+        def broken(state, data):
+            failed.set()
+            raise RuntimeError("no microphone")
+
+        self.sm.add_observer(broken, dispatcher=dispatcher)
+        with patch('zerog.core.state.threading.Timer') as mock_timer:
+            self.sm.set_state(AppState.RECORDING)
+            self.assertTrue(failed.wait(2))
+            time.sleep(0.05)
+        mock_timer.assert_called_once()
+
+    def test_remove_observer(self):
+        observer = MagicMock()
+        self.sm.add_observer(observer)
+        self.sm.remove_observer(observer)
+        self.sm.set_state(AppState.RECORDING)
+        observer.assert_not_called()
+
+    def test_qt_observer_runs_on_gui_thread(self):
+        import os
+        import sys
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PyQt6.QtWidgets import QApplication
+        from zerog.core.state import QtDispatcher
+        app = QApplication.instance() or QApplication(sys.argv)
+
+        seen = []
+        self.sm.add_observer(lambda state, data: seen.append((state, threading.current_thread())),
+                             dispatcher=QtDispatcher())
+        worker = threading.Thread(target=self.sm.set_state, args=(AppState.RECORDING,))
+        worker.start()
+        worker.join()
+        self.assertEqual(seen, [])  # Queued, not run on the worker
+
+        deadline = time.time() + 2
+        while not seen and time.time() < deadline:
+            app.processEvents()
+        self.assertEqual(seen, [(AppState.RECORDING, threading.current_thread())])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
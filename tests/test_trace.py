@@ -0,0 +1,98 @@
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from zerog.core import trace as trace_module
+from zerog.core.trace import Trace
+from zerog.core.state import AppState
+
+
+class TestTrace(unittest.TestCase):
+
+    def test_repeated_spans_add_up(self):
+        t = Trace()
+        t.add_span("inject", 1.0, 1.25)
+        t.add_span("inject", 2.0, 2.5)
+        self.assertEqual(t.spans["inject"], [1.0, 2.5, 0.75, 2])
+
+    def test_offsets_are_relative_to_key_down(self):
+        t = Trace()
+        t.mark("key_down", at=10.0)
+        t.mark("key_up", at=11.5)
+        t.add_span("inference", 11.6, 11.8)
+        record = t.to_dict()
+        self.assertEqual(record["events"], {"key_down": 0.0, "key_up": 1500.0})
+        self.assertEqual(record["spans"]["inference"], {"start_ms": 1600.0, "ms": 200.0, "count": 1})
+
+    def test_summary_follows_pipeline_order(self):
+        t = Trace()
+        t.mark("key_down", at=0.0)
+        t.mark("stream_opened", at=0.008)
+        t.mark("key_up", at=2.0)
+        t.add_span("inject", 2.3, 2.31)
+        t.add_span("inference", 2.0, 2.2)
+        self.assertEqual(t.summary(), "mic 8 ms · infer 200 ms · paste 10 ms · total 0.31 s")
+
+    def test_finish_writes_one_json_line_once(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "trace.jsonl")
+            with patch.object(trace_module, 'TRACE_FILE', path):
+                t = Trace()
+                t.attrs["outcome"] = "pasted"
+                t.finish()
+                t.finish()
+            with open(path) as f:
+                lines = f.readlines()
+        self.assertEqual(len(lines), 1)
+        record = json.loads(lines[0])
+        self.assertEqual(record["trace"], t.id)
+        self.assertEqual(record["outcome"], "pasted")
+        self.assertIs(trace_module.last_trace, t)
+
+
+class TestRecorderTrace(unittest.TestCase):
+
+    @patch('zerog.core.recorder.WhisperModel')
+    def setUp(self, mock_whisper):
+        from zerog.core.recorder import AudioRecorder
+        with patch('zerog.core.recorder.state_machine'):
+            self.recorder = AudioRecorder(streaming=False, vad="off")
+        segment = MagicMock()
+        segment.text = "Traced words"
+        self.recorder.model = MagicMock()
+        self.recorder.model.transcribe.return_value = ([segment], None)
+        self.recorder.worker = MagicMock(pending=0)
+
+    @patch('zerog.core.recorder.FastTyper.when_restored', side_effect=lambda callback: callback())
+    @patch('zerog.core.recorder.FastTyper.inject', return_value=True)
+    @patch('zerog.core.recorder.sd.InputStream')
+    @patch('zerog.core.recorder.state_machine')
+    def test_utterance_is_traced_end_to_end(self, mock_sm, mock_stream, mock_inject, mock_restored):
+        self.recorder.start_recording()
+        self.recorder.buffer.write(np.full((16000, 1), 0.2, dtype=np.float32))
+        self.recorder.stop_recording(use_gemini=False)
+        utterance = self.recorder.last_utterance
+        utterance.job.submitted_at = utterance.job.started_at = time.perf_counter()
+
+        self.recorder.transcribe(False, utterance)
+
+        record = trace_module.last_trace.to_dict()
+        self.assertEqual(list(record["events"]),
+                         ["key_down", "stream_opened", "key_up", "audio_drained", "restored"])
+        for span in ("queued", "inference", "inject"):
+            self.assertIn(span, record["spans"])
+        self.assertEqual(record["outcome"], "pasted")
+        self.assertEqual(record["audio_seconds"], 1.0)
+        self.assertEqual(mock_sm.compare_and_set.call_args[0], (AppState.PROCESSING, AppState.SUCCESS))
+
+
+if __name__ == '__main__':
+    unittest.main()
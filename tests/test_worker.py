@@ -0,0 +1,86 @@
+import unittest
+import threading
+from unittest.mock import MagicMock
+from zerog.core.worker import TranscriptionJob, TranscriptionWorker
+
+class TestTranscriptionWorker(unittest.TestCase):
+
+    def _blocked_worker(self, policy):
+        """Worker whose first job blocks until `release` is set."""
+        worker = TranscriptionWorker(policy=policy)
+        release, started = threading.Event(), threading.Event()
+        worker.submit(TranscriptionJob(lambda: (started.set(), release.wait(2))))
+        worker.start()
+        started.wait(2)
+        return worker, release
+
+    def test_jobs_run_one_at_a_time_in_order(self):
+        order, running = [], []
+
+        def job(n):
+            running.append(n)
+            self.assertEqual(len(running), 1)  # Never two inferences at once
+            order.append(n)
+            running.remove(n)
+
+        worker = TranscriptionWorker()
+        jobs = [worker.submit(TranscriptionJob(job, (n,))) for n in range(3)]
+        worker.start()
+        worker.stop()
+        worker.join(2)
+
+        self.assertEqual(order, [0, 1, 2])
+        for j in jobs:
+            self.assertGreaterEqual(j.queue_wait, 0)
+            self.assertGreaterEqual(j.run_seconds, 0)
+
+    def test_latest_policy_cancels_waiting_jobs(self):
+        worker, release = self._blocked_worker("latest")
+        stale_fn, stale_cancel, fresh_fn = MagicMock(), MagicMock(), MagicMock()
+        stale = worker.submit(TranscriptionJob(stale_fn, on_cancel=stale_cancel))
+        worker.submit(TranscriptionJob(fresh_fn))
+        self.assertTrue(stale.cancelled)
+        self.assertEqual(worker.pending, 1)
+
+        release.set()
+        worker.stop()
+        worker.join(2)
+        stale_fn.assert_not_called()
+        stale_cancel.assert_called_once()
+        fresh_fn.assert_called_once()
+
+    def test_serialize_policy_bounds_the_backlog(self):
+        worker = TranscriptionWorker(policy="serialize", max_pending=2)
+        jobs = [worker.submit(TranscriptionJob(MagicMock())) for _ in range(3)]
+        self.assertEqual([j.cancelled for j in jobs], [True, False, False])
+        self.assertEqual(worker.pending, 2)
+
+    def test_idle_job_waits_for_regular_jobs(self):
+        order = []
+        worker, release = self._blocked_worker("serialize")
+        superseded = worker.submit_idle(TranscriptionJob(lambda: order.append("old refine")))
+        worker.submit_idle(TranscriptionJob(lambda: order.append("refine")))
+        worker.submit(TranscriptionJob(lambda: order.append("dictation")))
+        self.assertTrue(superseded.cancelled)
+        self.assertEqual(worker.pending, 1)  # Idle jobs never hold up _finish()
+
+        done = threading.Event()
+        worker.submit_idle(TranscriptionJob(lambda: (order.append("newest refine"), done.set())))
+        release.set()
+        self.assertTrue(done.wait(2))
+        worker.stop()
+        worker.join(2)
+        self.assertEqual(order, ["dictation", "newest refine"])
+
+    def test_failing_job_does_not_kill_worker(self):
+        after = MagicMock()
+        worker = TranscriptionWorker()
+        worker.submit(TranscriptionJob(MagicMock(side_effect=RuntimeError("boom"))))
+        worker.submit(TranscriptionJob(after))
+        worker.start()
+        worker.stop()
+        worker.join(2)
+        after.assert_called_once()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import numpy as np
+
+
+class AudioBuffer:
+    """
+    Preallocated float32 arena holding one recording, grown by chaining
+    further arenas of the same size if the recording outlasts it.
+
+    Single producer (the PortAudio callback) / single consumer (the transcriber):
+    the producer copies each block in place and only then publishes the new length,
+    so neither side allocates per block or takes a lock. Readers get zero-copy,
+    contiguous views of everything published so far, as long as the range stays
+    within one arena; a range spanning arenas is copied.
+    """
+
+    def __init__(self, capacity: int):
+        # np.zeros maps pages lazily, so an unused tail costs no resident memory
+        self._data = np.zeros(capacity, dtype=np.float32)
+        self._extents = [self._data]  # _data, then any arenas chained on overflow
+        self._length = 0
+        self.in_use = False  # Owned by a recording or a pending transcription
+
+    @property
+    def capacity(self) -> int:
+        """Samples per arena; recordings longer than this chain another one."""
+        return self._data.shape[0]
+
+    def __len__(self):
+        return self._length
+
+    def reset(self):
+        """Rewinds the arena for a new recording. Keeps the first allocation, frees chained ones."""
+        self._length = 0
+        del self._extents[1:]
+
+    def write(self, block):
+        """
+        Appends a PortAudio block of shape (frames, 1) or (frames,).
+        Safe to call from the real-time audio thread: chaining an arena is one
+        lazily mapped np.zeros, once per `capacity` samples.
+        """
+        samples = block.reshape(-1)
+        size = self._data.shape[0]
+        start = self._length
+        written = 0
+        while written < samples.shape[0]:
+            index, offset = divmod(start + written, size)
+            if index == len(self._extents):
+                self._extents.append(np.zeros(size, dtype=np.float32))
+            n = min(samples.shape[0] - written, size - offset)
+            self._extents[index][offset:offset + n] = samples[written:written + n]
+            written += n
+        # Publish only after the samples are in place
+        self._length = start + written
+
+    def view(self, start: int = 0, end: int = None):
+        """View of the published samples in [start, end); zero-copy unless it spans arenas."""
+        stop = self._length if end is None else min(end, self._length)
+        if stop <= start:
+            return self._data[:0]
+        size = self._data.shape[0]
+        first, last = start // size, (stop - 1) // size
+        if first == last:
+            return self._extents[first][start - first * size:stop - first * size]
+        pieces = [self._extents[first][start - first * size:]]
+        pieces.extend(self._extents[first + 1:last])
+        pieces.append(self._extents[last][:stop - last * size])
+        return np.concatenate(pieces)
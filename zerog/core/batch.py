@@ -0,0 +1,348 @@
+"""
+Offline batch transcription: `zerog transcribe PATH... [-o OUT] [-f txt,json,srt]`.
+
+No GUI, X display, microphone or keyboard. The Whisper model is loaded once
+with the same ZEROG_* engine settings as the app, then files go through one
+of two modes:
+
+pool:    A thread pool sized to the usable cores. Each thread transcribes one
+         file at a time on the shared model; CTranslate2 runs them in
+         parallel (num_workers), each with its share of the cores.
+batched: One file at a time through faster-whisper's BatchedInferencePipeline,
+         which decodes a file's speech chunks together. Best for long files.
+
+With --daemon, files are sent to a running `zerog daemon` instead, and this
+process never loads a model at all.
+
+Outputs are written atomically next to each other under --output-dir, so an
+interrupted run resumes where it stopped: files whose outputs already exist
+(and are newer than the audio) are skipped unless --force is given.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import collections
+import concurrent.futures
+from faster_whisper import WhisperModel, decode_audio
+from .engine import EngineConfig
+from . import daemon
+
+SAMPLE_RATE = 16000
+
+AUDIO_EXTENSIONS = {".wav", ".flac", ".mp3", ".m4a", ".aac", ".ogg", ".opus", ".webm", ".mp4", ".mkv"}
+OUTPUT_FORMATS = ("txt", "json", "srt")
+# Segments per batch in batched mode; higher uses more RAM for little extra speed on CPU
+DEFAULT_BATCH_SIZE = 8
+# CPU threads each pool worker gets by default; fewer, wider workers suit Whisper better
+THREADS_PER_WORKER = 2
+
+
+def usable_cores(engine):
+    """Cores this process may run on: the pinned ones if any, else the affinity mask."""
+    if engine.cpu_cores:
+        return len(engine.cpu_cores)
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def plan_workers(engine, workers=None):
+    """
+    Splits the usable cores between pool workers: `workers` (default: one per
+    THREADS_PER_WORKER cores) each with cores // workers inference threads.
+    Explicit ZEROG_CPU_THREADS / ZEROG_NUM_WORKERS settings are kept.
+    """
+    cores = usable_cores(engine)
+    if workers is None:
+        workers = engine.num_workers if engine.num_workers > 1 else max(1, cores // THREADS_PER_WORKER)
+    engine.num_workers = workers
+    if not engine.cpu_threads:
+        engine.cpu_threads = max(1, cores // workers)
+    return workers
+
+
+def find_audio(paths):
+    """(file, root) for every audio file under `paths`; root is what outputs are made relative to."""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, dirnames, filenames in os.walk(path):
+                dirnames.sort()
+                for name in sorted(filenames):
+                    if os.path.splitext(name)[1].lower() in AUDIO_EXTENSIONS:
+                        found.append((os.path.join(dirpath, name), path))
+        elif os.path.isfile(path):
+            found.append((path, os.path.dirname(path)))
+        else:
+            print(f"⚠️  No such file or directory: {path}")
+    return found
+
+
+def output_base(audio_path, root, output_dir, keep_extension=False):
+    """
+    Output path without extension; mirrors the input tree under output_dir
+    (default: beside the audio). keep_extension gives a.wav and a.mp3 their
+    own outputs (a.wav.txt, a.mp3.txt).
+    """
+    stem = audio_path if keep_extension else os.path.splitext(audio_path)[0]
+    if output_dir is None:
+        return stem
+    return os.path.join(output_dir, os.path.relpath(stem, root))
+
+
+def plan_outputs(found, output_dir):
+    """
+    Output base for every (file, root) from find_audio(). Files that would
+    share one (a.wav next to a.mp3) keep their extension in it. Returns
+    (jobs, clashes): (file, base) pairs, and files that still clash (e.g. two
+    inputs mirrored into the same output_dir), which are left out.
+    """
+    def group(pairs):
+        by_base = collections.defaultdict(list)
+        for audio_path, base in pairs:
+            by_base[base].append(audio_path)
+        return by_base
+
+    by_base = group((path, output_base(path, root, output_dir)) for path, root in found)
+    roots = dict(found)
+    planned = []
+    for base, paths in by_base.items():
+        if len(paths) == 1:
+            planned.append((paths[0], base))
+        else:
+            planned.extend((path, output_base(path, roots[path], output_dir, keep_extension=True)) for path in paths)
+
+    jobs, clashes = [], []
+    for base, paths in group(planned).items():
+        if len(paths) == 1:
+            jobs.append((paths[0], base))
+        else:
+            clashes.extend(paths)
+    order = {path: i for i, (path, _) in enumerate(found)}
+    jobs.sort(key=lambda job: order[job[0]])
+    return jobs, clashes
+
+
+def is_done(audio_path, base, formats):
+    """True if every requested output exists and was written after the audio last changed."""
+    audio_mtime = os.path.getmtime(audio_path)
+    for fmt in formats:
+        path = f"{base}.{fmt}"
+        if not os.path.exists(path) or os.path.getmtime(path) < audio_mtime:
+            return False
+    return True
+
+
+def format_timestamp(seconds):
+    """SRT time: HH:MM:SS,mmm."""
+    ms = int(round(seconds * 1000))
+    hours, ms = divmod(ms, 3_600_000)
+    minutes, ms = divmod(ms, 60_000)
+    secs, ms = divmod(ms, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{ms:03d}"
+
+
+def render(result, fmt):
+    segments = result["segments"]
+    if fmt == "txt":
+        return result["text"] + "\n"
+    if fmt == "json":
+        return json.dumps(result, indent=2, ensure_ascii=False) + "\n"
+    if fmt == "srt":
+        blocks = [f"{i}\n{format_timestamp(s['start'])} --> {format_timestamp(s['end'])}\n{s['text']}\n"
+                  for i, s in enumerate(segments, 1)]
+        return "\n".join(blocks)
+    raise ValueError(f"Unknown output format '{fmt}'")
+
+
+def write_outputs(result, base, formats):
+    """Writes each format to a temp file and renames it into place, so a crash never leaves half a file."""
+    os.makedirs(os.path.dirname(base) or ".", exist_ok=True)
+    for fmt in formats:
+        path = f"{base}.{fmt}"
+        # Unique per writer, so two processes on the same tree never share one
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.part"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(render(result, fmt))
+        os.replace(tmp, path)
+
+
+class BatchTranscriber:
+    """Loads the model once and transcribes files with it, in either mode."""
+
+    def __init__(self, engine, mode="pool", batch_size=DEFAULT_BATCH_SIZE, language=None, model=None):
+        self.engine = engine
+        self.model = model  # Given (e.g. a daemon.RemoteModel) or loaded by load()
+        self.mode = mode
+        self.batch_size = batch_size
+        self.language = language
+        self._vad = str(engine.vad).lower() not in ("", "off", "none", "false")
+        self._pipeline = None
+
+    def load(self):
+        start = time.perf_counter()
+        if self.model is None:
+            self.engine.apply_affinity()
+            self.model = WhisperModel(self.engine.model, **self.engine.model_kwargs())
+        if self.mode == "batched":
+            try:
+                from faster_whisper import BatchedInferencePipeline
+            except ImportError:
+                raise RuntimeError("Batched mode needs faster-whisper 1.1 or newer (pip install -U faster-whisper)")
+            self._pipeline = BatchedInferencePipeline(model=self.model)
+        return time.perf_counter() - start
+
+    def transcribe(self, path):
+        """Returns the transcript of one file as a dict (text, segments, timings)."""
+        start = time.perf_counter()
+        audio = decode_audio(path, sampling_rate=SAMPLE_RATE)
+        # faster-whisper's own VAD keeps segment timestamps in the original timeline
+        if self._pipeline is not None:
+            segments, info = self._pipeline.transcribe(
+                audio, batch_size=self.batch_size, beam_size=self.engine.beam_size,
+                language=self.language, vad_filter=True)
+        else:
+            segments, info = self.model.transcribe(
+                audio, beam_size=self.engine.beam_size, language=self.language, vad_filter=self._vad)
+        # Segments are decoded lazily; this loop is the inference
+        segments = [{"start": round(s.start, 3), "end": round(s.end, 3), "text": s.text.strip()}
+                    for s in segments]
+        return {
+            "file": path,
+            "text": " ".join(s["text"] for s in segments if s["text"]).strip(),
+            "language": getattr(info, "language", None),
+            "duration": round(len(audio) / SAMPLE_RATE, 3),
+            "model": self.engine.model,
+            "seconds": round(time.perf_counter() - start, 3),
+            "segments": segments,
+        }
+
+
+def run(paths, output_dir=None, formats=("txt",), mode="pool", workers=None, batch_size=DEFAULT_BATCH_SIZE,
+        language=None, force=False, engine=None, use_daemon=False):
+    """Transcribes every audio file under `paths`. Returns (done, skipped, failed) counts."""
+    engine = engine or EngineConfig.from_env()
+    if use_daemon and mode != "pool":
+        raise ValueError("--daemon only works in pool mode")
+    if not use_daemon:
+        workers = plan_workers(engine, workers) if mode == "pool" else 1
+        engine.validate()
+
+    jobs = []
+    skipped = 0
+    planned, clashes = plan_outputs(find_audio(paths), output_dir)
+    for audio_path in clashes:
+        print(f"⚠️  Skipping {audio_path}: another input writes to the same output (use separate -o dirs).")
+    for audio_path, base in planned:
+        if not force and is_done(audio_path, base, formats):
+            skipped += 1
+        else:
+            jobs.append((audio_path, base))
+    if skipped:
+        print(f"⏭️  {skipped} file(s) already transcribed; resuming with the rest (--force redoes them).")
+    if not jobs:
+        print("✅ Nothing to do.")
+        return 0, skipped, len(clashes)
+
+    if use_daemon:
+        remote = daemon.connect("require")
+        # As many files in flight as the daemon can decode at once
+        workers = workers or max(1, remote.status().get("num_workers", 1))
+        transcriber = BatchTranscriber(engine, language=language, model=remote)
+        print(f"🔌 Sending {len(jobs)} file(s) to the daemon ({remote.engine}) with {workers} workers...")
+    else:
+        transcriber = BatchTranscriber(engine, mode=mode, batch_size=batch_size, language=language)
+        print(f"🛠️  Loading Whisper {engine.describe()} for {len(jobs)} file(s), {mode} mode"
+              f"{f' with {workers} workers' if mode == 'pool' else ''}...")
+    print(f"✅ Model ready ({transcriber.load():.1f}s).")
+
+    counts = {"done": 0, "failed": len(clashes), "audio": 0.0}
+    lock = threading.Lock()
+    start = time.perf_counter()
+
+    def one(audio_path, base):
+        try:
+            result = transcriber.transcribe(audio_path)
+            write_outputs(result, base, formats)
+        except Exception as e:
+            with lock:
+                counts["failed"] += 1
+            print(f"❌ {audio_path}: {e}")
+            return
+        with lock:
+            counts["done"] += 1
+            counts["audio"] += result["duration"]
+            n = counts["done"] + counts["failed"]
+        rtf = result["seconds"] / result["duration"] if result["duration"] else 0.0
+        print(f"📝 [{n}/{len(jobs)}] {audio_path}: {result['duration']:.1f}s of audio in "
+              f"{result['seconds']:.1f}s (RTF {rtf:.2f})")
+
+    pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="transcribe")
+    try:
+        for future in [pool.submit(one, audio_path, base) for audio_path, base in jobs]:
+            future.result()
+    except KeyboardInterrupt:
+        # Finished files are on disk; the next run picks up the rest
+        print("\n⏹️  Interrupted; finishing the files in progress...")
+        pool.shutdown(wait=True, cancel_futures=True)
+        raise
+    pool.shutdown(wait=True)
+
+    wall = time.perf_counter() - start
+    speed = f", {counts['audio'] / wall:.1f}x real time" if wall > 0 and counts["audio"] else ""
+    print(f"✅ Transcribed {counts['done']} file(s), {counts['audio'] / 60:.1f} min of audio "
+          f"in {wall:.1f}s{speed}. {counts['failed']} failed.")
+    return counts["done"], skipped, counts["failed"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="zerog transcribe",
+        description="Transcribe audio files or directories offline with the ZeroG engine settings.")
+    parser.add_argument("paths", nargs="+", help="Audio files and/or directories (searched recursively)")
+    parser.add_argument("-o", "--output-dir", help="Where to write outputs (default: next to each file)")
+    parser.add_argument("-f", "--format", default="txt",
+                        help=f"Comma-separated output formats: {', '.join(OUTPUT_FORMATS)} (default: txt)")
+    parser.add_argument("--mode", choices=("pool", "batched"), default="pool",
+                        help="pool: files in parallel (default); batched: one file at a time, chunks batched")
+    parser.add_argument("-j", "--workers", type=int, help="Parallel files in pool mode (default: cores / 2)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Chunks per batch in batched mode")
+    parser.add_argument("--model", help="Override ZEROG_MODEL, e.g. base or small")
+    parser.add_argument("--compute-type", help="Override ZEROG_COMPUTE_TYPE, e.g. int8")
+    parser.add_argument("--language", help="Skip language detection, e.g. en")
+    parser.add_argument("--force", action="store_true", help="Redo files that already have outputs")
+    parser.add_argument("--daemon", action="store_true", help="Use a running `zerog daemon` instead of loading a model")
+    args = parser.parse_args(argv)
+
+    formats = [f.strip().lower() for f in args.format.split(",") if f.strip()]
+    unknown = [f for f in formats if f not in OUTPUT_FORMATS]
+    if unknown or not formats:
+        parser.error(f"Unknown format(s): {', '.join(unknown) or '(none)'}; choose from {', '.join(OUTPUT_FORMATS)}")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.daemon and args.mode == "batched":
+        parser.error("--daemon only works in pool mode")
+
+    engine = EngineConfig.from_env()
+    if args.model:
+        engine.model = args.model
+    if args.compute_type:
+        engine.compute_type = args.compute_type
+
+    try:
+        _, _, failed = run(args.paths, args.output_dir, formats, mode=args.mode, workers=args.workers,
+                           batch_size=args.batch_size, language=args.language, force=args.force, engine=engine,
+                           use_daemon=args.daemon)
+    except KeyboardInterrupt:
+        return 130
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return 1
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
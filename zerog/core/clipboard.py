@@ -1,82 +1,165 @@
-import Cocoa
+# zerog/core/clipboard.py
+"""
+Linux clipboard backends used to snapshot and restore the user's clipboard
+around a paste.
+
+QtClipboard: Captures every MIME type (text, HTML, images, file lists...) and
+             restores them all. Qt owns the X selection in-process for the life
+             of the app, so no xclip process is forked per operation.
+TextClipboard: pyperclip/xclip fallback, text only. Used when there is no Qt
+             application (tests, headless tools).
+MemoryClipboard: Test double; keeps the clipboard in memory (benchmarks, CI).
+"""
+import threading
 import logging
-import time
+import pyperclip
 
 logger = logging.getLogger(__name__)
 
-class ClipboardManager:
+# Max time a worker thread waits for the GUI thread to service a clipboard call
+GUI_CALL_TIMEOUT_SECONDS = 2.0
+
+# Formats Qt synthesizes itself from the real ones; setting them back is lossy
+_QT_INTERNAL_PREFIX = "application/x-qt-"
+
+
+class TextClipboard:
+    """Text-only fallback via pyperclip. Snapshots are plain strings."""
+
+    def snapshot(self):
+        return pyperclip.paste()
+
+    def restore(self, snapshot_data):
+        if snapshot_data:
+            pyperclip.copy(snapshot_data)
+
+    def set_text(self, text):
+        pyperclip.copy(text)
+
+
+class MemoryClipboard:
+    """Test double: a clipboard that lives in memory. Safe without X."""
+
+    def __init__(self, text=""):
+        self.text = text
+        self.copies = []  # Every text set_text() was given, in order
+
+    def snapshot(self):
+        return self.text
+
+    def restore(self, snapshot_data):
+        if snapshot_data:
+            self.text = snapshot_data
+
+    def set_text(self, text):
+        self.copies.append(text)
+        self.text = text
+
+
+class QtClipboard:
     """
-    Manages the system clipboard (NSPasteboard) to allow saving and restoring state.
-    This ensures that injecting text via copy-paste doesn't destroy the user's existing clipboard content.
+    Multi-MIME clipboard on top of QClipboard. Snapshots are lists of
+    (mime_type, bytes). QClipboard may only be used on the GUI thread, so
+    calls from other threads (e.g. the transcription worker) are queued onto it.
     """
-    
-    @staticmethod
-    def snapshot():
-        """
-        Captures the current state of the general pasteboard.
-        
-        Returns:
-            list: A list of dicts, where each dict represents an item and contains its data for all available types.
-                  Returns None if the clipboard is empty or cannot be read.
-        """
-        try:
-            pb = Cocoa.NSPasteboard.generalPasteboard()
-            items = pb.pasteboardItems()
-            
-            if not items:
-                logger.debug("Clipboard snapshot: Empty clipboard.")
-                return []
-            
-            snapshot_data = []
-            
-            for item in items:
-                item_data = {}
-                types = item.types()
-                
-                for type_name in types:
-                    # We capture the data for every type available for this item
-                    data = item.dataForType_(type_name)
-                    if data:
-                        item_data[type_name] = data
-                
-                if item_data:
-                    snapshot_data.append(item_data)
-            
-            logger.debug(f"Clipboard snapshot: Captured {len(snapshot_data)} items.")
-            return snapshot_data
-            
-        except Exception as e:
-            logger.error(f"Clipboard snapshot failed: {e}", exc_info=True)
-            return None
-
-    @staticmethod
-    def restore(snapshot_data):
-        """
-        Restores the clipboard to the state captured in the snapshot.
-        
-        Args:
-            snapshot_data: The data structure returned by snapshot().
-        """
+
+    def __init__(self):
+        # Qt is imported lazily so headless users of this module never load it
+        from PyQt6.QtCore import QObject, QThread, QMimeData, QByteArray, Qt, pyqtSignal
+        from PyQt6.QtGui import QGuiApplication
+
+        app = QGuiApplication.instance()
+        if app is None:
+            raise RuntimeError("QtClipboard needs a running QApplication")
+
+        class _GuiBridge(QObject):
+            invoke = pyqtSignal(object)
+
+        self._QThread = QThread
+        self._QMimeData = QMimeData
+        self._QByteArray = QByteArray
+        self._clipboard = app.clipboard()
+        # Created on the GUI thread, so its queued slot always runs there
+        self._bridge = _GuiBridge()
+        self._bridge.invoke.connect(lambda call: call(), Qt.ConnectionType.QueuedConnection)
+
+    def _call(self, fn):
+        """Runs fn on the GUI thread and returns its result."""
+        if self._QThread.currentThread() == self._bridge.thread():
+            return fn()
+
+        done = threading.Event()
+        result = {}
+
+        def call():
+            try:
+                result["value"] = fn()
+            except Exception as e:
+                result["error"] = e
+            finally:
+                done.set()
+
+        self._bridge.invoke.emit(call)
+        if not done.wait(GUI_CALL_TIMEOUT_SECONDS):
+            raise TimeoutError("GUI thread did not service the clipboard in time")
+        if "error" in result:
+            raise result["error"]
+        return result.get("value")
+
+    def snapshot(self):
+        return self._call(self._snapshot)
+
+    def _snapshot(self):
+        mime = self._clipboard.mimeData()
+        if mime is None:
+            return []
+        # Copy the bytes now; Qt may replace mimeData() at any time
+        return [(fmt, bytes(mime.data(fmt))) for fmt in mime.formats()
+                if not fmt.startswith(_QT_INTERNAL_PREFIX)]
+
+    def restore(self, snapshot_data):
         if snapshot_data is None:
             return
+        self._call(lambda: self._restore(snapshot_data))
+
+    def _restore(self, snapshot_data):
+        if not snapshot_data:
+            # The clipboard was empty before we pasted
+            self._clipboard.clear()
+            return
+        mime = self._QMimeData()
+        for fmt, data in snapshot_data:
+            mime.setData(fmt, self._QByteArray(data))
+        self._clipboard.setMimeData(mime)
+
+    def set_text(self, text):
+        self._call(lambda: self._clipboard.setText(text))
+
+
+_text_clipboard = TextClipboard()
+_clipboard = None
+
+
+def install_qt_clipboard():
+    """
+    Switches clipboard handling to the lossless Qt backend.
+    Call once on the GUI thread after the QApplication exists.
+    """
+    global _clipboard
+    try:
+        _clipboard = QtClipboard()
+        logger.info("Clipboard backend: Qt (multi-MIME, in-process).")
+    except Exception as e:
+        logger.warning(f"Qt clipboard unavailable ({e}); using text-only pyperclip.")
+        _clipboard = None
+    return _clipboard
+
+
+def get_clipboard():
+    return _clipboard or _text_clipboard
+
 
-        try:
-            logger.debug(f"Clipboard restore: Restoring {len(snapshot_data)} items...")
-            pb = Cocoa.NSPasteboard.generalPasteboard()
-            pb.clearContents()
-            
-            for item_data in snapshot_data:
-                # Create a new pasteboard item
-                item = Cocoa.NSPasteboardItem.alloc().init()
-                
-                # Add all types and data to this item
-                for type_name, data in item_data.items():
-                    item.setData_forType_(data, type_name)
-                    
-                # Write the item to the pasteboard
-                pb.writeObjects_([item])
-            
-            logger.debug("Clipboard restore: Complete.")
-                
-        except Exception as e:
-            logger.error(f"Clipboard restore failed: {e}", exc_info=True)
+def set_clipboard(clipboard):
+    """Overrides the clipboard backend (tests, benchmarks); None goes back to the default."""
+    global _clipboard
+    _clipboard = clipboard
@@ -0,0 +1,460 @@
+"""
+Transcription daemon: one process owns the Whisper model and serves every
+ZeroG client on the machine over a Unix domain socket, so the model's memory
+and cold start are paid once instead of once per app.
+
+    zerog daemon                 # Serve (engine settings from ZEROG_* as usual)
+    zerog daemon --status        # Ask a running daemon what it is serving
+
+Clients use RemoteModel, a stand-in for faster_whisper.WhisperModel: the HUD
+app picks it up with ZEROG_DAEMON=auto|require, `zerog transcribe --daemon`
+sends files through it, and scripts can call it directly.
+
+Wire format: every frame is a 5-byte header, one ASCII kind byte plus a
+big-endian uint32 payload length, followed by the payload.
+
+    Client -> daemon                       Daemon -> client
+    B  begin  JSON transcribe options      R  result  JSON text, segments, language
+    A  audio  PCM, float32 LE mono 16 kHz  X  error   JSON {"error": ...}
+    E  end    (empty) -> transcribe now    O  status  JSON model, pid, uptime...
+    P  ping   (empty)
+
+An utterance is B, any number of A frames, then E; the daemon answers with R
+or X. Connections are persistent and carry any number of utterances.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import stat
+import struct
+import argparse
+import threading
+import socketserver
+import collections
+import logging
+import numpy as np
+from .engine import EngineConfig
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+
+def fallback_dir():
+    """Socket directory without XDG_RUNTIME_DIR. /tmp is shared, so the daemon keeps it 0700 (see private_dir)."""
+    return f"/tmp/zerog-{os.getuid()}"
+
+
+def default_socket_path():
+    runtime_dir = os.getenv("XDG_RUNTIME_DIR")
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, "zerog.sock")
+    return os.path.join(fallback_dir(), "zerog.sock")
+
+
+# Where the daemon listens and clients connect
+SOCKET_PATH = os.getenv("ZEROG_DAEMON_SOCKET") or default_socket_path()
+
+HEADER = struct.Struct(">cI")
+BEGIN, AUDIO, END, PING = b"B", b"A", b"E", b"P"
+RESULT, ERROR, STATUS = b"R", b"X", b"O"
+
+# Audio is sent in frames of at most this many bytes (4 s of float32)
+AUDIO_FRAME_BYTES = 256 * 1024
+# Refuse frames and utterances past these sizes instead of buffering without bound
+MAX_FRAME_BYTES = 16 * 1024 * 1024
+MAX_UTTERANCE_SECONDS = 30 * 60
+# Options a client may pass through to WhisperModel.transcribe()
+TRANSCRIBE_OPTIONS = ("beam_size", "initial_prompt", "language", "vad_filter", "task")
+# How long a client waits for a result; long files on a busy daemon can take a while
+CLIENT_TIMEOUT_SECONDS = 600
+
+DAEMON_MODES = ("off", "auto", "require")
+
+Segment = collections.namedtuple("Segment", "start end text")
+TranscriptionInfo = collections.namedtuple("TranscriptionInfo", "language duration")
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def send_frame(sock, kind, payload=b""):
+    sock.sendall(HEADER.pack(kind, len(payload)))
+    if payload:
+        sock.sendall(payload)
+
+
+def send_json(sock, kind, obj):
+    send_frame(sock, kind, json.dumps(obj).encode("utf-8"))
+
+
+def _recv_exact(sock, size):
+    buf = bytearray(size)
+    view = memoryview(buf)
+    got = 0
+    while got < size:
+        n = sock.recv_into(view[got:], size - got)
+        if not n:
+            raise ConnectionError("connection closed mid-frame")
+        got += n
+    return buf
+
+
+def recv_frame(sock):
+    """Returns (kind, payload), or None if the peer closed the connection cleanly."""
+    first = sock.recv(1)
+    if not first:
+        return None
+    kind, length = HEADER.unpack(bytes(first) + bytes(_recv_exact(sock, HEADER.size - 1)))
+    if length > MAX_FRAME_BYTES:
+        raise ProtocolError(f"frame of {length} bytes exceeds the {MAX_FRAME_BYTES} byte limit")
+    return kind, (_recv_exact(sock, length) if length else b"")
+
+
+# --- Server ---
+
+class TranscriptionDaemon:
+    """Serves `model` on `socket_path`; one thread per client connection."""
+
+    def __init__(self, model, socket_path=None, engine=None):
+        self.model = model
+        self.socket_path = socket_path or SOCKET_PATH
+        self.engine = engine
+        self.started = time.time()
+        self.requests = 0
+        self.clients = 0
+        self._lock = threading.Lock()
+        self._server = None
+
+    def status(self):
+        with self._lock:
+            status = {"pid": os.getpid(), "uptime": round(time.time() - self.started, 1),
+                      "requests": self.requests, "clients": self.clients}
+        if self.engine is not None:
+            status.update(model=self.engine.model, compute_type=self.engine.compute_type,
+                          num_workers=self.engine.num_workers, engine=self.engine.describe())
+        return status
+
+    def _claim_socket(self):
+        """
+        Removes a socket of ours left behind by a dead daemon. Refuses to
+        steal a live one, and never deletes anything that isn't a socket we own.
+        """
+        try:
+            info = os.lstat(self.socket_path)
+        except FileNotFoundError:
+            return
+        if not stat.S_ISSOCK(info.st_mode):
+            raise RuntimeError(f"{self.socket_path} exists and is not a socket; not replacing it")
+        if info.st_uid != os.getuid():
+            raise RuntimeError(f"{self.socket_path} belongs to another user; not replacing it")
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.socket_path)
+        except OSError:
+            os.unlink(self.socket_path)
+        else:
+            raise RuntimeError(f"Another daemon is already serving {self.socket_path}")
+        finally:
+            probe.close()
+
+    def start(self):
+        """Binds the socket and serves on a background thread."""
+        parent = os.path.dirname(self.socket_path) or "."
+        if parent == fallback_dir() or not os.path.isdir(parent):
+            private_dir(parent)
+        self._claim_socket()
+        daemon = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                daemon._serve_client(self.request)
+
+        old_umask = os.umask(0o177)  # Socket is user-only from the moment it exists
+        try:
+            self._server = socketserver.ThreadingUnixStreamServer(self.socket_path, Handler)
+        finally:
+            os.umask(old_umask)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="ZeroGDaemon", daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server is None:
+            return  # Never bound: whatever is at socket_path isn't ours
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+
+    def _serve_client(self, sock):
+        with self._lock:
+            self.clients += 1
+        options, chunks, size = None, [], 0
+        try:
+            while True:
+                frame = recv_frame(sock)
+                if frame is None:
+                    return
+                kind, payload = frame
+                if kind == PING:
+                    send_json(sock, STATUS, self.status())
+                elif kind == BEGIN:
+                    options, chunks, size = json.loads(payload or b"{}"), [], 0
+                elif kind == AUDIO:
+                    if options is None:
+                        raise ProtocolError("audio before begin")
+                    size += len(payload)
+                    if size > MAX_UTTERANCE_SECONDS * SAMPLE_RATE * 4:
+                        raise ProtocolError(f"utterance longer than {MAX_UTTERANCE_SECONDS}s")
+                    chunks.append(payload)
+                elif kind == END:
+                    if options is None:
+                        raise ProtocolError("end before begin")
+                    try:
+                        reply = self._transcribe(b"".join(chunks), options)
+                    except Exception as e:
+                        logger.error(f"Transcription failed: {e}", exc_info=True)
+                        send_json(sock, ERROR, {"error": str(e)})
+                    else:
+                        send_json(sock, RESULT, reply)
+                    options, chunks, size = None, [], 0
+                else:
+                    raise ProtocolError(f"unknown frame kind {kind!r}")
+        except ProtocolError as e:
+            # The stream can't be trusted past a bad frame; say why and hang up
+            logger.warning(f"Dropping client: {e}")
+            try:
+                send_json(sock, ERROR, {"error": str(e)})
+            except OSError:
+                pass
+        except (ConnectionError, OSError) as e:
+            logger.debug(f"Client went away: {e}")
+        finally:
+            with self._lock:
+                self.clients -= 1
+
+    def _transcribe(self, pcm, options):
+        start = time.perf_counter()
+        audio = np.frombuffer(pcm, dtype="<f4")
+        kwargs = {k: options[k] for k in TRANSCRIBE_OPTIONS if options.get(k) is not None}
+        segments, info = self.model.transcribe(audio, **kwargs)
+        # Segments are decoded lazily; this loop is the inference
+        segments = [{"start": round(s.start, 3), "end": round(s.end, 3), "text": s.text} for s in segments]
+        with self._lock:
+            self.requests += 1
+        return {
+            "text": " ".join(s["text"].strip() for s in segments).strip(),
+            "segments": segments,
+            "language": getattr(info, "language", None),
+            "duration": round(len(audio) / SAMPLE_RATE, 3),
+            "seconds": round(time.perf_counter() - start, 4),
+        }
+
+
+def load_model(engine):
+    """Loads and warms up the model the way the app does."""
+    from faster_whisper import WhisperModel
+
+    engine.apply_affinity()
+    model = WhisperModel(engine.model, **engine.model_kwargs())
+    if engine.warmup:
+        segments, _ = model.transcribe(np.zeros(SAMPLE_RATE, dtype=np.float32), beam_size=engine.beam_size)
+        list(segments)
+    return model
+
+
+def private_dir(path):
+    """
+    Creates `path` as a 0700 directory, or checks that an existing one is
+    ours and closed to other users. Refuses a symlink or anyone else's
+    directory, which another local user could have planted in /tmp.
+    """
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        raise RuntimeError(f"{path} is not a private directory owned by you; "
+                           f"remove it or set ZEROG_DAEMON_SOCKET elsewhere")
+
+
+def peer_uid(sock):
+    """User id of the process at the other end of a connected Unix socket (Linux SO_PEERCRED)."""
+    creds = struct.Struct("3i")
+    _, uid, _ = creds.unpack(sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, creds.size))
+    return uid
+
+
+def check_peer(sock, socket_path):
+    """
+    Refuses a daemon run by another user: it would hear the microphone and
+    choose the text that gets pasted. Raises PermissionError (an OSError, so
+    ZEROG_DAEMON=auto falls back to a local model).
+    """
+    if hasattr(socket, "SO_PEERCRED"):
+        uid = peer_uid(sock)
+    else:
+        # No peer credentials on this platform: trust the socket file's owner
+        uid = os.lstat(socket_path).st_uid
+    if uid != os.getuid():
+        raise PermissionError(f"{socket_path} is served by uid {uid}, not you; refusing to use it")
+
+
+# --- Client ---
+
+class RemoteModel:
+    """
+    Drop-in for WhisperModel.transcribe() backed by the daemon. Each thread
+    keeps its own connection, so the recorder's streaming and transcription
+    threads (or a batch worker pool) never wait on each other's replies.
+    """
+
+    def __init__(self, socket_path=None, timeout=CLIENT_TIMEOUT_SECONDS):
+        self.socket_path = socket_path or SOCKET_PATH
+        self.timeout = timeout
+        self.engine = None  # What the daemon reports it is serving, once connected
+        self._local = threading.local()
+
+    def _connection(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+                check_peer(sock, self.socket_path)
+            except OSError:
+                sock.close()
+                raise
+            self._local.sock = sock
+        return sock
+
+    def _drop_connection(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
+
+    def _exchange(self, send):
+        """Runs one request/response; reconnects once if the daemon restarted since."""
+        for attempt in (1, 2):
+            sock = self._connection()
+            try:
+                send(sock)
+                frame = recv_frame(sock)
+                if frame is None:
+                    raise ConnectionError("daemon closed the connection")
+                return frame
+            except (ConnectionError, BrokenPipeError) as e:
+                self._drop_connection()
+                if attempt == 2:
+                    raise
+                logger.debug(f"Daemon connection dropped ({e}); reconnecting.")
+            except Exception:
+                self._drop_connection()
+                raise
+
+    def status(self):
+        kind, payload = self._exchange(lambda sock: send_frame(sock, PING))
+        if kind != STATUS:
+            raise ProtocolError(f"expected status, got {kind!r}")
+        return json.loads(payload)
+
+    def transcribe(self, audio, beam_size=None, initial_prompt=None, language=None, vad_filter=None, **kwargs):
+        """Same call and return shape as WhisperModel.transcribe(): (segments, info)."""
+        pcm = np.ascontiguousarray(audio, dtype="<f4").reshape(-1)
+        options = {"beam_size": beam_size, "initial_prompt": initial_prompt,
+                   "language": language, "vad_filter": vad_filter, "task": kwargs.get("task")}
+
+        def send(sock):
+            send_json(sock, BEGIN, options)
+            data = memoryview(pcm).cast("B")
+            for offset in range(0, len(data), AUDIO_FRAME_BYTES):
+                send_frame(sock, AUDIO, data[offset:offset + AUDIO_FRAME_BYTES])
+            send_frame(sock, END)
+
+        kind, payload = self._exchange(send)
+        reply = json.loads(payload)
+        if kind == ERROR:
+            raise RuntimeError(f"Daemon: {reply.get('error')}")
+        if kind != RESULT:
+            raise ProtocolError(f"expected result, got {kind!r}")
+        segments = [Segment(s["start"], s["end"], s["text"]) for s in reply["segments"]]
+        return segments, TranscriptionInfo(reply.get("language"), reply.get("duration"))
+
+    def close(self):
+        self._drop_connection()
+
+
+def connect(mode, socket_path=None):
+    """
+    RemoteModel for a running daemon, or None to load the model locally.
+    mode is off (never), auto (if one is running) or require (raise if not).
+    """
+    if mode == "off":
+        return None
+    if mode not in DAEMON_MODES:
+        logger.warning(f"ZEROG_DAEMON={mode!r} is not one of {', '.join(DAEMON_MODES)}; loading the model locally.")
+        return None
+    remote = RemoteModel(socket_path)
+    try:
+        status = remote.status()
+    except (OSError, ProtocolError) as e:
+        if mode == "require":
+            raise RuntimeError(f"No transcription daemon at {remote.socket_path} ({e}). Start one with `zerog daemon`.")
+        logger.info(f"No transcription daemon at {remote.socket_path}; loading the model locally.")
+        return None
+    remote.engine = status.get("engine", "daemon")
+    return remote
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="zerog daemon",
+        description="Serve the Whisper model to every ZeroG client on this machine over a Unix socket.")
+    parser.add_argument("--socket", default=SOCKET_PATH, help=f"Socket path (default: {SOCKET_PATH})")
+    parser.add_argument("--status", action="store_true", help="Show what a running daemon is serving and exit")
+    args = parser.parse_args(argv)
+
+    if args.status:
+        try:
+            status = RemoteModel(args.socket, timeout=5).status()
+        except OSError as e:
+            print(f"❌ No daemon at {args.socket} ({e})")
+            return 1
+        print(json.dumps(status, indent=2))
+        return 0
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    engine = EngineConfig.from_env().validate()
+    print(f"🛠️  Loading Whisper {engine.describe()}...")
+    start = time.perf_counter()
+    model = load_model(engine)
+    print(f"✅ Model ready ({time.perf_counter() - start:.1f}s).")
+
+    daemon = TranscriptionDaemon(model, args.socket, engine)
+    try:
+        daemon.start()
+    except (RuntimeError, OSError) as e:
+        print(f"❌ {e}")
+        return 1
+    print(f"🛰️  Serving on {daemon.socket_path}. Ctrl+C to stop.")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        print("\n⏹️  Shutting down.")
+    finally:
+        daemon.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
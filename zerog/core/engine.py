@@ -0,0 +1,195 @@
+import os
+import logging
+from dotenv import load_dotenv, dotenv_values
+
+logger = logging.getLogger(__name__)
+
+# Fastest first; used when the requested compute type isn't supported on this CPU
+COMPUTE_TYPE_FALLBACKS = ["int8_float32", "int8", "float32"]
+# ZEROG_VAD values; the stages themselves are recorder.VAD_STAGES
+VAD_CHOICES = ("energy", "silero", "off")
+
+
+def parse_cores(value):
+    """Parses a core list like '0-3,6' into [0, 1, 2, 3, 6]."""
+    cores = []
+    for part in str(value).split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            lo, hi = part.split("-", 1)
+            cores.extend(range(int(lo), int(hi) + 1))
+        else:
+            cores.append(int(part))
+    return sorted(set(cores))
+
+
+def _get_int(env, key, default, minimum):
+    raw = env.get(key)
+    if raw in (None, ""):
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        logger.warning(f"{key}={raw!r} is not a number; using {default}.")
+        return default
+    if value < minimum:
+        logger.warning(f"{key}={value} is below {minimum}; using {default}.")
+        return default
+    return value
+
+
+def _get_float(env, key, default, minimum):
+    raw = env.get(key)
+    if raw in (None, ""):
+        return default
+    try:
+        value = float(raw)
+    except ValueError:
+        logger.warning(f"{key}={raw!r} is not a number; using {default}.")
+        return default
+    if value < minimum:
+        logger.warning(f"{key}={value} is below {minimum}; using {default}.")
+        return default
+    return value
+
+
+def _get_bool(env, key, default):
+    raw = env.get(key)
+    if raw in (None, ""):
+        return default
+    return str(raw).lower() in ("1", "true", "yes", "on")
+
+
+class EngineConfig:
+    """
+    Whisper engine settings (model, quantization, threading, pinning).
+
+    Read from ZEROG_* environment variables, which includes the project .env,
+    plus an optional file named by ZEROG_CONFIG in the same KEY=value format.
+    Call validate() once at startup; unsupported values fall back with a warning.
+    """
+
+    def __init__(self, model="tiny", compute_type="float32", cpu_threads=0, num_workers=1,
+                 beam_size=1, cpu_cores=None, streaming=False, vad="energy", warmup=True,
+                 overlap_policy="serialize", device="cpu", daemon="off", large_model=None,
+                 escalate_seconds=15.0, model_idle_seconds=300.0, two_pass=False, refine_beam_size=5,
+                 replace_max_age=3.0):
+        self.model = model
+        self.device = device
+        self.compute_type = compute_type
+        self.cpu_threads = cpu_threads  # 0 lets CTranslate2 decide
+        self.num_workers = num_workers
+        self.beam_size = beam_size
+        self.cpu_cores = cpu_cores or []  # Empty means no pinning
+        self.streaming = streaming
+        self.vad = vad
+        self.warmup = warmup  # Run one silent inference right after loading
+        self.overlap_policy = overlap_policy  # See worker.OVERLAP_POLICIES
+        self.daemon = daemon  # off, auto or require: use a `zerog daemon` instead of loading the model
+        # Long or Shift-held dictations escalate to this model; see models.ModelPool
+        self.large_model = large_model or None
+        self.escalate_seconds = escalate_seconds  # 0 = only Shift escalates
+        self.model_idle_seconds = model_idle_seconds  # Unload the large model after this long unused
+        # Paste the draft right away, then re-decode with the large model
+        # (or the resident one at refine_beam_size) and correct it in place
+        self.two_pass = two_pass
+        self.refine_beam_size = refine_beam_size
+        # Pasted text older than this is never replaced in place (two-pass, late polish)
+        self.replace_max_age = replace_max_age
+
+    @classmethod
+    def from_env(cls, env=None):
+        if env is None:
+            load_dotenv()
+            env = dict(os.environ)
+            config_path = env.get("ZEROG_CONFIG")
+            if config_path:
+                if os.path.exists(config_path):
+                    # Real environment variables win over the config file
+                    env = {**dotenv_values(config_path), **env}
+                else:
+                    logger.warning(f"ZEROG_CONFIG file not found: {config_path}")
+
+        cores = []
+        if env.get("ZEROG_CPU_CORES"):
+            try:
+                cores = parse_cores(env["ZEROG_CPU_CORES"])
+            except ValueError:
+                logger.warning(f"ZEROG_CPU_CORES={env['ZEROG_CPU_CORES']!r} is invalid; not pinning.")
+
+        return cls(
+            model=env.get("ZEROG_MODEL") or "tiny",
+            compute_type=env.get("ZEROG_COMPUTE_TYPE") or "float32",
+            cpu_threads=_get_int(env, "ZEROG_CPU_THREADS", 0, 0),
+            num_workers=_get_int(env, "ZEROG_NUM_WORKERS", 1, 1),
+            beam_size=_get_int(env, "ZEROG_BEAM_SIZE", 1, 1),
+            cpu_cores=cores,
+            streaming=_get_bool(env, "ZEROG_STREAMING", False),
+            vad=env.get("ZEROG_VAD") or "energy",
+            warmup=_get_bool(env, "ZEROG_WARMUP", True),
+            overlap_policy=(env.get("ZEROG_OVERLAP") or "serialize").lower(),
+            daemon=(env.get("ZEROG_DAEMON") or "off").lower(),
+            large_model=env.get("ZEROG_LARGE_MODEL") or None,
+            escalate_seconds=_get_float(env, "ZEROG_ESCALATE_SECONDS", 15.0, 0.0),
+            model_idle_seconds=_get_float(env, "ZEROG_MODEL_IDLE_SECONDS", 300.0, 0.0),
+            two_pass=_get_bool(env, "ZEROG_TWO_PASS", False),
+            refine_beam_size=_get_int(env, "ZEROG_REFINE_BEAM_SIZE", 5, 1),
+            replace_max_age=_get_float(env, "ZEROG_REPLACE_MAX_AGE", 3.0, 0.0),
+        )
+
+    def validate(self):
+        """Checks the settings against this machine and falls back where needed."""
+        try:
+            import ctranslate2
+            supported = ctranslate2.get_supported_compute_types(self.device)
+        except Exception as e:
+            logger.debug(f"Could not query supported compute types: {e}")
+            supported = None
+
+        if supported is not None and self.compute_type not in supported:
+            fallback = next((c for c in COMPUTE_TYPE_FALLBACKS if c in supported), "default")
+            logger.warning(
+                f"Compute type '{self.compute_type}' is not supported on {self.device} "
+                f"(supported: {', '.join(sorted(supported))}); falling back to '{fallback}'."
+            )
+            self.compute_type = fallback
+
+        if self.cpu_cores and hasattr(os, "sched_getaffinity"):
+            available = os.sched_getaffinity(0)
+            usable = [c for c in self.cpu_cores if c in available]
+            if usable != self.cpu_cores:
+                logger.warning(f"Ignoring unavailable CPU cores: {sorted(set(self.cpu_cores) - available)}")
+            self.cpu_cores = usable
+
+        if isinstance(self.vad, str) and self.vad.lower() not in VAD_CHOICES + ("", "none", "false"):
+            logger.warning(f"Unknown VAD '{self.vad}' (choose from {', '.join(VAD_CHOICES)}); using 'energy'.")
+            self.vad = "energy"
+
+        # One inference thread per pinned core unless told otherwise
+        if self.cpu_cores and not self.cpu_threads:
+            self.cpu_threads = len(self.cpu_cores)
+        return self
+
+    def apply_affinity(self):
+        """
+        Pins the calling thread to cpu_cores. Threads started afterwards
+        (including CTranslate2's pool) inherit it, so call before loading the model.
+        """
+        if self.cpu_cores and hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, self.cpu_cores)
+
+    def model_kwargs(self):
+        """Keyword arguments for faster_whisper.WhisperModel(self.model, ...)."""
+        return {
+            "device": self.device,
+            "compute_type": self.compute_type,
+            "cpu_threads": self.cpu_threads,
+            "num_workers": self.num_workers,
+        }
+
+    def describe(self):
+        pinned = f", cores {self.cpu_cores}" if self.cpu_cores else ""
+        return (f"'{self.model}' ({self.compute_type}, threads={self.cpu_threads or 'auto'}, "
+                f"workers={self.num_workers}, beam={self.beam_size}{pinned})")
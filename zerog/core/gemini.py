@@ -1,11 +1,16 @@
+"""
+Gemini polishing backend (Ctrl+Q). The shared pipeline lives in polish.py.
+
+Nothing heavy happens at import: the google-genai SDK, the API key lookup and
+the client are set up on first use, or ahead of time by preload() when a
+dictation starts, so sessions that never polish never pay for them.
+"""
 import os
-from google import genai
-from google.genai import types
-from dotenv import load_dotenv
 import logging
-
-# Load environment variables (like our API key) from the .env file
-load_dotenv()
+import threading
+import time
+from . import polish
+from .polish import PolishBackend
 
 # Setup logging for this specific file
 logger = logging.getLogger(__name__)
@@ -14,80 +19,213 @@ logger = logging.getLogger(__name__)
 # IMPORTANT: This feature sends text to Google's servers for processing.
 MODEL_NAME = "gemini-2.0-flash-exp" # Updated to faster flash model
 
-# --- Gemini API Initialization ---
-# Get the API key from our environment
-api_key = os.getenv("GOOGLE_API_KEY")
+# Idle pooled connections stay open this long (httpx closes them after 5s by default),
+# so a connection prewarmed while the user is still talking survives until the polish
+KEEPALIVE_SECONDS = 120
+# Optional API endpoint override (e.g. a local stub server for testing)
+BASE_URL = os.getenv("ZEROG_GEMINI_BASE_URL") or None
+
+# Setup and prewarm share the polish pool; the client's HTTP pool is shared by every call
+_executor = polish._executor
+
 
+def make_client(key, base_url=BASE_URL):
+    """One client per process: it owns a pooled HTTP connection that every call reuses."""
+    import httpx
+    from google import genai
+    from google.genai import types
+    http_options = types.HttpOptions(
+        timeout=polish.REQUEST_TIMEOUT_SECONDS * 1000, base_url=base_url,
+        client_args={"limits": httpx.Limits(keepalive_expiry=KEEPALIVE_SECONDS)},
+    )
+    return genai.Client(api_key=key, http_options=http_options)
+
+# --- Gemini API Initialization (lazy) ---
 client = None
-system_instruction = "Reformulate text as a professional document."
+system_instruction = polish.DEFAULT_INSTRUCTION
 IS_CONFIGURED = False
 
-if api_key:
-    try:
-        # Initialize the new Google GenAI client
-        client = genai.Client(api_key=api_key)
-        
-        # Load the specific instructions for Gemini
-        # prompt_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gemini_prompt.txt")
-        # This finds the directory where THIS file lives, then looks for the prompt
-        BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-        prompt_path = os.path.join(BASE_DIR, "gemini_prompt.txt")
-        
-        if os.path.exists(prompt_path):
-            with open(prompt_path, "r") as f:
-                system_instruction = f.read().strip()
-        
-        # --- Model Warmup ---
-        def warmup_gemini():
-            try:
-                client.models.generate_content(
-                    model=MODEL_NAME,
-                    contents="Warmup.",
-                    config=types.GenerateContentConfig(
-                        max_output_tokens=10,
-                    )
-                )
-                logger.info("Gemini Warmup Complete.")
-            except Exception as e:
-                logger.debug(f"Gemini Warmup failed (ignoring): {e}")
-
-        import threading
-        threading.Thread(target=warmup_gemini, daemon=True).start()
-        
-        IS_CONFIGURED = True
-    except Exception as e:
-        logger.error(f"Failed to initialize Gemini client: {e}")
-else:
-    logger.warning("GOOGLE_API_KEY not found in environment variables. Gemini processing will be skipped.")
+_initialized = False
+_init_lock = threading.Lock()
 
-def process_text(text):
+
+def init():
     """
-    Takes raw transcription text and sends it to Gemini for polishing.
-    Returns the polished text, or the original text if processing fails.
+    Reads the API key, imports the SDK and builds the client. Runs once;
+    later calls return immediately. Returns True if Gemini is usable.
     """
-    if not client or not text.strip():
-        return text
-
-    try:
-        # Configuration for how Gemini generates text
-        config = types.GenerateContentConfig(
-            system_instruction=system_instruction,
-            temperature=0.0,
-            max_output_tokens=4096,
-            response_mime_type="text/plain",
-        )
-        
+    global client, system_instruction, IS_CONFIGURED, _initialized
+    with _init_lock:
+        if _initialized:
+            return IS_CONFIGURED
+        _initialized = True
+
+        from dotenv import load_dotenv
+        # Load environment variables (like our API key) from the .env file
+        load_dotenv()
+        api_key = os.getenv("GOOGLE_API_KEY")
+        if not api_key:
+            logger.warning("GOOGLE_API_KEY not found in environment variables. Gemini processing will be skipped.")
+            return False
+
+        try:
+            # Load the specific instructions for Gemini
+            system_instruction = polish.load_system_instruction()
+            client = make_client(api_key)
+            IS_CONFIGURED = True
+        except Exception as e:
+            logger.error(f"Failed to initialize Gemini client: {e}")
+        return IS_CONFIGURED
+
+
+def get_client():
+    """The shared client, initializing on first use. None if Gemini isn't configured."""
+    if client is None and not _initialized:
+        init()
+    return client
+
+
+def preload():
+    """
+    Speculative setup when a dictation starts (Ctrl down): imports the SDK and
+    builds the client on a pool thread, so a following Ctrl+Q doesn't wait for it.
+    Returns at once; does nothing after the first call.
+    """
+    if not _initialized:
+        _executor.submit(init)
+
+
+class Prewarm:
+    """Handle for one speculative connection setup started by prewarm()."""
+
+    def __init__(self):
+        self.cancelled = False
+        self.future = None
+        self.seconds = None  # Time spent on DNS, TLS and the first round trip, once done
+
+    def cancel(self):
+        """Drops the prewarm if it hasn't reached the network yet."""
+        self.cancelled = True
+        if self.future is not None:
+            self.future.cancel()
+
+    def _run(self):
+        if self.cancelled or get_client() is None or self.cancelled:
+            return False
+        start = time.perf_counter()
+        try:
+            # Metadata lookup: opens the pooled connection without generating anything
+            client.models.get(model=MODEL_NAME)
+        except Exception as e:
+            logger.debug(f"Gemini prewarm failed (ignoring): {e}")
+            return False
+        self.seconds = time.perf_counter() - start
+        logger.info(f"Gemini connection prewarmed in {self.seconds:.3f}s")
+        return True
+
+
+_prewarm = None
+_prewarm_lock = threading.Lock()
+
+
+def prewarm():
+    """
+    Opens the Gemini connection ahead of the polish request (Ctrl+Q pressed while
+    recording), so process_text reuses it instead of paying for DNS and TLS.
+    Returns the Prewarm handle; a prewarm already in flight is reused.
+    """
+    global _prewarm
+    with _prewarm_lock:
+        if _prewarm is not None and not _prewarm.cancelled and not _prewarm.future.done():
+            return _prewarm
+        handle = Prewarm()
+        handle.future = _executor.submit(handle._run)
+        _prewarm = handle
+        return handle
+
+
+def cancel_prewarm():
+    """Called when the recording that asked for polishing is aborted."""
+    global _prewarm
+    with _prewarm_lock:
+        handle, _prewarm = _prewarm, None
+    if handle is not None:
+        handle.cancel()
+
+
+def _polish_config():
+    from google.genai import types
+    # Configuration for how Gemini generates text
+    return types.GenerateContentConfig(
+        system_instruction=system_instruction,
+        temperature=0.0,
+        max_output_tokens=4096,
+        response_mime_type="text/plain",
+    )
+
+
+class GeminiBackend(PolishBackend):
+    """Polishes through the Gemini API, over the shared lazily built client."""
+    name = "gemini"
+    label = "Gemini"
+
+    @property
+    def model(self):
+        return MODEL_NAME
+
+    @property
+    def system_instruction(self):
+        return system_instruction
+
+    def available(self):
+        return get_client() is not None
+
+    def generate(self, text):
         response = client.models.generate_content(
             model=MODEL_NAME,
             contents=f"Text: {text}",
-            config=config
+            config=_polish_config()
         )
-        
-        if response and response.text:
-            processed = response.text.strip()
-            logger.info(f"Gemini successfully processed transcription: '{processed}'")
-            return processed
-        return text
-    except Exception as e:
-        logger.error(f"Gemini processing failed: {e}")
-        return text
+        return response.text if response else None
+
+    def generate_stream(self, text):
+        for chunk in client.models.generate_content_stream(
+            model=MODEL_NAME,
+            contents=f"Text: {text}",
+            config=_polish_config()
+        ):
+            yield chunk.text
+
+    def preload(self):
+        preload()
+
+    def prewarm(self):
+        return prewarm()
+
+    def cancel_prewarm(self):
+        cancel_prewarm()
+
+
+backend = GeminiBackend()
+
+
+# Shortcuts that run the shared pipeline on Gemini regardless of ZEROG_POLISH_BACKEND
+
+def process_text(text):
+    return polish.process_text(text, backend)
+
+
+def process_text_async(text):
+    return polish.process_text_async(text, backend)
+
+
+def polish_with_deadline(text, deadline=None, on_late=None):
+    return polish.polish_with_deadline(text, deadline, on_late, backend)
+
+
+def stream_text(text):
+    return polish.stream_text(text, backend)
+
+
+def polish_streaming(text, inject, deadline=None):
+    return polish.polish_streaming(text, inject, deadline, backend)
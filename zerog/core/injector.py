@@ -0,0 +1,247 @@
+# zerog/core/injector.py
+"""
+Keystroke injection backends for the paste step (Ctrl+V).
+
+Forking `xdotool key ctrl+v` for every paste costs a process start each time.
+XTest keeps its connection open instead; xdotool is the fallback:
+
+XTestInjector:   In-process, one persistent X display connection (python-xlib, XTEST).
+XdotoolInjector: One-shot `xdotool` per keystroke (no XTEST, or keys missing from the layout).
+NullInjector:    Test double; records pastes without touching X (benchmarks, Xvfb).
+"""
+import os
+import shutil
+import subprocess
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# A wedged xdotool must not hang the paste; it normally returns in milliseconds
+XDOTOOL_TIMEOUT_SECONDS = 2.0
+
+
+class Injector:
+    """Common interface. paste() sends Ctrl+V to the focused window."""
+    name = "base"
+
+    def paste(self) -> bool:
+        raise NotImplementedError
+
+    def select_back(self, count: int) -> bool:
+        """Selects the `count` characters before the cursor (Shift+Left)."""
+        raise NotImplementedError
+
+    def focused_window(self):
+        """Id of the window that has keyboard focus, or None if it can't be told."""
+        return None
+
+    def type_text(self, text: str) -> bool:
+        """Slow fallback: types the text key by key."""
+        try:
+            subprocess.run(["xdotool", "type", "--delay", "5", text], check=True)
+            return True
+        except Exception as e:
+            logger.error(f"Slow typing failed: {e}")
+            return False
+
+    def close(self):
+        pass
+
+
+class XTestInjector(Injector):
+    """Sends fake key events through one persistent X connection. No fork per paste."""
+    name = "xtest"
+
+    def __init__(self, display=None):
+        from Xlib import X, XK
+        from Xlib.display import Display
+        from Xlib.ext import xtest
+
+        self._X = X
+        self._xtest = xtest
+        self._display = Display(display)
+        if not self._display.has_extension("XTEST"):
+            self._display.close()
+            raise RuntimeError("X server has no XTEST extension")
+
+        # Resolve keycodes once instead of on every paste
+        self._ctrl = self._display.keysym_to_keycode(XK.string_to_keysym("Control_L"))
+        self._v = self._display.keysym_to_keycode(XK.string_to_keysym("v"))
+        self._shift = self._display.keysym_to_keycode(XK.string_to_keysym("Shift_L"))
+        self._left = self._display.keysym_to_keycode(XK.string_to_keysym("Left"))
+        # 0 means the keysym isn't on the current layout (e.g. no Latin 'v');
+        # xdotool remaps a spare keycode for that, XTest alone can't
+        unmapped = [name for name, code in (("Control_L", self._ctrl), ("v", self._v),
+                                            ("Shift_L", self._shift), ("Left", self._left)) if not code]
+        if unmapped:
+            self._display.close()
+            raise RuntimeError(f"keys not on the current keyboard layout: {', '.join(unmapped)}")
+        # Xlib connections aren't thread-safe
+        self._lock = threading.Lock()
+
+    def paste(self) -> bool:
+        X, fake_input = self._X, self._xtest.fake_input
+        try:
+            with self._lock:
+                fake_input(self._display, X.KeyPress, self._ctrl)
+                fake_input(self._display, X.KeyPress, self._v)
+                fake_input(self._display, X.KeyRelease, self._v)
+                fake_input(self._display, X.KeyRelease, self._ctrl)
+                self._display.sync()
+            return True
+        except Exception as e:
+            logger.error(f"XTest paste failed: {e}")
+            return False
+
+    def select_back(self, count: int) -> bool:
+        X, fake_input = self._X, self._xtest.fake_input
+        try:
+            with self._lock:
+                fake_input(self._display, X.KeyPress, self._shift)
+                for _ in range(count):
+                    fake_input(self._display, X.KeyPress, self._left)
+                    fake_input(self._display, X.KeyRelease, self._left)
+                fake_input(self._display, X.KeyRelease, self._shift)
+                self._display.sync()
+            return True
+        except Exception as e:
+            logger.error(f"XTest selection failed: {e}")
+            return False
+
+    def focused_window(self):
+        try:
+            with self._lock:
+                focus = self._display.get_input_focus().focus
+            return getattr(focus, "id", focus)
+        except Exception as e:
+            logger.warning(f"XTest could not read the input focus: {e}")
+            return None
+
+    def close(self):
+        with self._lock:
+            self._display.close()
+
+
+class XdotoolInjector(Injector):
+    """
+    Runs one `xdotool` command per keystroke. Slower than XTest (a fork per
+    paste), but xdotool remaps a spare keycode for keys the layout lacks.
+    A persistent `xdotool -` can't be used instead: it reads its whole
+    script up to EOF before running any of it.
+    """
+    name = "xdotool"
+
+    def __init__(self):
+        if not shutil.which("xdotool"):
+            raise RuntimeError("xdotool is not installed")
+
+    def _send(self, *args) -> bool:
+        """Runs one xdotool command, e.g. _send("key", "ctrl+v"), and reports whether it worked."""
+        try:
+            subprocess.run(["xdotool", *args], check=True, capture_output=True, text=True,
+                           timeout=XDOTOOL_TIMEOUT_SECONDS)
+            return True
+        except subprocess.CalledProcessError as e:
+            logger.error(f"xdotool {' '.join(args)} failed: {(e.stderr or '').strip() or e}")
+            return False
+        except (OSError, subprocess.SubprocessError) as e:
+            logger.error(f"xdotool command failed. Is it installed? ({e})")
+            return False
+
+    def paste(self) -> bool:
+        return self._send("key", "ctrl+v")
+
+    def select_back(self, count: int) -> bool:
+        return self._send("key", "--repeat", str(count), "shift+Left")
+
+    def focused_window(self):
+        try:
+            result = subprocess.run(["xdotool", "getwindowfocus"], capture_output=True,
+                                    text=True, timeout=XDOTOOL_TIMEOUT_SECONDS, check=True)
+            return result.stdout.strip() or None
+        except (OSError, subprocess.SubprocessError) as e:
+            logger.warning(f"xdotool could not read the input focus: {e}")
+            return None
+
+
+class NullInjector(Injector):
+    """Test double: records each paste instead of sending it. Safe without X."""
+    name = "null"
+
+    def __init__(self, succeed=True):
+        self.succeed = succeed
+        self.focus = "null"  # What focused_window() reports; tests move it
+        self.pastes = []  # perf_counter() timestamp of each paste
+        self.selections = []  # Character counts passed to select_back()
+        self.typed = []
+
+    def paste(self) -> bool:
+        self.pastes.append(time.perf_counter())
+        return self.succeed
+
+    def select_back(self, count: int) -> bool:
+        self.selections.append(count)
+        return self.succeed
+
+    def focused_window(self):
+        return self.focus
+
+    def type_text(self, text: str) -> bool:
+        self.typed.append(text)
+        return self.succeed
+
+
+INJECTORS = {
+    "xtest": XTestInjector,
+    "xdotool": XdotoolInjector,
+    "null": NullInjector,
+}
+
+_injector = None
+_injector_lock = threading.Lock()
+
+
+def select_injector(preferred=None) -> Injector:
+    """
+    Picks a backend. `preferred` (or ZEROG_INJECTOR) may be xtest, xdotool, null
+    or auto (default): XTest if an X display is reachable, else xdotool, else null.
+    """
+    preferred = (preferred or os.getenv("ZEROG_INJECTOR") or "auto").lower()
+    if preferred != "auto":
+        if preferred not in INJECTORS:
+            logger.warning(f"Unknown injector '{preferred}'; selecting automatically.")
+        else:
+            try:
+                return INJECTORS[preferred]()
+            except Exception as e:
+                logger.warning(f"Injector '{preferred}' unavailable ({e}); selecting automatically.")
+
+    if os.getenv("DISPLAY"):
+        try:
+            return XTestInjector()
+        except Exception as e:
+            logger.info(f"XTest injection unavailable ({e}); trying xdotool.")
+    if shutil.which("xdotool"):
+        return XdotoolInjector()
+
+    logger.warning("No text injection backend available (no X display, no xdotool). Pastes will be skipped.")
+    return NullInjector(succeed=False)
+
+
+def get_injector() -> Injector:
+    """Process-wide injector, selected on first use (call once at startup to choose early)."""
+    global _injector
+    with _injector_lock:
+        if _injector is None:
+            _injector = select_injector()
+            logger.info(f"Text injection backend: {_injector.name}")
+        return _injector
+
+
+def set_injector(injector: Injector):
+    """Overrides the process-wide injector (tests, benchmarks, headless runs)."""
+    global _injector
+    with _injector_lock:
+        _injector = injector
@@ -2,6 +2,8 @@ import threading
 import time
 from pynput import keyboard
 from zerog.core.state import state_machine, AppState
+from zerog.core import polish
+from zerog.core import models
 
 class KeyMonitor(threading.Thread):
     def __init__(self):
@@ -10,6 +12,7 @@ class KeyMonitor(threading.Thread):
         self.daemon = True  # Ensures the thread closes when you exit the app
         self.ctrl_pressed = False
         self.q_pressed = False
+        self.shift_pressed = False  # Ctrl+Shift: decode with the large model
         self.recording_start_time = 0
 
     def run(self):
@@ -31,13 +34,25 @@ class KeyMonitor(threading.Thread):
                     self.recording_start_time = time.time()
                     # Trigger the state machine to start recording
                     state_machine.set_state(AppState.RECORDING)
+                    # Get the polish backend ready in the background in case Q follows
+                    polish.preload()
             
             # Detect 'q' while Ctrl is held for AI polishing
             if hasattr(key, 'char') and key.char == 'q' and self.ctrl_pressed:
+                if not self.q_pressed:
+                    # Open the polish connection now, while the user is still talking
+                    polish.prewarm()
                 self.q_pressed = True
                 # Update context to tell the app to use Gemini later
                 state_machine.context['use_gemini'] = True
-                
+
+            # Shift while Ctrl is held asks for the large model
+            if key in [keyboard.Key.shift, keyboard.Key.shift_l, keyboard.Key.shift_r] and self.ctrl_pressed:
+                if not self.shift_pressed:
+                    # Load it while the user is still talking
+                    models.prefetch()
+                self.shift_pressed = True
+
         except Exception as e:
             print(f"Error in keyboard on_press: {e}")
 
@@ -49,10 +64,15 @@ class KeyMonitor(threading.Thread):
                 self.ctrl_pressed = False
                 
                 # Move to processing state; pass the 'q' flag for Gemini
-                state_machine.set_state(AppState.PROCESSING, use_gemini=self.q_pressed)
+                # and the Shift flag for the large model
+                if self.shift_pressed:
+                    state_machine.set_state(AppState.PROCESSING, use_gemini=self.q_pressed, escalate=True)
+                else:
+                    state_machine.set_state(AppState.PROCESSING, use_gemini=self.q_pressed)
                 
-                # Reset the 'q' toggle for the next session
+                # Reset the toggles for the next session
                 self.q_pressed = False
+                self.shift_pressed = False
                 
         except Exception as e:
             print(f"Error in keyboard on_release: {e}")
\ No newline at end of file
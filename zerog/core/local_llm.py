@@ -0,0 +1,121 @@
+"""
+Local polishing backend: any OpenAI-compatible chat server on this machine,
+e.g. llama.cpp (`llama-server -m qwen2.5-1.5b-instruct-q4_k_m.gguf`) or Ollama.
+Text never leaves the machine and no API key is needed.
+"""
+import os
+import json
+import http.client
+import threading
+import logging
+import urllib.parse
+from . import polish
+from .polish import PolishBackend
+
+logger = logging.getLogger(__name__)
+
+# OpenAI-compatible API root of the local server (llama.cpp's default port)
+LOCAL_URL = os.getenv("ZEROG_LOCAL_LLM_URL", "http://127.0.0.1:8080/v1")
+# Model name sent with each request; single-model servers ignore it
+LOCAL_MODEL = os.getenv("ZEROG_LOCAL_LLM_MODEL", "local")
+
+
+class LocalBackend(PolishBackend):
+    """
+    Talks to the server over one keep-alive HTTP connection per pool thread,
+    so each polish costs only the model's compute time.
+    """
+    name = "local"
+    label = "Local LLM"
+
+    def __init__(self, url=None, model=None):
+        self.url = urllib.parse.urlsplit(url or LOCAL_URL)
+        self._model = model or LOCAL_MODEL
+        self._system_instruction = None
+        self._local = threading.local()
+
+    @property
+    def model(self):
+        return self._model
+
+    @property
+    def system_instruction(self):
+        if self._system_instruction is None:
+            self._system_instruction = polish.load_system_instruction()
+        return self._system_instruction
+
+    def available(self):
+        return bool(self.url.hostname)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            cls = http.client.HTTPSConnection if self.url.scheme == "https" else http.client.HTTPConnection
+            conn = cls(self.url.hostname, self.url.port, timeout=polish.REQUEST_TIMEOUT_SECONDS)
+            self._local.conn = conn
+        return conn
+
+    def _post(self, text, stream):
+        body = json.dumps({
+            "model": self._model,
+            "messages": [
+                {"role": "system", "content": self.system_instruction},
+                {"role": "user", "content": f"Text: {text}"},
+            ],
+            "temperature": 0.0,
+            "max_tokens": 4096,
+            "stream": stream,
+        })
+        path = self.url.path.rstrip("/") + "/chat/completions"
+        headers = {"Content-Type": "application/json"}
+        for attempt in (1, 2):
+            conn = self._connection()
+            try:
+                conn.request("POST", path, body=body, headers=headers)
+                response = conn.getresponse()
+                break
+            except (http.client.HTTPException, ConnectionError) as e:
+                # The server closed our idle keep-alive connection; reconnect once
+                conn.close()
+                self._local.conn = None
+                if attempt == 2:
+                    raise
+                logger.debug(f"Local LLM connection dropped ({e}); reconnecting.")
+        if response.status != 200:
+            detail = response.read().decode("utf-8", "replace")[:200]
+            raise RuntimeError(f"HTTP {response.status}: {detail}")
+        return response
+
+    def generate(self, text):
+        response = self._post(text, stream=False)
+        reply = json.loads(response.read())
+        return reply["choices"][0]["message"]["content"]
+
+    def generate_stream(self, text):
+        response = self._post(text, stream=True)
+        done = False
+        try:
+            # Server-sent events: one `data: {json}` line per chunk, then `data: [DONE]`
+            for line in response:
+                line = line.strip()
+                if not line.startswith(b"data:"):
+                    continue
+                data = line[5:].strip()
+                if data == b"[DONE]":
+                    break
+                delta = json.loads(data)["choices"][0].get("delta", {})
+                if delta.get("content"):
+                    yield delta["content"]
+            done = True
+        finally:
+            if done:
+                # Only the end of the stream is left; read it so the connection can be reused
+                response.read()
+            else:
+                # Abandoned (e.g. past the polish deadline) or broken: hang up instead of
+                # waiting for the server to finish generating; the next request reconnects
+                response.close()
+                conn = getattr(self._local, "conn", None)
+                if conn is not None:
+                    conn.close()
+                self._local.conn = None
@@ -0,0 +1,47 @@
+import math
+import numpy as np
+
+# Meter range: this many dB below full scale reads as 0
+METER_FLOOR_DB = 60.0
+# How often the HUD samples the meter
+METER_FPS = 30
+
+
+class LevelMeter:
+    """
+    Latest RMS/peak of the microphone, written by the PortAudio callback and
+    read by the HUD at its own frame rate.
+
+    The callback publishes one immutable tuple per block; replacing an
+    attribute is atomic, so neither side takes a lock and readers always see
+    a complete (rms, peak, blocks) triple. Readers that poll slower than the
+    callback simply skip the blocks in between.
+    """
+
+    def __init__(self):
+        self._latest = (0.0, 0.0, 0)
+
+    def update(self, block):
+        """Measures one block. Safe on the real-time audio thread: no allocation, no lock."""
+        samples = block.reshape(-1)
+        n = samples.shape[0]
+        if n == 0:
+            return
+        rms = math.sqrt(float(np.dot(samples, samples)) / n)
+        peak = max(float(samples.max()), -float(samples.min()))
+        self._latest = (rms, peak, self._latest[2] + 1)
+
+    def reset(self):
+        self._latest = (0.0, 0.0, 0)
+
+    def read(self):
+        """Returns (rms, peak, blocks), where `blocks` counts updates since reset()."""
+        return self._latest
+
+
+def to_meter(rms):
+    """Maps linear RMS to 0..1 on a dB scale, which matches how loud speech sounds."""
+    if rms <= 0.0:
+        return 0.0
+    db = 20.0 * math.log10(rms)
+    return min(1.0, max(0.0, (db + METER_FLOOR_DB) / METER_FLOOR_DB))
@@ -0,0 +1,151 @@
+"""
+Larger Whisper models loaded on demand, next to the resident one.
+
+The recorder keeps its configured model (ZEROG_MODEL, e.g. tiny) loaded for
+good. A ModelPool holds the bigger one used for long-form dictation
+(ZEROG_LARGE_MODEL, e.g. small): it is loaded on a background thread when
+first asked for and dropped again after ZEROG_MODEL_IDLE_SECONDS without use,
+so its memory is only held while it is earning it.
+
+An utterance escalates to the large model when it is at least
+ZEROG_ESCALATE_SECONDS long, or when Shift is held during the dictation.
+Nothing ever waits for a load: until the large model is ready, utterances
+keep using the resident one.
+"""
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ModelPool:
+    """Named models that load in the background and are evicted when idle."""
+
+    def __init__(self, loader, large=None, escalate_seconds=0.0, idle_seconds=300.0):
+        self.loader = loader                      # name -> model; runs on a loader thread
+        self.large = large or None                # Model to escalate to; None disables escalation
+        self.escalate_seconds = escalate_seconds  # 0 = only the modifier key escalates
+        self.idle_seconds = idle_seconds          # 0 = never evict
+        self._models = {}
+        self._loading = {}    # name -> Event, set when the load finishes either way
+        self._errors = {}     # name -> exception; failed loads aren't retried
+        self._last_use = {}   # name -> token of the most recent use
+        self._timers = {}
+        self._lock = threading.Lock()
+
+    def route(self, seconds, escalate=False):
+        """Name of the model an utterance of `seconds` should use, or None for the resident one."""
+        if not self.large:
+            return None
+        if escalate or (self.escalate_seconds and seconds >= self.escalate_seconds):
+            return self.large
+        return None
+
+    def prefetch(self):
+        """Starts loading the large model, e.g. as soon as escalation looks likely. Never blocks."""
+        if self.large:
+            self.request(self.large)
+
+    def request(self, name):
+        """Starts loading `name` unless it is loaded, loading or has failed. Never blocks."""
+        with self._lock:
+            if name in self._models or name in self._loading or name in self._errors:
+                return
+            done = self._loading[name] = threading.Event()
+        threading.Thread(target=self._load, args=(name, done), name=f"ModelLoad-{name}", daemon=True).start()
+
+    def _load(self, name, done):
+        start = time.perf_counter()
+        try:
+            model = self.loader(name)
+        except Exception as e:
+            logger.error(f"Loading model '{name}' failed: {e}")
+            with self._lock:
+                self._errors[name] = e
+                del self._loading[name]
+        else:
+            with self._lock:
+                self._models[name] = model
+                del self._loading[name]
+                self._touch(name)
+            logger.info(f"Model '{name}' ready in {time.perf_counter() - start:.1f}s")
+        finally:
+            done.set()
+
+    def get(self, name, wait=0.0):
+        """
+        The model if it is loaded, else None (and a load is started). `wait`
+        bounds how long to wait for a load already in progress.
+        """
+        self.request(name)
+        with self._lock:
+            done = self._loading.get(name)
+        if done is not None and wait > 0:
+            done.wait(wait)
+        with self._lock:
+            model = self._models.get(name)
+            if model is not None:
+                self._touch(name)
+            return model
+
+    def state(self, name):
+        """ready, loading, failed or absent."""
+        with self._lock:
+            if name in self._models:
+                return "ready"
+            if name in self._loading:
+                return "loading"
+            return "failed" if name in self._errors else "absent"
+
+    def _touch(self, name):
+        """Marks `name` as just used and restarts its idle timer. Call with _lock held."""
+        use = self._last_use[name] = object()
+        if self.idle_seconds <= 0:
+            return
+        timer = self._timers.pop(name, None)
+        if timer is not None:
+            timer.cancel()
+        timer = threading.Timer(self.idle_seconds, self._evict_if_idle, args=(name, use))
+        timer.daemon = True
+        self._timers[name] = timer
+        timer.start()
+
+    def _evict_if_idle(self, name, use):
+        with self._lock:
+            if self._last_use.get(name) is not use:
+                return  # Used again since this timer was set
+        self.evict(name)
+
+    def evict(self, name):
+        """
+        Drops the pool's reference. A transcription still using the model keeps
+        it alive until it finishes; then CTranslate2 frees its memory.
+        """
+        with self._lock:
+            model = self._models.pop(name, None)
+            self._last_use.pop(name, None)
+            timer = self._timers.pop(name, None)
+        if timer is not None:
+            timer.cancel()
+        if model is not None:
+            logger.info(f"Model '{name}' unloaded.")
+
+    def close(self):
+        for name in list(self._models):
+            self.evict(name)
+
+
+_pool = None
+
+
+def set_pool(pool):
+    """Makes `pool` the process-wide one that prefetch() talks to (the recorder's)."""
+    global _pool
+    _pool = pool
+
+
+def prefetch():
+    """Starts loading the escalation model, if there is a pool. Safe on the key listener thread."""
+    if _pool is not None:
+        _pool.prefetch()
@@ -0,0 +1,389 @@
+"""
+Text polishing (Ctrl+Q) with pluggable backends.
+
+The pipeline here (disk cache, deadline, streaming into the injector, timing)
+is the same for every backend; a backend only has to turn raw text into
+polished text, in one piece or as a stream of chunks:
+
+GeminiBackend: Google Gemini over the network (zerog/core/gemini.py).
+LocalBackend:  A local OpenAI-compatible server such as llama.cpp or Ollama
+               (zerog/core/local_llm.py). No API key, no internet.
+
+Pick one with ZEROG_POLISH_BACKEND=gemini|local. Both use gemini_prompt.txt
+as the system instruction.
+"""
+import os
+import re
+import queue
+import concurrent.futures
+import logging
+import threading
+import time
+from .engine import _get_bool, _get_float
+from .polish_cache import PolishCache, cache_key, DEFAULT_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+# The ZEROG_GEMINI_* names predate local backends; they apply to whichever backend is selected.
+# These are the defaults; load_settings() reads the environment when a backend is created.
+# How long the pipeline waits for polished text before pasting the raw transcript
+DEADLINE_SECONDS = 3.0
+# Swap the raw paste for the polished text if it arrives after the deadline
+LATE_REPLACE = False
+# Paste polished text sentence by sentence as the backend streams it
+STREAM_POLISH = False
+# Hard cap on a single request, so late requests can't pile up forever
+REQUEST_TIMEOUT_SECONDS = 30
+# Keep polished results on disk so repeated phrases skip the backend entirely
+CACHE_ENABLED = True
+CACHE_DIR = DEFAULT_CACHE_DIR
+CACHE_MAX_MB = 8.0
+
+PROMPT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gemini_prompt.txt")
+DEFAULT_INSTRUCTION = "Reformulate text as a professional document."
+
+# Requests run here so callers can wait with a deadline
+_executor = concurrent.futures.ThreadPoolExecutor(max_workers=2, thread_name_prefix="polish")
+
+# Timing of the most recent polish: backend, mode (full/stream), seconds, cached
+last_timing = None
+
+
+def load_system_instruction():
+    """The shared editing instructions from gemini_prompt.txt."""
+    if os.path.exists(PROMPT_PATH):
+        with open(PROMPT_PATH, "r") as f:
+            return f.read().strip()
+    return DEFAULT_INSTRUCTION
+
+
+class PolishBackend:
+    """
+    Common interface. generate() returns the polished text (raising on failure);
+    generate_stream() yields it in chunks as they are produced.
+    """
+    name = "base"
+    label = "Polish"  # Used in log messages
+
+    @property
+    def model(self) -> str:
+        raise NotImplementedError
+
+    @property
+    def system_instruction(self) -> str:
+        raise NotImplementedError
+
+    def available(self) -> bool:
+        """True if the backend is configured; may set it up on first call."""
+        raise NotImplementedError
+
+    def generate(self, text: str) -> str:
+        raise NotImplementedError
+
+    def generate_stream(self, text: str):
+        # Backends without streaming deliver everything as one chunk
+        yield self.generate(text)
+
+    def preload(self):
+        """Cheap setup ahead of use (Ctrl down). Must not block."""
+
+    def prewarm(self):
+        """Speculative connection setup (Ctrl+Q down). Must not block."""
+
+    def cancel_prewarm(self):
+        pass
+
+
+def _record(backend, mode, start, cached=False):
+    global last_timing
+    last_timing = {
+        "backend": backend.name,
+        "mode": mode,
+        "seconds": time.perf_counter() - start,
+        "cached": cached,
+    }
+    logger.info(f"{backend.label} {mode} polish took {last_timing['seconds']:.3f}s"
+                f"{' (cache hit)' if cached else ''}")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def load_settings(env=None):
+    """
+    Reads the ZEROG_GEMINI_* settings from `env` (default os.environ), with
+    the same parsing as EngineConfig (1/true/yes/on). Runs whenever a backend
+    is created, so values from a .env loaded after import count too.
+    """
+    global DEADLINE_SECONDS, LATE_REPLACE, STREAM_POLISH, CACHE_ENABLED, CACHE_DIR, CACHE_MAX_MB, _cache
+    env = os.environ if env is None else env
+    DEADLINE_SECONDS = _get_float(env, "ZEROG_GEMINI_DEADLINE", 3.0, 0.0)
+    LATE_REPLACE = _get_bool(env, "ZEROG_GEMINI_LATE_REPLACE", False)
+    STREAM_POLISH = _get_bool(env, "ZEROG_GEMINI_STREAM", False)
+    CACHE_ENABLED = _get_bool(env, "ZEROG_GEMINI_CACHE", True)
+    CACHE_DIR = env.get("ZEROG_GEMINI_CACHE_DIR") or DEFAULT_CACHE_DIR
+    CACHE_MAX_MB = _get_float(env, "ZEROG_GEMINI_CACHE_MB", 8.0, 0.0)
+    with _cache_lock:
+        _cache = None  # Reopened with these settings on first use
+
+
+def get_cache():
+    """The process-wide PolishCache, opened on first use. None if caching is off or unusable."""
+    global _cache, CACHE_ENABLED
+    if not CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            try:
+                _cache = PolishCache(CACHE_DIR, max_bytes=int(CACHE_MAX_MB * 1024 * 1024))
+            except OSError as e:
+                logger.warning(f"Polish cache unavailable ({e}); every polish goes to the backend.")
+                CACHE_ENABLED = False
+        return _cache
+
+
+def _cache_key(backend, text):
+    return cache_key(f"{backend.name}:{backend.model}", backend.system_instruction, text)
+
+
+def _cached(backend, text):
+    cache = get_cache()
+    if cache is None:
+        return None
+    return cache.get(_cache_key(backend, text))
+
+
+def _store(backend, text, polished):
+    cache = get_cache()
+    if cache is not None:
+        cache.put(_cache_key(backend, text), polished)
+
+
+def process_text(text, backend=None):
+    """
+    Takes raw transcription text and sends it to the backend for polishing.
+    Returns the polished text, or the original text if processing fails.
+    """
+    backend = backend or get_backend()
+    if not text.strip() or not backend.available():
+        return text
+
+    start = time.perf_counter()
+    cached = _cached(backend, text)
+    if cached is not None:
+        logger.info(f"{backend.label} polish served from cache: '{cached}'")
+        _record(backend, "full", start, cached=True)
+        return cached
+
+    try:
+        processed = (backend.generate(text) or "").strip()
+    except Exception as e:
+        logger.error(f"{backend.label} processing failed: {e}")
+        return text
+
+    _record(backend, "full", start)
+    if processed:
+        logger.info(f"{backend.label} successfully processed transcription: '{processed}'")
+        _store(backend, text, processed)
+        return processed
+    return text
+
+
+def process_text_async(text, backend=None):
+    """
+    Runs process_text on the shared pool. The returned Future resolves to the
+    polished text (or the original text if processing fails); it never raises.
+    """
+    return _executor.submit(process_text, text, backend or get_backend())
+
+
+def polish_with_deadline(text, deadline=None, on_late=None, backend=None):
+    """
+    Returns the polished text if the backend answers within `deadline` seconds,
+    otherwise the original text right away. If `on_late` is given, it is called
+    (on a pool thread) with the polished text when it arrives after the deadline.
+    """
+    backend = backend or get_backend()
+    if not text.strip() or not backend.available():
+        return text
+
+    deadline = DEADLINE_SECONDS if deadline is None else deadline
+    future = process_text_async(text, backend)
+    try:
+        return future.result(timeout=deadline)
+    except concurrent.futures.TimeoutError:
+        logger.warning(f"{backend.label} missed the {deadline:.1f}s deadline; using the raw transcription.")
+        if on_late:
+            def deliver(done):
+                polished = done.result()
+                if polished and polished != text:
+                    on_late(polished)
+            future.add_done_callback(deliver)
+        return text
+
+
+# A sentence ends at . ! ? or … (plus closing quotes/brackets) before whitespace, or at a newline
+_SENTENCE_END = re.compile(r'[.!?…]+["\')\]]*(?=\s)|\n')
+
+
+def split_sentences(buffer):
+    """
+    Splits streamed text into complete sentences and the unfinished remainder.
+    The whitespace between sentences starts the next piece, so pieces can be
+    pasted one after another without a trailing space at the very end.
+    """
+    pieces = []
+    last = 0
+    for match in _SENTENCE_END.finditer(buffer):
+        pieces.append(buffer[last:match.end()])
+        last = match.end()
+    return pieces, buffer[last:]
+
+
+def stream_text(text, backend=None):
+    """Yields the polished text in sentence-sized pieces as the backend streams it."""
+    backend = backend or get_backend()
+    buffer = ""
+    first = True
+    for chunk in backend.generate_stream(text):
+        if chunk:
+            buffer += chunk
+        pieces, buffer = split_sentences(buffer)
+        for piece in pieces:
+            if first:
+                piece = piece.lstrip()
+            if piece.strip():
+                first = False
+                yield piece
+    if buffer.strip():
+        yield buffer.lstrip() if first else buffer.rstrip()
+
+
+def polish_streaming(text, inject, deadline=None, backend=None, replace=None):
+    """
+    Streams the polished text into `inject` one sentence at a time, so text
+    appears on the first chunk instead of the last. If the first sentence
+    misses `deadline`, or the stream fails before it, the raw text is injected
+    instead. If it fails after that, `replace(pasted, text)` swaps the partial
+    polish for the raw text, so nothing dictated is lost. Returns the text
+    that ended up injected, or None if inject failed or the partial polish
+    couldn't be replaced.
+    """
+    backend = backend or get_backend()
+    if not text.strip() or not backend.available():
+        return text if inject(text) else None
+
+    start = time.perf_counter()
+    cached = _cached(backend, text)
+    if cached is not None:
+        _record(backend, "stream", start, cached=True)
+        # Nothing to wait for, so the whole result goes in one paste
+        return cached if inject(cached) else None
+
+    deadline = DEADLINE_SECONDS if deadline is None else deadline
+    pieces = queue.Queue()
+    done = object()
+    abandoned = [False]
+
+    def produce():
+        try:
+            for piece in stream_text(text, backend):
+                if abandoned[0]:
+                    return
+                pieces.put(piece)
+        except Exception as e:
+            pieces.put(e)
+        pieces.put(done)
+
+    _executor.submit(produce)
+
+    injected = []
+    timeout = deadline
+    while True:
+        try:
+            item = pieces.get(timeout=timeout)
+        except queue.Empty:
+            item = TimeoutError(f"no response within {timeout:.1f}s")
+        # Later sentences only need to beat the request timeout
+        timeout = REQUEST_TIMEOUT_SECONDS
+
+        if item is done:
+            break
+        if isinstance(item, Exception):
+            abandoned[0] = True
+            if not injected:
+                logger.warning(f"{backend.label} stream failed before the first sentence ({item}); "
+                               f"using the raw transcription.")
+                return text if inject(text) else None
+            partial = "".join(injected)
+            if replace is not None and replace(partial, text):
+                logger.error(f"{backend.label} stream failed mid-way ({item}); replaced the partial "
+                             f"polish with the raw transcription.")
+                return text
+            logger.error(f"{backend.label} stream failed mid-way ({item}); only part of the text was pasted.")
+            return None
+        if not inject(item):
+            abandoned[0] = True
+            return None
+        injected.append(item)
+
+    polished = "".join(injected)
+    if polished:
+        _record(backend, "stream", start)
+        logger.info(f"{backend.label} streamed {len(injected)} piece(s): '{polished}'")
+        _store(backend, text, polished)
+        return polished
+    # The model returned nothing; fall back to the raw text
+    return text if inject(text) else None
+
+
+def preload():
+    get_backend().preload()
+
+
+def prewarm():
+    return get_backend().prewarm()
+
+
+def cancel_prewarm():
+    get_backend().cancel_prewarm()
+
+
+def _backend_classes():
+    # Imported here: both modules build on this one
+    from .gemini import GeminiBackend
+    from .local_llm import LocalBackend
+    return {"gemini": GeminiBackend, "local": LocalBackend}
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def select_backend(preferred=None) -> PolishBackend:
+    """`preferred` (or ZEROG_POLISH_BACKEND) may be gemini (default) or local."""
+    load_settings()
+    preferred = (preferred or os.getenv("ZEROG_POLISH_BACKEND") or "gemini").lower()
+    backends = _backend_classes()
+    if preferred not in backends:
+        logger.warning(f"Unknown polish backend '{preferred}'; using Gemini.")
+        preferred = "gemini"
+    return backends[preferred]()
+
+
+def get_backend() -> PolishBackend:
+    """Process-wide polish backend, selected on first use."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = select_backend()
+            logger.info(f"Polish backend: {_backend.name}")
+        return _backend
+
+
+def set_backend(backend: PolishBackend):
+    """Overrides the process-wide backend (tests, benchmarks)."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
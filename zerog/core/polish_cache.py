@@ -0,0 +1,156 @@
+import collections
+import hashlib
+import os
+import threading
+import unicodedata
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Where polished results live unless ZEROG_GEMINI_CACHE_DIR says otherwise
+DEFAULT_CACHE_DIR = os.path.join(
+    os.getenv("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "zerog", "polish"
+)
+# Total size of the cached results before the least recently used ones are evicted
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+
+_ENTRY_SUFFIX = ".txt"
+
+
+def normalize_text(text):
+    """Collapses whitespace and Unicode variants so re-dictations of a phrase share a key."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def cache_key(model, system_instruction, text):
+    """Content address of one polish request: sha256 over model, instruction and normalized text."""
+    digest = hashlib.sha256()
+    for part in (model, system_instruction, normalize_text(text)):
+        data = part.encode("utf-8")
+        # Length-prefixed so ("ab", "c") and ("a", "bc") never collide
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class PolishCache:
+    """
+    On-disk LRU cache of polished text, one file per entry named by its key.
+
+    Recency is kept in memory and mirrored to each file's mtime, so the order
+    survives restarts. Once the entries exceed max_bytes, the least recently
+    used ones are deleted. Safe to share between the Gemini pool threads.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()  # key -> size, least recently used first
+        self._size = 0
+        # Entries are dictated text: only the user may list or read them
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        os.chmod(directory, 0o700)
+        self._load_index()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + _ENTRY_SUFFIX)
+
+    def _load_index(self):
+        found = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(_ENTRY_SUFFIX):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            found.append((stat.st_mtime, name[:-len(_ENTRY_SUFFIX)], stat.st_size))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._size += size
+        with self._lock:
+            self._evict()
+
+    def get(self, key):
+        """Returns the cached text for key, or None. Counts a hit or a miss."""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            try:
+                with open(self._path(key), "r", encoding="utf-8") as f:
+                    value = f.read()
+                os.utime(self._path(key))
+            except OSError as e:
+                logger.debug(f"Dropping unreadable cache entry {key}: {e}")
+                self._size -= self._entries.pop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        data = value.encode("utf-8")
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            path = self._path(key)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                try:
+                    os.remove(tmp)  # Left behind by a crash
+                except FileNotFoundError:
+                    pass
+                # Write-then-rename so a crash never leaves a truncated entry;
+                # created 0600 whatever the umask
+                fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, path)
+            except OSError as e:
+                logger.warning(f"Could not write polish cache entry: {e}")
+                return
+            self._size += len(data) - self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            self._evict()
+
+    def _evict(self):
+        while self._size > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._size -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                try:
+                    os.remove(self._path(key))
+                except OSError:
+                    pass
+            self._entries.clear()
+            self._size = 0
+
+    @property
+    def size_bytes(self):
+        return self._size
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Counters for logs and the HUD."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._entries),
+            "bytes": self._size,
+        }
@@ -1,25 +1,354 @@
 import numpy as np
 import sounddevice as sd
-import pyperclip
 from faster_whisper import WhisperModel
 import time
-import queue
 import threading
-import subprocess
-from .state import state_machine, AppState
+from .audio_buffer import AudioBuffer
+from .meter import LevelMeter
+from .engine import EngineConfig
+from .typer import FastTyper
+from . import polish
+from . import daemon
+from . import models
+from .models import ModelPool
+from .worker import TranscriptionJob, TranscriptionWorker
+from .state import state_machine, AppState, WorkerDispatcher, transition_age, transition_time
+from .trace import Trace
+
+SAMPLE_RATE = 16000
+
+# Each capture arena is preallocated for this much audio; longer recordings
+# chain another arena of the same size, so nothing is cut off
+ARENA_SECONDS = 300
+# One arena being recorded into, one being transcribed
+PREALLOCATED_BUFFERS = 2
+# Warn when the audio stream opens later than this after the key press
+RECORD_START_BUDGET_SECONDS = 0.05
+
+# --- Streaming (transcribe while Ctrl is still held) ---
+# How often the streaming worker looks at the captured audio
+STREAM_POLL_SECONDS = 0.5
+# Never commit a chunk shorter than this; Whisper needs some context
+STREAM_MIN_CHUNK_SECONDS = 4.0
+# Force a commit before Whisper's 30s window is exceeded, even without a pause
+STREAM_MAX_CHUNK_SECONDS = 20.0
+# A pause is a window whose RMS stays under this level
+PAUSE_WINDOW_SECONDS = 0.2
+PAUSE_RMS_THRESHOLD = 0.01
+
+# Same warmup as debug_model.py: one second of silence through the model
+WARMUP_SECONDS = 1.0
+
+# --- Voice activity detection (drop silence before inference) ---
+VAD_FRAME_SECONDS = 0.03
+# Only pauses longer than this are cut out; shorter ones stay between words
+VAD_MIN_SILENCE_SECONDS = 0.5
+# Audio kept on each side of speech so word onsets/endings aren't clipped
+VAD_PAD_SECONDS = 0.2
+# The energy gate follows the microphone: speech is anything this far above the
+# noise floor (the quietest frames), so a quiet input isn't mistaken for silence.
+# It never rises above PAUSE_RMS_THRESHOLD or drops below VAD_MIN_RMS (-60 dBFS).
+VAD_NOISE_FLOOR_PERCENTILE = 10
+VAD_NOISE_FLOOR_RATIO = 3.0
+VAD_MIN_RMS = 0.001
+
+
+def find_commit_point(audio, sample_rate=SAMPLE_RATE,
+                      min_chunk=STREAM_MIN_CHUNK_SECONDS,
+                      max_chunk=STREAM_MAX_CHUNK_SECONDS):
+    """
+    Returns the sample index where `audio` can be safely split, or None.
+    We cut in the middle of the latest pause so no word is split in half,
+    which keeps the streamed text identical to a single batch pass.
+    """
+    min_samples = int(min_chunk * sample_rate)
+    if len(audio) < min_samples:
+        return None
+
+    win = int(PAUSE_WINDOW_SECONDS * sample_rate)
+    n = len(audio) // win
+    frames = audio[:n * win].reshape(n, win)
+    rms = np.sqrt(np.mean(frames ** 2, axis=1))
+
+    first = min_samples // win
+    quiet = np.nonzero(rms[first:] < PAUSE_RMS_THRESHOLD)[0]
+    if quiet.size:
+        return (first + int(quiet[-1])) * win + win // 2
+
+    # No pause yet: once the chunk is too long, cut at the quietest spot
+    if len(audio) >= int(max_chunk * sample_rate):
+        return (first + int(np.argmin(rms[first:]))) * win + win // 2
+    return None
+
+
+class VADStage:
+    """
+    Pre-processing stage that cuts silence out before Whisper inference.
+    Subclasses return speech spans as (start, end) sample indices.
+    """
+    sample_rate = SAMPLE_RATE
+
+    def speech_spans(self, audio):
+        raise NotImplementedError
+
+    def trim(self, audio):
+        """Returns (speech-only audio, seconds of silence trimmed)."""
+        spans = self.speech_spans(audio)
+        kept = sum(end - start for start, end in spans)
+        trimmed = (len(audio) - kept) / self.sample_rate
+        if not spans:
+            return audio[:0], trimmed
+        if len(spans) == 1:
+            start, end = spans[0]
+            return audio[start:end], trimmed  # Still a zero-copy view
+        return np.concatenate([audio[start:end] for start, end in spans]), trimmed
+
+
+class EnergyVAD(VADStage):
+    """
+    Out-of-the-box stage: frames whose RMS clears a gate count as speech. The
+    gate is `threshold`, lowered to just above the recording's noise floor
+    when the microphone is quiet.
+    """
+
+    def __init__(self, threshold=PAUSE_RMS_THRESHOLD, min_silence=VAD_MIN_SILENCE_SECONDS,
+                 pad=VAD_PAD_SECONDS):
+        self.threshold = threshold
+        self.frame = int(VAD_FRAME_SECONDS * self.sample_rate)
+        self.pad_frames = int(pad / VAD_FRAME_SECONDS)
+        # Gaps shorter than the padding on both sides would just merge anyway
+        self.max_gap_frames = max(int(min_silence / VAD_FRAME_SECONDS), 2 * self.pad_frames)
+
+    def speech_spans(self, audio):
+        n = len(audio) // self.frame
+        if n == 0:
+            return [(0, len(audio))] if len(audio) else []
+
+        frames = audio[:n * self.frame].reshape(n, self.frame)
+        rms = np.sqrt(np.mean(frames ** 2, axis=1))
+        floor = float(np.percentile(rms, VAD_NOISE_FLOOR_PERCENTILE))
+        gate = min(self.threshold, max(floor * VAD_NOISE_FLOOR_RATIO, VAD_MIN_RMS))
+        idx = np.flatnonzero(rms >= gate)
+        if not idx.size:
+            return []
+
+        # Split wherever the run of silent frames is long enough to be a real pause
+        breaks = (np.diff(idx) - 1) > self.max_gap_frames
+        starts = np.maximum(idx[np.r_[True, breaks]] - self.pad_frames, 0) * self.frame
+        ends = np.minimum(idx[np.r_[breaks, True]] + 1 + self.pad_frames, n) * self.frame
+        # The last partial frame belongs to whatever span reaches the end
+        if ends[-1] == n * self.frame:
+            ends[-1] = len(audio)
+        return list(zip(starts.tolist(), ends.tolist()))
+
+
+class SileroVAD(VADStage):
+    """Model-based stage using the Silero VAD bundled with faster-whisper (ONNX on CPU)."""
+
+    def __init__(self, min_silence=VAD_MIN_SILENCE_SECONDS, pad=VAD_PAD_SECONDS):
+        from faster_whisper.vad import VadOptions, get_speech_timestamps
+        self._get_speech_timestamps = get_speech_timestamps
+        self._options = VadOptions(
+            min_silence_duration_ms=int(min_silence * 1000),
+            speech_pad_ms=int(pad * 1000),
+        )
+
+    def speech_spans(self, audio):
+        timestamps = self._get_speech_timestamps(audio, self._options, sampling_rate=self.sample_rate)
+        return [(ts["start"], ts["end"]) for ts in timestamps]
+
+
+VAD_STAGES = {
+    "energy": EnergyVAD,
+    "silero": SileroVAD,
+}
+
+
+def make_vad(vad):
+    """Accepts None/'off', a stage name from VAD_STAGES, or a ready VADStage."""
+    if vad is None or isinstance(vad, VADStage):
+        return vad
+    name = str(vad).lower()
+    if name in ("", "off", "none", "false"):
+        return None
+    if name not in VAD_STAGES:
+        raise ValueError(f"Unknown VAD stage '{vad}'. Choose from: {', '.join(VAD_STAGES)}")
+    return VAD_STAGES[name]()
+
+
+class Utterance:
+    """Per-recording state handed from the capture side to the transcriber."""
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.committed = []   # Text of chunks decoded while recording (streaming mode)
+        self.commit_pos = 0   # Samples of `buffer` already covered by `committed`
+        self.worker = None    # Streaming ticker thread, if any; see _stream_loop()
+        self.trimmed_seconds = 0.0  # Silence removed by the VAD stage
+        self.job = None             # TranscriptionJob once recording stops
+        self.inference_seconds = None
+        self.escalate = False       # Shift was held: decode with the large model
+        self.trace = Trace()        # Key down to clipboard restore
+
 
 class AudioRecorder:
-    def __init__(self):
+    def __init__(self, streaming=None, vad=None, engine=None):
+        # Model/threading settings come from ZEROG_* env vars unless given;
+        # explicit streaming/vad arguments override the config.
+        self.engine = (engine or EngineConfig.from_env()).validate()
         self.recording = False
-        self.audio_queue = queue.Queue()
         self.stream = None
-        
-        # Exact settings from your successful debug_model.py
-        print("🛠️  Loading Whisper 'tiny' (float32)...")
-        self.model = WhisperModel("tiny", device="cpu", compute_type="float32")
-        print("✅ Recorder Engine Ready.")
-        
-        state_machine.add_observer(self.on_state_change)
+
+        # Capture arenas are allocated once and reused, so the audio callback
+        # never allocates. A new recording never reuses an arena that is still
+        # being transcribed.
+        self._buffers = [AudioBuffer(ARENA_SECONDS * SAMPLE_RATE)
+                         for _ in range(PREALLOCATED_BUFFERS)]
+        self._buffers_lock = threading.Lock()
+        self.buffer = None
+        self.utterance = None       # The dictation being recorded, until stop_recording() takes it
+        self.last_utterance = None  # The most recent dictation handed to the worker
+        self._handoff_lock = threading.Lock()
+
+        # Streaming mode decodes committed chunks while the user is still talking,
+        # so only the uncommitted tail is left to decode on key release.
+        self.streaming = self.engine.streaming if streaming is None else streaming
+
+        # Silence never reaches the model; see VAD_STAGES
+        self.vad = make_vad(self.engine.vad if vad is None else vad)
+
+        # One long-lived thread runs every transcription, so back-to-back
+        # dictations queue up instead of fighting over the same cores.
+        self.worker = TranscriptionWorker(policy=self.engine.overlap_policy)
+        self.worker.start()
+
+        # The model is loaded by start_loading() on a background thread, so the
+        # window doesn't wait for it. Audio recorded meanwhile is kept and
+        # transcribed once the model is ready.
+        self._model = None
+        self._model_ready = threading.Event()
+        self._load_lock = threading.Lock()
+        self._load_started = False
+        self._load_error = None
+        self.load_seconds = None
+        self.warmup_seconds = None
+        self.record_start_latency = None  # Key press to audio stream running, last recording
+        self.meter = LevelMeter()  # Live input level; the HUD polls it
+
+        # Larger model for long or Shift-held dictations, loaded only when wanted
+        self.pool = ModelPool(self._load_pool_model, large=self.engine.large_model,
+                              escalate_seconds=self.engine.escalate_seconds,
+                              idle_seconds=self.engine.model_idle_seconds)
+        models.set_pool(self.pool)
+
+        # Only these modes swap pasted text in place later, so only they need
+        # FastTyper to note the focused window with every paste
+        # (the polish settings are read now, after from_env() loaded the .env)
+        polish.load_settings()
+        FastTyper.track_focus = bool(self.engine.two_pass or polish.LATE_REPLACE or polish.STREAM_POLISH)
+        FastTyper.replace_max_age = self.engine.replace_max_age
+        # Two-pass mode: seconds of decoding per second of audio, by (model, beam),
+        # as measured on the last second pass; predicts whether the next one is worth starting
+        self._refine_speed = {}
+        self._prefetch_timer = None
+
+        # State changes reach us on our own thread: opening PortAudio never blocks the key listener
+        self.events = WorkerDispatcher(name="RecorderEvents")
+        state_machine.add_observer(self.on_state_change, dispatcher=self.events)
+
+    def start_loading(self):
+        """Starts loading the Whisper model in the background and returns immediately."""
+        with self._load_lock:
+            if self._load_started:
+                return
+            self._load_started = True
+        state_machine.set_state(AppState.LOADING)
+        threading.Thread(target=self._load_model, daemon=True).start()
+
+    def _load_model(self):
+        try:
+            start = time.perf_counter()
+            # A running `zerog daemon` already has the model loaded and warm
+            remote = daemon.connect(self.engine.daemon)
+            if remote is not None:
+                self._model = remote
+                self.load_seconds = time.perf_counter() - start
+                print(f"🔌 Using the transcription daemon: {remote.engine}")
+            else:
+                print(f"🛠️  Loading Whisper {self.engine.describe()}...")
+                # Pins this thread; CTranslate2's workers inherit it, the GUI thread doesn't
+                self.engine.apply_affinity()
+                self._model = WhisperModel(self.engine.model, **self.engine.model_kwargs())
+                self.load_seconds = time.perf_counter() - start
+                if self.engine.warmup:
+                    self._warmup()
+                print(f"✅ Recorder Engine Ready ({self.load_seconds:.1f}s).")
+        except Exception as e:
+            self._load_error = e
+            print(f"❌ Failed to load Whisper: {e}")
+        finally:
+            self._model_ready.set()
+
+        if self._load_error:
+            state_machine.set_state(AppState.ERROR, error=f"Model failed to load: {self._load_error}")
+        else:
+            # Don't interrupt a recording that started while we were loading
+            state_machine.compare_and_set(AppState.LOADING, AppState.IDLE)
+
+    def _warmup(self):
+        """
+        Runs a silent inference so CTranslate2's lazy init and allocator growth
+        happen now, not on the user's first dictation. Runs before the model is
+        marked ready, so it never competes with a real transcription.
+        """
+        start = time.perf_counter()
+        try:
+            warmup_audio = np.zeros(int(WARMUP_SECONDS * SAMPLE_RATE), dtype=np.float32)
+            segments, _ = self._model.transcribe(warmup_audio, beam_size=self.engine.beam_size)
+            list(segments)  # Force execution
+            self.warmup_seconds = time.perf_counter() - start
+            print(f"🔥 Inference warmup took {self.warmup_seconds:.2f}s")
+        except Exception as e:
+            # A failed warmup only costs first-utterance latency
+            print(f"⚠️  Inference warmup failed (ignoring): {e}")
+
+    def _load_pool_model(self, name):
+        """ModelPool loader; runs on the pool's own thread, never the GUI or transcription thread."""
+        print(f"🛠️  Loading Whisper '{name}' in the background...")
+        self.engine.apply_affinity()
+        model = WhisperModel(name, **self.engine.model_kwargs())
+        if self.engine.warmup:
+            # Its first long dictation shouldn't pay for lazy init either
+            warmup_audio = np.zeros(int(WARMUP_SECONDS * SAMPLE_RATE), dtype=np.float32)
+            segments, _ = model.transcribe(warmup_audio, beam_size=self.engine.beam_size)
+            list(segments)
+        print(f"✅ Whisper '{name}' ready for long dictations.")
+        return model
+
+    @property
+    def model(self):
+        """The Whisper model; blocks until the background load has finished."""
+        if not self._model_ready.is_set():
+            with self._load_lock:
+                load_now = not self._load_started
+                self._load_started = True
+            if load_now:
+                # Nobody called start_loading(); load on first use instead
+                self._load_model()
+            self._model_ready.wait()
+        if self._model is None:
+            raise RuntimeError(f"Whisper model unavailable: {self._load_error}")
+        return self._model
+
+    @model.setter
+    def model(self, model):
+        self._model = model
+        self._load_started = True
+        self._model_ready.set()
+
+    @property
+    def model_ready(self):
+        return self._model_ready.is_set() and self._model is not None
 
     def on_state_change(self, state, data=None):
         if state == AppState.RECORDING:
@@ -27,53 +356,357 @@ class AudioRecorder:
         elif state == AppState.PROCESSING:
             # Fixed: handle case where data might be None
             use_gemini = data.get('use_gemini', False) if data else False
-            self.stop_recording(use_gemini)
+            escalate = data.get('escalate', False) if data else False
+            self.stop_recording(use_gemini, escalate=escalate)
+        elif state == AppState.ERROR and self.recording:
+            # The recording was aborted; don't open a polish connection nobody will use
+            polish.cancel_prewarm()
 
     def start_recording(self):
         print("🎤 Recording...")
+        self.utterance = Utterance(self._acquire_buffer())
+        trace = self.utterance.trace
+        # Backdated to the key press: time queued behind other transitions counts too
+        trace.mark("key_down", at=transition_time())
+        self.buffer = self.utterance.buffer
+        self.meter.reset()
         self.recording = True
-        self.audio_queue = queue.Queue()
-        self.stream = sd.InputStream(samplerate=16000, channels=1, callback=self.callback)
+        self.stream = sd.InputStream(samplerate=SAMPLE_RATE, channels=1, callback=self.callback)
         self.stream.start()
+        trace.mark("stream_opened")
+
+        if self.pool.large and self.engine.two_pass:
+            # Every dictation gets a second pass with it
+            self.pool.prefetch()
+        elif self.pool.large and self.pool.escalate_seconds:
+            # This may turn into a long dictation: have the large model ready by the time it does
+            self._prefetch_timer = threading.Timer(self.pool.escalate_seconds / 2, self.pool.prefetch)
+            self._prefetch_timer.daemon = True
+            self._prefetch_timer.start()
+
+        self.record_start_latency = transition_age()
+        if self.record_start_latency is not None:
+            budget = "" if self.record_start_latency <= RECORD_START_BUDGET_SECONDS else " (over budget)"
+            print(f"⏱️  Microphone live {self.record_start_latency * 1000:.0f} ms after the key{budget}")
+
+        if self.streaming:
+            # Only a ticker: the chunks themselves are decoded on the transcription worker
+            self.utterance.worker = threading.Thread(
+                target=self._stream_loop, args=(self.utterance,), daemon=True)
+            self.utterance.worker.start()
+
+    def _acquire_buffer(self):
+        with self._buffers_lock:
+            for buf in self._buffers:
+                if not buf.in_use:
+                    break
+            else:
+                # Every arena is still queued for transcription; grow the pool
+                buf = AudioBuffer(ARENA_SECONDS * SAMPLE_RATE)
+                self._buffers.append(buf)
+            buf.reset()
+            buf.in_use = True
+            return buf
 
     def callback(self, indata, frames, time_info, status):
+        # Runs on the PortAudio thread: copy in place, no allocation, no lock
         if self.recording:
-            self.audio_queue.put(indata.copy())
+            self.buffer.write(indata)
+            self.meter.update(indata)
 
-    def stop_recording(self, use_gemini):
+    def stop_recording(self, use_gemini, escalate=False):
         print("⏹️  Processing...")
-        self.recording = False
-        if self.stream:
-            self.stream.stop()
-            self.stream.close()
-        
-        # Run transcription in a background thread to keep GUI responsive
-        threading.Thread(target=self.transcribe, args=(use_gemini,), daemon=True).start()
-
-    def transcribe(self, use_gemini):
+        key_up = transition_time()
+        # Take the recording over in one step: a repeated PROCESSING (HUD Stop,
+        # then the key release) finds nothing left to close or submit
+        with self._handoff_lock:
+            self.recording = False
+            utterance, self.utterance = self.utterance, None
+            stream, self.stream = self.stream, None
+            if utterance is not None:
+                self.last_utterance = utterance
+        if self._prefetch_timer is not None:
+            self._prefetch_timer.cancel()
+            self._prefetch_timer = None
+        if stream:
+            stream.stop()
+            stream.close()
+
+        if utterance is None:
+            last = self.last_utterance
+            if last is not None and last.job is not None and last.job.finished_at is None:
+                return  # Already queued; its job reports the outcome
+            state_machine.set_state(AppState.IDLE)
+            return
+
+        utterance.escalate = escalate
+        utterance.trace.mark("key_up", at=key_up)
+        utterance.trace.mark("audio_drained")
+        utterance.trace.attrs["audio_seconds"] = round(len(utterance.buffer) / SAMPLE_RATE, 3)
+
+        # Queue transcription on the worker thread to keep GUI responsive
+        utterance.job = TranscriptionJob(
+            self.transcribe, (use_gemini, utterance),
+            name=f"utterance-{id(utterance):x}",
+            on_cancel=lambda: self._discard(utterance),
+        )
+        self.worker.submit(utterance.job)
+
+    def _finish(self, state, trace=None):
+        """
+        Reports the end of a job, unless the user has already started another
+        recording or another dictation is still queued behind this one.
+        """
+        if self.worker.pending:
+            return
+        if trace is not None:
+            # The HUD shows where the time went
+            state_machine.compare_and_set(AppState.PROCESSING, state, trace=trace.summary())
+        else:
+            state_machine.compare_and_set(AppState.PROCESSING, state)
+
+    def _complete_trace(self, trace, outcome, after_restore=False):
+        """Emits the trace now, or once the clipboard is restored if we pasted."""
+        trace.attrs["outcome"] = outcome
+
+        def restored():
+            trace.mark("restored")
+            trace.finish()
+
+        if after_restore:
+            FastTyper.when_restored(restored)
+        else:
+            trace.finish()
+
+    def _discard(self, utterance):
+        """Drops a stale utterance that the overlap policy cancelled."""
+        utterance.buffer.in_use = False
+        self._complete_trace(utterance.trace, "dropped")
+        print("🗑️  Dropped a stale dictation (a newer one replaced it).")
+
+    def _route(self, utterance):
+        """
+        The large model if this utterance escalates and it is loaded, else None
+        for the resident model. Never waits for a load.
+        """
+        name = self.pool.route(len(utterance.buffer) / SAMPLE_RATE, utterance.escalate)
+        if name is None:
+            return None
+        model = self.pool.get(name)
+        if model is None:
+            print(f"⏳ Whisper '{name}' is still loading; using '{self.engine.model}' this time.")
+            return None
+        print(f"🎯 Long dictation: decoding with '{name}'")
+        utterance.trace.attrs["model"] = name
+        return model
+
+    def _decode(self, audio_np, prompt=None, utterance=None, model=None, beam_size=None):
+        trace = utterance.trace if utterance is not None else None
+        if self.vad is not None:
+            start = time.perf_counter()
+            audio_np, trimmed = self.vad.trim(audio_np)
+            if utterance is not None:
+                utterance.trimmed_seconds += trimmed
+                trace.add_span("vad", start, time.perf_counter())
+            if not len(audio_np):
+                return ""
+        if model is None:
+            model = self.model  # May wait for the model to load; that isn't inference time
+        start = time.perf_counter()
+        segments, _ = model.transcribe(audio_np, beam_size=beam_size or self.engine.beam_size, initial_prompt=prompt)
+        # Segments are decoded lazily, so the join is part of inference
+        text = " ".join([s.text for s in segments]).strip()
+        if trace is not None:
+            trace.add_span("inference", start, time.perf_counter())
+        return text
+
+    def _schedule_refine(self, utterance, draft):
+        """
+        Queues the second pass as the worker's idle job: it only starts once no
+        dictation is waiting, never shares the cores with one, and a newer
+        draft's second pass replaces it. The audio is copied: its arena is
+        reused once transcribe() returns.
+        """
+        audio = utterance.buffer.view(0).copy()
+        self.worker.submit_idle(TranscriptionJob(
+            self._refine, (utterance, audio, draft), name=f"refine-{id(utterance):x}"))
+
+    def _refine(self, utterance, audio, draft):
+        """
+        Two-pass mode, on the transcription worker: re-decodes the whole
+        recording with the large model if it is loaded (else the resident
+        model at refine_beam_size) and swaps the pasted draft for the result
+        if it differs. The draft stays if the user has moved on since, or if
+        FastTyper no longer trusts the cursor to be right after it. Passes
+        that would finish past the replace cap are not started at all.
+        """
+        # Checked before decoding as well as after: a stale pass would only waste the cores
+        if self.last_utterance is not utterance or self.recording:
+            print("⏭️  Skipping second pass; a new dictation has started.")
+            return
         try:
-            audio_data = []
-            while not self.audio_queue.empty():
-                audio_data.append(self.audio_queue.get())
-            
-            if not audio_data:
-                state_machine.set_state(AppState.IDLE)
+            model, name = None, self.engine.model
+            if self.pool.large:
+                # Never wait for a load: the correction is only any use within seconds of the paste
+                model = self.pool.get(self.pool.large)
+                if model is not None:
+                    name = self.pool.large
+            beam_size = max(self.engine.refine_beam_size, self.engine.beam_size)
+            if name == self.engine.model and beam_size == self.engine.beam_size:
+                return  # Same model, same beam: nothing more accurate to try
+
+            audio_seconds = len(audio) / SAMPLE_RATE
+            expected = self._refine_speed.get((name, beam_size), 0.0) * audio_seconds
+            if not FastTyper.can_replace(draft, within=expected):
+                print(f"⏭️  Skipping second pass ({name}, beam {beam_size}, ~{expected:.1f}s); the draft "
+                      f"could not be replaced by then (newer paste, focus or {FastTyper.replace_max_age:g}s cap).")
                 return
 
-            audio_np = np.vstack(audio_data).flatten()
-            segments, _ = self.model.transcribe(audio_np, beam_size=1)
-            text = " ".join([s.text for s in segments]).strip()
-            
-            print(f"📝 Result: {text}")
-            
-            if text:
-                pyperclip.copy(text)
-                # Ensure xdotool is installed: sudo apt install xdotool
-                subprocess.run(["xdotool", "key", "ctrl+v"])
-                state_machine.set_state(AppState.SUCCESS)
-                time.sleep(2)
-            
+            start = time.perf_counter()
+            refined = self._decode(audio, model=model, beam_size=beam_size)
+            seconds = time.perf_counter() - start
+            if audio_seconds:
+                self._refine_speed[(name, beam_size)] = seconds / audio_seconds
+            if not refined or refined.split() == draft.split():
+                print(f"✔️  Second pass ({name}, beam {beam_size}, {seconds:.2f}s) agrees with the draft.")
+                return
+            if self.last_utterance is not utterance or self.recording:
+                print("⚠️  Second pass finished after a new dictation started; keeping the draft.")
+                return
+            if FastTyper.replace(draft, refined):
+                print(f"🔁 Corrected in place ({name}, beam {beam_size}, {seconds:.2f}s): {refined}")
+            else:
+                print("⚠️  Second pass finished too late to touch the draft (newer paste, focus or age); keeping it.")
+        except Exception as e:
+            # The draft is already in place, so a failed second pass costs nothing
+            print(f"❌ Second pass error: {e}")
+
+    def _stream_loop(self, utterance):
+        """
+        Ticker while Ctrl is held: queues a commit as the worker's idle job
+        every poll. It decodes nothing itself, so streaming never runs an
+        inference next to an earlier dictation or a second pass, and a commit
+        still waiting is simply replaced by the next one.
+        """
+        while self.recording and self.utterance is utterance:
+            time.sleep(STREAM_POLL_SECONDS)
+            if self.recording and self.utterance is utterance:
+                self.worker.submit_idle(TranscriptionJob(
+                    self._stream_commit, (utterance,), name=f"commit-{id(utterance):x}"))
+
+    def _stream_commit(self, utterance):
+        """On the transcription worker: commits a ready chunk, unless the key is already up."""
+        if not self.recording or self.utterance is not utterance or utterance.job is not None:
+            return  # transcribe() decodes whatever is left
+        try:
+            self._commit_ready_chunk(utterance)
+        except Exception as e:
+            # The tail decode in transcribe() still covers whatever is left
+            print(f"❌ Streaming Error: {e}")
+
+    def _commit_ready_chunk(self, utterance):
+        audio_np = utterance.buffer.view(utterance.commit_pos)
+        cut = find_commit_point(audio_np)
+        if cut is None:
+            return
+
+        # Feed previous text as the prompt so the chunk keeps its context
+        prompt = " ".join(utterance.committed) or None
+        utterance.committed.append(self._decode(audio_np[:cut], prompt=prompt, utterance=utterance))
+        utterance.commit_pos += cut
+        print(f"📝 Committed {cut / SAMPLE_RATE:.1f}s of audio while recording")
+
+    def transcribe(self, use_gemini, utterance=None):
+        utterance = utterance or self.utterance
+        if utterance is None:
             state_machine.set_state(AppState.IDLE)
+            return
+        trace = utterance.trace
+        job = utterance.job
+        if job is not None and job.submitted_at is not None and job.started_at is not None:
+            trace.add_span("queued", job.submitted_at, job.started_at)
+        try:
+            if not self.model_ready:
+                print("⏳ Waiting for the Whisper model to finish loading...")
+            # Streaming commits run on this same worker thread, so none is mid-chunk now
+
+            # View of what was not decoded while recording (zero-copy within one arena)
+            # (in batch mode that is the whole recording)
+            tail = utterance.buffer.view(utterance.commit_pos)
+
+            if not len(tail) and not utterance.committed:
+                self._complete_trace(trace, "empty")
+                self._finish(AppState.IDLE)
+                return
+
+            parts = list(utterance.committed)
+            # Chunks committed while recording used the resident model; the rest may escalate,
+            # unless this is a two-pass draft (escalation is then the second pass's job)
+            model = self._route(utterance) if len(tail) and not self.engine.two_pass else None
+            start = time.perf_counter()
+            if len(tail):
+                parts.append(self._decode(tail, prompt=" ".join(parts) or None, utterance=utterance, model=model))
+            utterance.inference_seconds = time.perf_counter() - start
+            text = " ".join(p for p in parts if p).strip()
+
+            queue_wait = utterance.job.queue_wait if utterance.job else None
+            if queue_wait is not None:
+                print(f"⏱️  Queue wait {queue_wait:.2f}s | Inference {utterance.inference_seconds:.2f}s")
+
+            if utterance.trimmed_seconds:
+                print(f"✂️  VAD trimmed {utterance.trimmed_seconds:.1f}s of silence")
+
+            print(f"📝 Result: {text}")
+
+            if not text:
+                if use_gemini:
+                    polish.cancel_prewarm()
+                self._complete_trace(trace, "empty")
+                self._finish(AppState.IDLE)
+                return
+
+            def inject(piece):
+                with trace.span("inject"):
+                    return FastTyper.inject(piece)
+
+            raw = text
+            if use_gemini and polish.STREAM_POLISH:
+                # Sentences are pasted as the backend streams them; if the
+                # stream breaks off, every sentence so far is swapped for the raw text
+                mark = FastTyper.mark()
+                with trace.span("polish"):
+                    text = polish.polish_streaming(
+                        raw, inject, replace=lambda pasted, new: FastTyper.replace(pasted, new, since=mark))
+                pasted = text is not None
+            else:
+                if use_gemini:
+                    # Bounded wait: past the deadline the raw text is pasted right away,
+                    # and optionally swapped for the polished text when it arrives
+                    on_late = (lambda polished: FastTyper.replace(raw, polished)) if polish.LATE_REPLACE else None
+                    with trace.span("polish"):
+                        text = polish.polish_with_deadline(raw, on_late=on_late)
+                # One output path: snapshot, paste, restore (with retries and timing)
+                pasted = inject(text)
+
+            if not pasted:
+                print("❌ Paste failed; the text could not be (fully) injected.")
+                self._complete_trace(trace, "paste_failed", after_restore=True)
+                self._finish(AppState.ERROR, trace)
+                return
+            if text != raw:
+                print(f"✨ Polished: {text}")
+            print(f"⏱️  {trace.summary()}")
+            if self.engine.two_pass and text == raw:
+                # Polished text is already a rewrite; only raw drafts get a second pass
+                self._schedule_refine(utterance, raw)
+            self._complete_trace(trace, "pasted", after_restore=True)
+            # The state machine returns SUCCESS to IDLE on its own timer,
+            # so the worker is free for the next dictation right away
+            self._finish(AppState.SUCCESS, trace)
         except Exception as e:
             print(f"❌ Transcription Error: {e}")
-            state_machine.set_state(AppState.IDLE)
\ No newline at end of file
+            self._complete_trace(trace, "error")
+            self._finish(AppState.IDLE)
+        finally:
+            # The arena can now be reused by the next recording
+            utterance.buffer.in_use = False
@@ -1,16 +1,120 @@
 from enum import Enum, auto
+import queue
 import threading
+import time
 import logging
 
 logger = logging.getLogger(__name__)
 
 class AppState(Enum):
+    LOADING = auto()  # Whisper model still loading in the background; recording is allowed
     IDLE = auto()
     RECORDING = auto()
     PROCESSING = auto()
     SUCCESS = auto()
     ERROR = auto()
 
+# Transient states fall back to IDLE on their own after this many seconds.
+# The timer lives here so no worker thread has to sleep through a UI animation.
+AUTO_RESET_SECONDS = {
+    AppState.SUCCESS: 2.0,
+    # Long enough to read; without a key listener nothing else would leave ERROR
+    AppState.ERROR: 4.0,
+}
+
+_delivery = threading.local()
+
+
+def _deliver(observer, new_state, kwargs, queued_at, machine):
+    """Runs one observer for one transition, on whatever thread its dispatcher uses."""
+    _delivery.queued_at = queued_at
+    try:
+        observer(new_state, kwargs)
+    except Exception as e:
+        logger.error(f"Error in observer {observer}: {e}", exc_info=True)
+        # If critical observer fails during RECORDING, trigger ERROR state
+        if new_state == AppState.RECORDING:
+            # Schedule error state to avoid recursion
+            threading.Timer(0.1, lambda: machine.set_state(AppState.ERROR, error="Recording failed to start")).start()
+    finally:
+        _delivery.queued_at = None
+
+
+def transition_time():
+    """
+    perf_counter() of the transition being delivered on this thread, i.e. when
+    the key was pressed rather than when the observer got to run. None outside
+    an observer call.
+    """
+    return getattr(_delivery, "queued_at", None)
+
+
+def transition_age():
+    """
+    Seconds since the transition being delivered on this thread was made,
+    e.g. key press to recording start. None outside an observer call.
+    """
+    queued_at = transition_time()
+    return None if queued_at is None else time.perf_counter() - queued_at
+
+
+class InlineDispatcher:
+    """Calls the observer right away on the thread that changed the state."""
+    inline = True  # Run after the state lock is released, so observers may change state
+
+    def post(self, call):
+        call()
+
+
+class WorkerDispatcher:
+    """
+    Delivers transitions in order on one dedicated thread, so a slow observer
+    (e.g. opening the audio stream) never holds up the key listener.
+    """
+
+    def __init__(self, name="StateObserver"):
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def post(self, call):
+        self._queue.put(call)
+
+    def _run(self):
+        while True:
+            call = self._queue.get()
+            if call is None:
+                return
+            call()
+
+    def close(self):
+        self._queue.put(None)
+
+
+class QtDispatcher:
+    """
+    Delivers transitions on the Qt GUI thread through a queued signal, so
+    widgets are only touched from the thread that owns them. Create it on the
+    GUI thread after the QApplication exists.
+    """
+
+    def __init__(self):
+        # Qt is imported lazily so headless users of this module never load it
+        from PyQt6.QtCore import QObject, Qt, pyqtSignal
+
+        class _Bridge(QObject):
+            deliver = pyqtSignal(object)
+
+        self._bridge = _Bridge()
+        self._bridge.deliver.connect(lambda call: call(), Qt.ConnectionType.QueuedConnection)
+
+    def post(self, call):
+        self._bridge.deliver.emit(call)
+
+
+_inline = InlineDispatcher()
+
+
 class StateMachine:
     """
     Singleton State Machine using the Observer pattern.
@@ -31,22 +135,24 @@ class StateMachine:
         self._observers = []
         self._audio_level_observers = []  # Separate observers for audio levels
         self._state_lock = threading.Lock()
+        self._generation = 0  # Bumped on every transition; invalidates pending auto-resets
         self._data = {} # Optional payload for state (e.g., error message)
         self.context = {} # Shared session context (e.g., flags like use_gemini)
 
-    def add_observer(self, observer_func):
+    def add_observer(self, observer_func, dispatcher=None):
         """
         Register a callback function to be called on state changes.
         Callback signature: observer_func(state: AppState, data: dict)
+        `dispatcher` picks the thread it runs on (WorkerDispatcher, QtDispatcher);
+        by default it runs inline on the thread that changed the state.
         """
         with self._state_lock:
-            if observer_func not in self._observers:
-                self._observers.append(observer_func)
+            if all(func != observer_func for func, _ in self._observers):
+                self._observers.append((observer_func, dispatcher or _inline))
 
     def remove_observer(self, observer_func):
         with self._state_lock:
-            if observer_func in self._observers:
-                self._observers.remove(observer_func)
+            self._observers = [(func, d) for func, d in self._observers if func != observer_func]
 
     @property
     def current_state(self):
@@ -61,25 +167,68 @@ class StateMachine:
         with self._state_lock:
             if self._state == new_state and not kwargs:
                 return # No change
-            
-            self._state = new_state
-            self._data = kwargs
-            logger.info(f"State Transition: {new_state.name} | Data: {kwargs}")
-            
-            # Notify observers
-            observers_copy = list(self._observers)  # Copy to avoid modification during iteration
-        
-        # Notify outside the lock to prevent deadlocks
-        for observer in observers_copy:
-            try:
-                observer(new_state, kwargs)
-            except Exception as e:
-                logger.error(f"Error in observer {observer}: {e}", exc_info=True)
-                # If critical observer fails during RECORDING, trigger ERROR state
-                if new_state == AppState.RECORDING:
-                    # Schedule error state to avoid recursion
-                    import threading
-                    threading.Timer(0.1, lambda: self.set_state(AppState.ERROR, error="Recording failed to start")).start()
+            inline = self._notify(new_state, kwargs, self._apply(new_state, kwargs))
+        self._deliver_inline(inline)
+
+    def compare_and_set(self, expected: AppState, new_state: AppState, **kwargs) -> bool:
+        """
+        Transition only if the current state is still `expected`.
+        Lets background work (e.g. the model loader) finish without
+        clobbering a transition the user made in the meantime.
+        """
+        with self._state_lock:
+            if self._state != expected:
+                return False
+            inline = self._notify(new_state, kwargs, self._apply(new_state, kwargs))
+        self._deliver_inline(inline)
+        return True
+
+    def _apply(self, new_state, kwargs):
+        """Updates the state; must be called with _state_lock held."""
+        self._state = new_state
+        self._data = kwargs
+        self._generation += 1
+        logger.info(f"State Transition: {new_state.name} | Data: {kwargs}")
+
+        delay = AUTO_RESET_SECONDS.get(new_state)
+        if delay is not None:
+            timer = threading.Timer(delay, self._auto_reset, args=(self._generation,))
+            timer.daemon = True
+            timer.start()
+
+        # Copy to avoid modification during iteration
+        return list(self._observers)
+
+    def _auto_reset(self, generation):
+        """Returns a transient state to IDLE unless something else happened since."""
+        with self._state_lock:
+            if self._generation != generation:
+                return
+            inline = self._notify(AppState.IDLE, {}, self._apply(AppState.IDLE, {}))
+        self._deliver_inline(inline)
+
+    def _notify(self, new_state, kwargs, observers_copy):
+        """
+        Posts the transition to every queued dispatcher; must be called with
+        _state_lock held, so concurrent transitions are queued in the order
+        they were applied. Posting never blocks. Returns the inline deliveries,
+        which the caller runs once the lock is released (see _deliver_inline).
+        """
+        queued_at = time.perf_counter()
+        inline = []
+        for observer, dispatcher in observers_copy:
+            call = lambda o=observer: _deliver(o, new_state, kwargs, queued_at, self)
+            if getattr(dispatcher, "inline", False):
+                inline.append((dispatcher, call))
+            else:
+                dispatcher.post(call)
+        return inline
+
+    @staticmethod
+    def _deliver_inline(inline):
+        # Outside the lock: inline observers may change the state themselves
+        for dispatcher, call in inline:
+            dispatcher.post(call)
 
     def add_audio_level_observer(self, observer_func):
         """Register a callback for audio level updates. Signature: observer_func(level: float)"""
@@ -0,0 +1,131 @@
+"""
+Per-utterance latency traces for the dictation hot path.
+
+Every recording gets a Trace. Point events (key down, stream opened, key up,
+audio drained, clipboard restored) and spans (queued, vad, inference, polish,
+inject) are stamped with time.perf_counter(), so they are monotonic and
+comparable across threads. When the utterance is done the trace is written as
+one JSON line to ZEROG_TRACE_FILE (if set) and summarized in the log and HUD.
+"""
+import contextlib
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Append one JSON object per utterance here; unset = log the summary only
+TRACE_FILE = os.getenv("ZEROG_TRACE_FILE") or None
+
+# Spans in pipeline order, with the short names the summary uses
+SUMMARY_SPANS = (
+    ("queued", "queue"),
+    ("vad", "vad"),
+    ("inference", "infer"),
+    ("polish", "polish"),
+    ("inject", "paste"),
+)
+
+_ids = itertools.count(1)
+_write_lock = threading.Lock()
+
+# The most recently finished trace, for tools that want the numbers directly
+last_trace = None
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 3)
+
+
+class Trace:
+    """Timestamps for one utterance, from key down to clipboard restore."""
+
+    def __init__(self):
+        self.id = next(_ids)
+        self.wall_time = time.time()
+        self.created = time.perf_counter()
+        self.events = {}  # name -> perf_counter()
+        self.spans = {}   # name -> [first start, last end, total seconds, count]
+        self.attrs = {}   # Anything else worth keeping (audio seconds, backend, outcome...)
+        self._lock = threading.Lock()
+        self._finished = False
+
+    def mark(self, name, at=None):
+        """Records a point event; `at` backdates it (e.g. to the key press)."""
+        with self._lock:
+            self.events[name] = time.perf_counter() if at is None else at
+
+    def add_span(self, name, start, end):
+        """Records [start, end]. Repeated spans (e.g. streamed chunks) add up."""
+        with self._lock:
+            span = self.spans.get(name)
+            if span is None:
+                self.spans[name] = [start, end, end - start, 1]
+            else:
+                span[0] = min(span[0], start)
+                span[1] = max(span[1], end)
+                span[2] += end - start
+                span[3] += 1
+
+    @contextlib.contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_span(name, start, time.perf_counter())
+
+    @property
+    def origin(self):
+        """Key down if we saw it, else when the trace was created."""
+        return self.events.get("key_down", self.created)
+
+    def to_dict(self):
+        with self._lock:
+            origin = self.origin
+            return {
+                "trace": self.id,
+                "time": self.wall_time,
+                "events": {name: _ms(at - origin) for name, at in
+                           sorted(self.events.items(), key=lambda item: item[1])},
+                "spans": {name: {"start_ms": _ms(start - origin), "ms": _ms(total), "count": count}
+                          for name, (start, end, total, count) in
+                          sorted(self.spans.items(), key=lambda item: item[1][0])},
+                **self.attrs,
+            }
+
+    def summary(self):
+        """One line for the log and HUD, e.g. 'mic 8 ms · infer 212 ms · paste 11 ms · total 0.41 s'."""
+        with self._lock:
+            parts = []
+            if "key_down" in self.events and "stream_opened" in self.events:
+                parts.append(f"mic {_ms(self.events['stream_opened'] - self.events['key_down']):.0f} ms")
+            for name, short in SUMMARY_SPANS:
+                if name in self.spans:
+                    parts.append(f"{short} {self.spans[name][2] * 1000:.0f} ms")
+            # Key up to text on screen: what the user waits for
+            end = self.spans["inject"][1] if "inject" in self.spans else None
+            if end is not None and "key_up" in self.events:
+                parts.append(f"total {end - self.events['key_up']:.2f} s")
+            return " · ".join(parts)
+
+    def finish(self):
+        """Emits the trace once; later calls do nothing."""
+        global last_trace
+        with self._lock:
+            if self._finished:
+                return
+            self._finished = True
+        last_trace = self
+        record = self.to_dict()
+        logger.info(f"Trace {self.id}: {self.summary()}")
+        if TRACE_FILE:
+            line = json.dumps(record)
+            try:
+                with _write_lock, open(TRACE_FILE, "a") as f:
+                    f.write(line + "\n")
+            except OSError as e:
+                logger.warning(f"Could not write trace to {TRACE_FILE}: {e}")
@@ -6,45 +6,90 @@ with a keystroke simulator (xdotool).
 
 xdotool: Handles the keyboard simulation (the 'V' in Ctrl+V)
 xclip: Allows pyperclip to interact with the Linux clipboard
+
+The Ctrl+V itself goes through zerog.core.injector, which keeps a persistent
+X connection (XTest) or xdotool process instead of forking per paste.
+Inside the app, clipboard work goes through zerog.core.clipboard's Qt backend
+(every MIME type, no xclip fork); pyperclip/xclip is the headless fallback.
 """
-import subprocess
-import time
-import pyperclip
+import collections
 import logging
 import threading
+import time
+from .clipboard import get_clipboard
+from .injector import get_injector
 
 logger = logging.getLogger(__name__)
 
 class ClipboardManager:
-    """Linux implementation for clipboard state management using xclip."""
+    """
+    Linux clipboard state management. Delegates to the active backend:
+    Qt (all MIME types) once installed by the app, otherwise pyperclip/xclip.
+    """
     
     @staticmethod
     def snapshot():
-        """Captures the current clipboard content using pyperclip."""
+        """Captures the current clipboard content. Returns None if it can't be read."""
         try:
-            return pyperclip.paste()
+            return get_clipboard().snapshot()
         except Exception as e:
             logger.error(f"Clipboard snapshot failed: {e}")
-            return ""
+            return None
 
     @staticmethod
-    def restore(text_data):
-        """Restores the clipboard to a previous string state."""
+    def restore(snapshot_data):
+        """Restores the clipboard to a state returned by snapshot()."""
         try:
-            if text_data:
-                pyperclip.copy(text_data)
-                logger.debug("Clipboard restored.")
+            get_clipboard().restore(snapshot_data)
+            logger.debug("Clipboard restored.")
         except Exception as e:
             logger.error(f"Clipboard restore failed: {e}")
 
+    @staticmethod
+    def set_text(text):
+        get_clipboard().set_text(text)
+
+# How long the target app gets to read the clipboard before we restore it
+RESTORE_DELAY_SECONDS = 0.8
+# Paste keystroke attempts before giving up, and the pause between them
+PASTE_ATTEMPTS = 3
+PASTE_RETRY_DELAY_SECONDS = 0.05
+# Pastes remembered for replace(since=...), e.g. the sentences of one streamed polish
+RECENT_PASTES = 256
+# Default for FastTyper.replace_max_age: replace() leaves older pastes alone,
+# since by then the user may have moved the cursor or typed
+REPLACE_MAX_AGE_SECONDS = 3.0
+
+# One entry of the paste history: text is None if the paste failed,
+# focus is the window it went to, at is its perf_counter() time
+_Paste = collections.namedtuple("_Paste", "count text focus at")
+
 class FastTyper:
     """
-    Linux-native text injector.
-    Strategy: Copy text to clipboard -> Trigger Ctrl+V via xdotool -> Restore clipboard.
+    Linux-native text injector, and the single output path for transcriptions.
+    Strategy: Copy text to clipboard -> Trigger Ctrl+V via the injector -> Restore clipboard.
+
+    Injections are serialized. If a restore from the previous paste is still
+    pending, it is taken over instead of snapshotting our own text, so rapid
+    back-to-back dictations always end with the user's original clipboard.
     """
-    
-    @staticmethod
-    def inject(text: str) -> bool:
+    _lock = threading.Lock()
+    _restore_timer = None
+    _restore_token = None     # Identifies the restore that is allowed to run
+    _original_content = None  # Snapshot the pending restore will put back
+    _paste_count = 0          # Paste attempts so far; see mark()
+    _recent = collections.deque(maxlen=RECENT_PASTES)  # _Paste entries, oldest first
+    _restore_callbacks = []   # Run once the pending restore has put the clipboard back
+    # Record the focused window with each paste. Only replace() needs it, and on
+    # the xdotool backend reading it forks, so it is off unless a replace can follow.
+    track_focus = False
+    replace_max_age = REPLACE_MAX_AGE_SECONDS  # Seconds; set from ZEROG_REPLACE_MAX_AGE by the recorder
+
+    # Per-step latency of the most recent inject() call, in seconds
+    last_timing = {}
+
+    @classmethod
+    def inject(cls, text: str) -> bool:
         """
         The primary injection entry point for Linux.
         """
@@ -53,34 +98,188 @@ class FastTyper:
 
         logger.info(f"FastTyper: Injecting {len(text)} characters.")
 
+        focus = cls._focus()
+        with cls._lock:
+            return cls._inject_locked(text, focus)
+
+    @classmethod
+    def _focus(cls):
+        """The focused window if track_focus is on, else None. Call without _lock held."""
+        return get_injector().focused_window() if cls.track_focus else None
+
+    @classmethod
+    def mark(cls):
+        """Position in the paste history; pass it to replace(since=...) to replace several pastes at once."""
+        with cls._lock:
+            return cls._paste_count
+
+    @classmethod
+    def _pasted_since(cls, since):
+        """The pastes after mark `since` (the latest one if None), or None if unknown or one failed."""
+        if since is None:
+            since = cls._paste_count - 1
+        if cls._paste_count - since > len(cls._recent):
+            return None
+        pastes = [paste for paste in cls._recent if paste.count > since]
+        if not pastes or any(paste.text is None for paste in pastes):
+            return None
+        return pastes
+
+    @classmethod
+    def _replace_refusal(cls, old_text, since, focus, within=0.0):
+        """Why old_text can't be replaced `within` seconds from now, or None if it can. Must be called with _lock held."""
+        pastes = cls._pasted_since(since)
+        if not old_text or pastes is None or "".join(paste.text for paste in pastes) != old_text:
+            return "the pasted text is no longer the latest"
+        if time.perf_counter() + within - pastes[-1].at > cls.replace_max_age:
+            return f"it was pasted more than {cls.replace_max_age:g}s ago"
+        if not cls.track_focus:
+            return "track_focus is off, so nothing says the cursor is still there"
+        if focus is None or any(paste.focus != focus for paste in pastes):
+            return "the focus has moved since it was pasted"
+        return None
+
+    @classmethod
+    def can_replace(cls, old_text: str, since=None, within=0.0) -> bool:
+        """
+        Whether replace() would still go ahead `within` seconds from now (if
+        the focus stays put); lets callers skip work whose result would be refused.
+        """
+        focus = cls._focus()
+        with cls._lock:
+            return cls._replace_refusal(old_text, since, focus, within) is None
+
+    @classmethod
+    def replace(cls, old_text: str, new_text: str, since=None) -> bool:
+        """
+        Replaces text we just pasted: selects it backwards from the cursor and
+        pastes over the selection. Refuses if anything was pasted since, if
+        old_text is not ours, if it is older than replace_max_age or
+        if another window has focus now, so it never edits text it doesn't
+        own (focus is only known with track_focus on). With `since` (from
+        mark()), old_text may span every paste after that mark.
+        """
+        focus = cls._focus()
+        with cls._lock:
+            refusal = cls._replace_refusal(old_text, since, focus)
+            if refusal is not None:
+                logger.info(f"FastTyper: Skipping replace; {refusal}.")
+                return False
+            if not get_injector().select_back(len(old_text)):
+                return False
+            logger.info(f"FastTyper: Replacing {len(old_text)} characters in place.")
+            return cls._inject_locked(new_text, focus)
+
+    @classmethod
+    def when_restored(cls, callback):
+        """
+        Calls callback() once the user's clipboard is back, or right away if no
+        restore is pending. A restore taken over by a newer paste carries its
+        callbacks along, since that is when the clipboard really comes back.
+        """
+        with cls._lock:
+            if cls._restore_timer is not None:
+                cls._restore_callbacks.append(callback)
+                return
+        callback()
+
+    @classmethod
+    def _inject_locked(cls, text: str, focus=None) -> bool:
+        """Snapshot -> copy -> paste -> scheduled restore. Must be called with _lock held."""
+        timing = {"attempts": 0}
+        start = time.perf_counter()
         try:
-            # 1. Snapshot the user's current work
-            original_content = ClipboardManager.snapshot()
+            # 1. Snapshot the user's current work, unless a pending restore
+            # already holds it (the clipboard currently has our last paste)
+            if cls._restore_timer is not None:
+                cls._restore_timer.cancel()
+                cls._restore_timer = None
+                original_content = cls._original_content
+            else:
+                original_content = ClipboardManager.snapshot()
+            timing["snapshot"] = time.perf_counter() - start
 
             # 2. Stage the new transcription
-            pyperclip.copy(text)
-            
-            # 3. Small delay to ensure the OS clipboard manager registers the change
-            time.sleep(0.1)
+            # (both backends return once we own the selection,
+            # so no settle delay is needed before pasting)
+            mark = time.perf_counter()
+            ClipboardManager.set_text(text)
+            timing["copy"] = time.perf_counter() - mark
 
-            # 4. Use xdotool to simulate the paste command
+            # 3. Simulate the paste command on the persistent injector
             # This works across almost all Linux GUI apps (Browsers, IDEs, Slack, etc.)
-            subprocess.run([
-                "xdotool", "key", "ctrl+v"
-            ], check=True)
+            mark = time.perf_counter()
+            pasted = cls._paste_with_retry(timing)
+            timing["paste"] = time.perf_counter() - mark
 
-            # 5. Restore the original clipboard in a background thread 
+            # 4. Restore the original clipboard in a background thread
             # to prevent blocking the UI, with enough delay for the paste to finish.
-            threading.Timer(0.8, lambda: ClipboardManager.restore(original_content)).start()
-            
+            cls._schedule_restore(original_content, RESTORE_DELAY_SECONDS if pasted else 0)
+
+            if not pasted:
+                logger.error("Paste keystroke failed. Is an X11 session (or xdotool) available?")
+                cls._remember(None)
+                return False
+            cls._remember(text, focus)
             return True
 
-        except subprocess.CalledProcessError:
-            logger.error("xdotool command failed. Is it installed?")
-            return False
         except Exception as e:
             logger.error(f"Injection failed: {e}", exc_info=True)
+            cls._remember(None)
             return False
+        finally:
+            timing["total"] = time.perf_counter() - start
+            cls.last_timing = timing
+            logger.info(
+                "FastTyper: %.1f ms total (snapshot %.1f, copy %.1f, paste %.1f ms, %d attempt(s))",
+                timing["total"] * 1000, timing.get("snapshot", 0) * 1000,
+                timing.get("copy", 0) * 1000, timing.get("paste", 0) * 1000, timing["attempts"],
+            )
+
+    @classmethod
+    def _remember(cls, text, focus=None):
+        """Must be called with _lock held."""
+        cls._paste_count += 1
+        cls._recent.append(_Paste(cls._paste_count, text, focus, time.perf_counter()))
+
+    @staticmethod
+    def _paste_with_retry(timing) -> bool:
+        injector = get_injector()
+        for attempt in range(1, PASTE_ATTEMPTS + 1):
+            timing["attempts"] = attempt
+            if injector.paste():
+                return True
+            if attempt < PASTE_ATTEMPTS:
+                time.sleep(PASTE_RETRY_DELAY_SECONDS)
+        return False
+
+    @classmethod
+    def _schedule_restore(cls, original_content, delay):
+        """Must be called with _lock held."""
+        token = object()
+        timer = threading.Timer(delay, cls._restore, args=(token,))
+        timer.daemon = True
+        cls._original_content = original_content
+        cls._restore_token = token
+        cls._restore_timer = timer
+        timer.start()
+
+    @classmethod
+    def _restore(cls, token):
+        with cls._lock:
+            # A newer inject() took this restore over
+            if cls._restore_token is not token:
+                return
+            original_content = cls._original_content
+            cls._restore_timer = None
+            cls._original_content = None
+            ClipboardManager.restore(original_content)
+            callbacks, cls._restore_callbacks = cls._restore_callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Restore callback failed: {e}")
 
     @staticmethod
     def type_text(text: str):
@@ -88,7 +287,4 @@ class FastTyper:
         Alternative 'Slow' typing mode if paste is blocked.
         Simulates individual keystrokes.
         """
-        try:
-            subprocess.run(["xdotool", "type", "--delay", "5", text], check=True)
-        except Exception as e:
-            logger.error(f"Slow typing failed: {e}")
\ No newline at end of file
+        return get_injector().type_text(text)
\ No newline at end of file
@@ -0,0 +1,138 @@
+import collections
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# What to do when a dictation finishes while an earlier one is still queued:
+#   serialize: run jobs in order, one at a time; only a backlog past
+#              MAX_PENDING_JOBS drops speech (the oldest waiting job)
+#   latest:    cancel jobs that haven't started yet; only the newest one runs
+OVERLAP_POLICIES = ("serialize", "latest")
+
+# Jobs allowed to wait behind the running one before the oldest waiting one is dropped
+MAX_PENDING_JOBS = 4
+
+
+class TranscriptionJob:
+    """One unit of work for the TranscriptionWorker, with its own timing."""
+
+    def __init__(self, fn, args=(), name="", on_cancel=None):
+        self.fn = fn
+        self.args = args
+        self.name = name
+        self.on_cancel = on_cancel  # Called on the worker thread instead of fn
+        self.cancelled = False
+        self.submitted_at = None
+        self.started_at = None
+        self.finished_at = None
+
+    def cancel(self):
+        self.cancelled = True
+
+    @property
+    def queue_wait(self):
+        """Seconds between submit() and the worker picking the job up."""
+        if self.submitted_at is None or self.started_at is None:
+            return None
+        return self.started_at - self.submitted_at
+
+    @property
+    def run_seconds(self):
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+
+class TranscriptionWorker(threading.Thread):
+    """
+    Long-lived thread that runs transcription jobs one at a time, so
+    back-to-back dictations never run two inferences on the same cores.
+    """
+
+    def __init__(self, policy="serialize", max_pending=MAX_PENDING_JOBS):
+        super().__init__(name="TranscriptionWorker")
+        self.daemon = True  # Ensures the thread closes when you exit the app
+        if policy not in OVERLAP_POLICIES:
+            logger.warning(f"Unknown overlap policy '{policy}'; using 'serialize'.")
+            policy = "serialize"
+        self.policy = policy
+        self.max_pending = max_pending
+        self._pending = collections.deque()
+        self._idle = None  # Low-priority job; see submit_idle()
+        self._cond = threading.Condition()
+        self._stopping = False
+
+    def submit(self, job: TranscriptionJob) -> TranscriptionJob:
+        """Queues a job without blocking the caller (e.g. the key listener thread)."""
+        with self._cond:
+            job.submitted_at = time.perf_counter()
+            live = [j for j in self._pending if not j.cancelled]
+            if self.policy == "latest":
+                stale = live
+            else:
+                # Bounded backlog: drop the oldest waiting job once full
+                stale = live[:max(0, len(live) - self.max_pending + 1)]
+            for old in stale:
+                logger.warning(f"Cancelling stale transcription job {old.name or id(old)}")
+                old.cancel()
+            self._pending.append(job)
+            self._cond.notify()
+        return job
+
+    def submit_idle(self, job: TranscriptionJob) -> TranscriptionJob:
+        """
+        Queues a low-priority job (e.g. a two-pass correction). It runs only
+        when no regular job is waiting, and at most one is kept: a newer one
+        cancels it. It never counts towards `pending`.
+        """
+        with self._cond:
+            job.submitted_at = time.perf_counter()
+            old, self._idle = self._idle, job
+            if old is not None:
+                logger.info(f"Dropping superseded idle job {old.name or id(old)}")
+                old.cancel()
+                if old.on_cancel:
+                    self._pending.append(old)
+            self._cond.notify()
+        return job
+
+    @property
+    def pending(self):
+        with self._cond:
+            return sum(1 for j in self._pending if not j.cancelled)
+
+    def stop(self):
+        """Finishes the queued jobs (not a waiting idle job), then ends the thread."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+
+    def run(self):
+        while True:
+            with self._cond:
+                while not self._pending and self._idle is None and not self._stopping:
+                    self._cond.wait()
+                if self._pending:
+                    job = self._pending.popleft()
+                elif self._idle is not None and not self._stopping:
+                    job, self._idle = self._idle, None
+                else:
+                    return
+
+            job.started_at = time.perf_counter()
+            try:
+                if job.cancelled:
+                    if job.on_cancel:
+                        job.on_cancel()
+                else:
+                    job.fn(*job.args)
+            except Exception as e:
+                logger.error(f"Transcription job {job.name or id(job)} failed: {e}", exc_info=True)
+            finally:
+                job.finished_at = time.perf_counter()
+
+            if not job.cancelled:
+                logger.info(f"Job {job.name or id(job)}: waited {job.queue_wait:.3f}s, "
+                            f"ran {job.run_seconds:.3f}s")
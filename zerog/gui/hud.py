@@ -1,13 +1,14 @@
 import sys
-from PyQt6.QtWidgets import QMainWindow, QVBoxLayout, QPushButton, QWidget, QLabel
-from PyQt6.QtCore import Qt, pyqtSlot
-from zerog.core.state import state_machine, AppState
+from PyQt6.QtWidgets import QMainWindow, QVBoxLayout, QPushButton, QWidget, QLabel, QProgressBar
+from PyQt6.QtCore import Qt, QTimer, pyqtSlot
+from zerog.core.state import state_machine, AppState, QtDispatcher
+from zerog.core.meter import METER_FPS, to_meter
 
 class LinuxHUD(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("ZeroG Control")
-        self.setFixedSize(300, 150)
+        self.setFixedSize(300, 190)
         self.setWindowFlags(Qt.WindowType.WindowStaysOnTopHint)
 
         # UI Elements
@@ -15,6 +16,17 @@ class LinuxHUD(QMainWindow):
         self.status_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.status_label.setStyleSheet("font-weight: bold; font-size: 14px; color: white;")
         
+        # Live microphone level while recording
+        self.level_bar = QProgressBar(self)
+        self.level_bar.setRange(0, 100)
+        self.level_bar.setTextVisible(False)
+        self.level_bar.setFixedHeight(8)
+
+        # Where the last dictation's time went (key up to text on screen)
+        self.trace_label = QLabel("", self)
+        self.trace_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.trace_label.setStyleSheet("font-size: 10px; color: #aaaaaa;")
+
         self.action_button = QPushButton("🔴 Start Recording", self)
         self.action_button.setMinimumHeight(60)
         
@@ -23,30 +35,78 @@ class LinuxHUD(QMainWindow):
         
         layout = QVBoxLayout()
         layout.addWidget(self.status_label)
+        layout.addWidget(self.level_bar)
+        layout.addWidget(self.trace_label)
         layout.addWidget(self.action_button)
         
         container = QWidget()
         container.setLayout(layout)
         self.setCentralWidget(container)
         
-        # Subscribe to state changes
-        state_machine.add_observer(self.on_state_changed)
+        # The meter is sampled at a fixed frame rate, never pushed from the audio thread
+        self._meter = None
+        self._meter_blocks = 0
+        self.meter_timer = QTimer(self)
+        self.meter_timer.setInterval(1000 // METER_FPS)
+        self.meter_timer.timeout.connect(self.poll_meter)
+
+        # Subscribe to state changes; they arrive on the GUI thread, whoever made them
+        state_machine.add_observer(self.on_state_changed, dispatcher=QtDispatcher())
         self.show()
 
+    def attach_meter(self, meter):
+        """Shows the recorder's LevelMeter while recording."""
+        self._meter = meter
+
+    @pyqtSlot()
+    def poll_meter(self):
+        if self._meter is None:
+            return
+        rms, peak, blocks = self._meter.read()
+        if blocks == self._meter_blocks:
+            return  # No new audio since the last frame
+        self._meter_blocks = blocks
+        level = to_meter(rms)
+        self.update_audio_level(level)
+        # Other level observers get the same coalesced updates, on this thread
+        state_machine.broadcast_audio_level(level)
+
+    def update_audio_level(self, level):
+        self.level_bar.setValue(int(level * 100))
+
     @pyqtSlot()
     def handle_button_click(self):
         """Toggle between states based on current app state"""
         current = state_machine.current_state
-        if current == AppState.IDLE or current == AppState.SUCCESS or current == AppState.ERROR:
+        # Recording is allowed while the model warms up; it's transcribed once ready
+        if current in (AppState.IDLE, AppState.LOADING, AppState.SUCCESS, AppState.ERROR):
             state_machine.set_state(AppState.RECORDING)
         elif current == AppState.RECORDING:
             state_machine.set_state(AppState.PROCESSING)
 
     def on_state_changed(self, state, data=None):
         """Updates the button text and color based on the state"""
-        self.status_label.setText(f"STATUS: {state.name}")
-        
+        if state == AppState.LOADING:
+            self.status_label.setText("STATUS: WARMING UP")
+        else:
+            self.status_label.setText(f"STATUS: {state.name}")
+
+        if data and data.get("trace"):
+            self.trace_label.setText(data["trace"])
+
         if state == AppState.RECORDING:
+            self._meter_blocks = 0
+            self.meter_timer.start()
+        else:
+            self.meter_timer.stop()
+            self.update_audio_level(0.0)
+        
+        if state == AppState.LOADING:
+            self.action_button.setText("🔴 Start Recording (warming up)")
+            self.action_button.setEnabled(True)
+            self.action_button.setStyleSheet("")
+
+        elif state == AppState.RECORDING:
             # Change to Stop when recording
             self.action_button.setText("⏹️ Stop Recording")
             self.action_button.setStyleSheet("background-color: #ff4c4c; color: white; font-weight: bold;")
@@ -58,9 +118,16 @@ class LinuxHUD(QMainWindow):
             
         elif state == AppState.SUCCESS:
             self.action_button.setText("✅ Success!")
-            self.action_button.setEnabled(False)
+            # The next dictation can start while the success badge is showing
+            self.action_button.setEnabled(True)
             self.action_button.setStyleSheet("background-color: #2e7d32; color: white;")
             
+        elif state == AppState.ERROR:
+            # Recording again is the way out; the state machine also resets to IDLE on its own
+            self.action_button.setText("⚠️ Failed - Record Again")
+            self.action_button.setEnabled(True)
+            self.action_button.setStyleSheet("background-color: #c62828; color: white;")
+
         elif state == AppState.IDLE:
             self.action_button.setText("🔴 Start Recording")
             self.action_button.setEnabled(True)